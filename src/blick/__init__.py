@@ -5,6 +5,12 @@ Public API for the Blick project.
 from .blick_attribute import attributes  # noqa: F401
 from .blick_attribute import get_attribute  # noqa: F401
 # from .blick_attribute import _convert_to_minutes # noqa:F401
+from .blick_cache import BlickCache  # noqa: F401
+from .blick_cache import BlickFileCache  # noqa: F401
+from .blick_cache import BlickMemoryCache  # noqa: F401
+from .blick_cache import BlickSqliteCache  # noqa: F401
+from .blick_cache import register_cache_key  # noqa: F401
+from .blick_catalog import BlickCatalog  # noqa: F401
 from .blick_checker import BlickChecker  # noqa: F401
 from .blick_checker import BlickDebugProgress  # noqa; F401
 from .blick_checker import BlickNoProgress  # noqa; F401
@@ -17,6 +23,12 @@ from .blick_checker import keep_levels  # noqa: F401
 from .blick_checker import keep_phases  # noqa: F401
 from .blick_checker import keep_ruids  # noqa: F401
 from .blick_checker import keep_tags  # noqa: F401
+from .blick_distributed import BlickCoordinator  # noqa: F401
+from .blick_distributed import BlickWorker  # noqa: F401
+from .blick_env import BlickFixture  # noqa: F401
+from .blick_env import BlickLazyEnv  # noqa: F401
+from .blick_env import env  # noqa: F401
+from .blick_env import invalidate_fixtures  # noqa: F401
 from .blick_exception import BlickException  # noqa: F401
 from .blick_format import BM
 from .blick_format import BlickBasicHTMLRenderer
@@ -28,16 +40,25 @@ from .blick_format import BlickRenderText
 # from .blick_exception import BlickTypeError  # noqa: F401
 # from .blick_exception import BlickValueError  # noqa: F401
 from .blick_function import BlickFunction  # noqa: F401
+from .blick_history import BlickHistory  # noqa: F401
 from .blick_immutable import BlickEnvDict  # noqa: F401
 from .blick_immutable import BlickEnvList  # noqa: F401
 from .blick_immutable import BlickEnvSet  # noqa: F401
+from .blick_incremental import BlickIncremental  # noqa: F401
 from .blick_jsonrc import BlickJsonRC  # noqa: F401
 from .blick_module import BlickModule  # noqa: F401
+from .blick_order import OrderByFile  # noqa: F401
+from .blick_order import OrderFailFirst  # noqa: F401
+from .blick_order import OrderLongestFirst  # noqa: F401
+from .blick_order import OrderStrategy  # noqa: F401
 from .blick_package import BlickPackage  # noqa: F401
+from .blick_plan import BlickPlan  # noqa: F401
+from .blick_plan import BlickPlanStep  # noqa: F401
 from .blick_rc import BlickRC  # noqa: F401
 from .blick_rc_factory import blick_rc_factory  # noqa:F401
 from .blick_result import BR  # noqa: F401
 from .blick_result import BlickResult  # noqa: F401
+from .blick_result import BlickResultMeta  # noqa: F401
 from .blick_result import BlickYield  # noqa: F401
 from .blick_result import overview  # noqa: F401
 from .blick_ruid import empty_ruids  # noqa: F401
@@ -45,12 +66,22 @@ from .blick_ruid import module_ruids  # noqa: F401
 from .blick_ruid import package_ruids  # noqa: F401
 from .blick_ruid import ruid_issues  # noqa: F401
 from .blick_ruid import valid_ruids  # noqa: F401
+from .blick_scheduler import BlickScheduler  # noqa: F401
+from .blick_score import ScoreAccumulator  # noqa: F401
 from .blick_score import ScoreBinaryFail  # noqa: F401
 from .blick_score import ScoreBinaryPass  # noqa: F401
 from .blick_score import ScoreByFunctionBinary  # noqa: F401
 from .blick_score import ScoreByFunctionMean  # noqa: F401
 from .blick_score import ScoreByResult  # noqa: F401
 from .blick_score import ScoreStrategy  # noqa: F401
+from .blick_shard import merge_runs  # noqa: F401
+from .blick_shard import shard_functions  # noqa: F401
+from .blick_sink import BlickCallbackSink  # noqa: F401
+from .blick_sink import BlickJsonlSink  # noqa: F401
+from .blick_sink import BlickSink  # noqa: F401
+from .blick_sink import BlickSqliteSink  # noqa: F401
+from .blick_stats import BlickRunStats  # noqa: F401
+from .blick_store import BlickResultStore  # noqa: F401
 from .blick_tomlrc import BlickTomlRC  # noqa: F401
 from .blick_util import any_to_int_list  # noqa: F401
 from .blick_util import any_to_str_list  # noqa: F401
@@ -27,6 +27,13 @@ DEFAULT_FINISH_ON_FAIL = False  # If a blick function yields fail result stop pr
 DEFAULT_SKIP_ON_NONE = False
 DEFAULT_FAIL_ON_NONE = False
 DEFAULT_INDEX = 1  # All blick functions are given an index of 1 when created.
+DEFAULT_EXECUTOR = "thread"  # Run in the checker process, "process" runs in a worker process.
+DEFAULT_DEPENDS_ON = ()  # RUIDs of rules that must pass before this rule is run
+DEFAULT_TIMEOUT = None  # Seconds a rule may run before it is failed, None means wait forever
+DEFAULT_INPUTS = ()  # Paths/globs a rule reads, lets incremental runs replay unchanged rules
+DEFAULT_INTERVAL_MIN = 0  # How often a scheduler runs the rule, 0 falls back to ttl_minutes
+
+EXECUTORS = ("thread", "process")
 
 
 def _parse_ttl_string(input_string: str) -> float:
@@ -84,7 +91,11 @@ def attributes(
         finish_on_fail=DEFAULT_FINISH_ON_FAIL,  # Abort the whole run
         skip_on_none=DEFAULT_SKIP_ON_NONE,
         fail_on_none=DEFAULT_FAIL_ON_NONE,
-
+        executor=DEFAULT_EXECUTOR,
+        depends_on=DEFAULT_DEPENDS_ON,
+        timeout=DEFAULT_TIMEOUT,
+        inputs=DEFAULT_INPUTS,
+        interval=DEFAULT_INTERVAL_MIN,
 ):
     """
     Decorator to add attributes to a Blick function.
@@ -95,12 +106,37 @@ def attributes(
     # throws exception on bad input
     ttl_minutes = _parse_ttl_string(str(ttl_minutes))
 
+    # Same units as ttl_minutes ("30sec", "2h"), a bare number is minutes
+    interval = _parse_ttl_string(str(interval))
+
+    if executor not in EXECUTORS:
+        raise BlickException(f"Executor must be one of {EXECUTORS} not '{executor}'.")
+
+    if timeout is not None and (isinstance(timeout, bool) or
+                                not isinstance(timeout, (int, float)) or timeout <= 0):
+        raise BlickException(f"Timeout must be a number of seconds > 0 or None not '{timeout}'.")
+
     if weight in [None, True, False] or weight <= 0:
         raise BlickException("Weight must be numeric and > than 0.0.  Nominal value is 100.0.")
 
+    # Allow "ruid1 ruid2", "ruid1,ruid2" or ["ruid1","ruid2"]
+    if isinstance(depends_on, str):
+        depends_on = depends_on.replace(',', ' ').split()
+    depends_on = tuple(depends_on)
+    if not all(isinstance(dep, str) for dep in depends_on):
+        raise BlickException(f"depends_on must be a list of rule ids not {depends_on}")
+
+    # Allow "data/*.csv" or ["data/*.csv","config.toml"].  Paths can have spaces so no splitting here.
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    inputs = tuple(str(i) if hasattr(i, '__fspath__') else i for i in inputs)
+    if not all(isinstance(i, str) and i for i in inputs):
+        raise BlickException(f"inputs must be a list of paths or glob patterns not {inputs}")
+
     # Make sure these names don't have bad characters.  Very important for regular expressions
     disallowed = ' ,!@#$%^&:?*<>\\/(){}[]<>~`-+=\t\n\'"'
-    for attr_name, attr in (('tag', tag), ('phase', phase), ('ruid', ruid)):
+    for attr_name, attr in (('tag', tag), ('phase', phase), ('ruid', ruid)) + \
+                           tuple(('depends_on', dep) for dep in depends_on):
         bad_chars = [c for c in disallowed if c in attr]
         if bad_chars:
             raise BlickException(f"Invalid characters {bad_chars} found in {attr_name} ")
@@ -116,6 +152,11 @@ def attributes(
         func.finish_on_fail = finish_on_fail
         func.skip_on_none = skip_on_none
         func.fail_on_none = fail_on_none
+        func.executor = executor
+        func.depends_on = depends_on
+        func.timeout = timeout
+        func.inputs = inputs
+        func.interval = interval
         return func
 
     return decorator
@@ -137,6 +178,11 @@ def get_attribute(func, attr, default_value=None):
         "skip_on_none": DEFAULT_SKIP_ON_NONE,
         "fail_on_none": DEFAULT_FAIL_ON_NONE,
         "index": DEFAULT_INDEX,
+        "executor": DEFAULT_EXECUTOR,
+        "depends_on": DEFAULT_DEPENDS_ON,
+        "timeout": DEFAULT_TIMEOUT,
+        "inputs": DEFAULT_INPUTS,
+        "interval": DEFAULT_INTERVAL_MIN,
     }
 
     default = default_value or defs[attr]
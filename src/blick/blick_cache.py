@@ -0,0 +1,368 @@
+"""
+Cache backends for rule results with a time to live (@attributes(ttl_minutes=...)).
+
+By default cached results are kept in memory, which is lost when the process exits
+and isn't shared with other processes.  A persistent backend lets
+TTL results survive restarts and be shared by several processes on the same host (cron
+jobs, CLI runs and uvicorn workers for example).
+
+- BlickMemoryCache: in process, the default.  All functions share one bounded LRU.
+- BlickSqliteCache: one SQLite file, safe for many processes at once.
+- BlickFileCache: one JSON file per rule in a folder, written atomically.
+
+Entries are keyed by the ruid (if there is one) and the qualified function name, plus
+a fingerprint of the argument values the function was called with, so changing an
+environment value (a file path or connection string) doesn't replay results from the
+old one.  Only values whose contents can be fingerprinted reliably are used: None, bools,
+numbers, strings, bytes, the standard containers of those and the types given a key
+function with register_cache_key (paths, dates, decimals and uuids out of the box).  A
+call with any other argument (a DataFrame or a database engine for example) is not
+cached, since a repr can be truncated or hold a memory address.  Each entry holds the
+results along with the time they expire.  Expired entries are never returned and are
+cleaned out by sweep(), which persistent caches also run every so often on their own.
+"""
+
+import abc
+import datetime as dt
+import decimal
+import hashlib
+import json
+import pathlib
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Sequence
+
+from .blick_exception import BlickException
+from .blick_result import META_FIELDS, BlickResult
+from .blick_util import write_json_atomic
+
+DEFAULT_SWEEP_SECONDS = 300  # Persistent caches clear out expired entries this often
+DEFAULT_MAX_ENTRIES = 1024  # Most entries kept by a memory cache
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # Rough memory cap for a memory cache
+
+
+# Key functions for argument types that aren't containers of plain values, see register_cache_key
+_CACHE_KEYS: dict[type, Callable[[Any], Any]] = {}
+
+
+class _Uncacheable(Exception):
+    """An argument value has no reliable fingerprint."""
+
+
+def register_cache_key(type_: type, key: Callable[[Any], Any]) -> None:
+    """
+    Let TTL results be cached for calls with arguments of type_ (and its subclasses).
+
+    key(value) must return plain values (strings, numbers, containers of them) that are
+    equal exactly when the argument values should share cached results, in every process.
+    For a DataFrame that could be a hash of its contents, for a database engine its url.
+    """
+    _CACHE_KEYS[type_] = key
+
+
+register_cache_key(pathlib.PurePath, str)
+register_cache_key(dt.date, lambda value: value.isoformat())  # datetime is a subclass
+register_cache_key(dt.time, lambda value: value.isoformat())
+register_cache_key(dt.timedelta, lambda value: value.total_seconds())
+register_cache_key(decimal.Decimal, str)
+register_cache_key(uuid.UUID, str)
+
+
+def _stable(value: Any) -> Any:
+    """
+    Turn a value into something json can dump the same way every time.
+
+    Containers are walked, sets are sorted (their iteration order changes between
+    processes) and registered types use their key function.  Anything else raises
+    _Uncacheable.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        return {"dict": sorted(([_stable(k), _stable(v)] for k, v in value.items()), key=repr)}
+    if isinstance(value, (list, tuple)):
+        return [_stable(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return {"set": sorted((_stable(v) for v in value), key=repr)}
+    if isinstance(value, bytes):
+        return {"bytes": hashlib.sha256(value).hexdigest()}
+    for type_ in type(value).__mro__:
+        key = _CACHE_KEYS.get(type_)
+        if key is not None:
+            return {type_.__qualname__: _stable(key(value))}
+    raise _Uncacheable(type(value).__qualname__)
+
+
+def args_fingerprint(args: Sequence[Any]) -> str | None:
+    """A short stable hash of the values a function is called with, None if they can't be fingerprinted."""
+    try:
+        text = json.dumps(_stable(list(args)), sort_keys=True)
+    except _Uncacheable:
+        return None
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def results_size(results: Sequence[BlickResult]) -> int:
+    """
+    Rough number of bytes held by a list of results (the objects and their direct values).
+
+    The function attributes are shared by the results of a function, so each record is
+    only counted once.
+    """
+    size = sys.getsizeof(results)
+    metas = {}
+    for result in results:
+        size += sys.getsizeof(result)
+        size += sum(sys.getsizeof(getattr(result, name)) for name in BlickResult.__slots__ if name != "meta")
+        metas[id(result.meta)] = result.meta
+    for meta in metas.values():
+        size += sys.getsizeof(meta) + sum(sys.getsizeof(getattr(meta, name)) for name in META_FIELDS)
+    return size
+
+
+class BlickCache(abc.ABC):
+    """
+    Where TTL results are kept.  Subclasses store results under a key until the
+    expiry time (a time.time() value) passes.
+    """
+
+    @abc.abstractmethod
+    def get(self, key: str) -> list[BlickResult] | None:  # pragma: no cover
+        """The unexpired results for key or None."""
+
+    @abc.abstractmethod
+    def put(self, key: str, results: Sequence[BlickResult], expires: float) -> None:  # pragma: no cover
+        """Store results under key until expires."""
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:  # pragma: no cover
+        """Remove the entry for key if there is one."""
+
+    @abc.abstractmethod
+    def clear(self) -> None:  # pragma: no cover
+        """Remove every entry."""
+
+    @abc.abstractmethod
+    def sweep(self) -> int:  # pragma: no cover
+        """Remove expired entries and return how many were removed."""
+
+
+class BlickMemoryCache(BlickCache):
+    """
+    Keep results in memory, in a least recently used cache.
+
+    The size is bounded by a count of entries and a rough memory cap.  When either is
+    passed the least recently used entries are dropped, so a long-running process (an
+    API server for example) doesn't hang on to results for every rule and argument
+    combination forever.  The result objects themselves are stored, nothing is copied.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: OrderedDict[str, tuple[float, list[BlickResult], int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+
+    def get(self, key: str) -> list[BlickResult] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, results: Sequence[BlickResult], expires: float) -> None:
+        results = list(results)
+        size = results_size(results)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            # Something bigger than the whole cache just isn't cached
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (expires, results, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def sweep(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (expires, _, _) in self._entries.items() if expires <= now]
+            for key in expired:
+                self._remove(key)
+        return len(expired)
+
+    def __getstate__(self):
+        # A copy in another process can't share anything, so it starts empty
+        return {"max_entries": self.max_entries, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+# Functions share this cache unless they are given another one
+DEFAULT_MEMORY_CACHE = BlickMemoryCache()
+
+
+def _dump_results(results: Sequence[BlickResult]) -> str:
+    return json.dumps([r.as_dict() for r in results], default=str)
+
+
+def _load_results(text: str) -> list[BlickResult]:
+    return [BlickResult.from_dict(d) for d in json.loads(text)]
+
+
+class _PersistentCache(BlickCache, abc.ABC):
+    """Runs a sweep now and then so files don't fill up with expired entries."""
+
+    def __init__(self, sweep_seconds: float = DEFAULT_SWEEP_SECONDS):
+        self.sweep_seconds = sweep_seconds
+        self._last_sweep = 0.0
+
+    def _maybe_sweep(self):
+        now = time.time()
+        if now - self._last_sweep >= self.sweep_seconds:
+            self._last_sweep = now
+            self.sweep()
+
+
+class BlickSqliteCache(_PersistentCache):
+    """
+    Keep results in a SQLite database.
+
+    SQLite takes care of locking and atomic writes, so any number of processes can share
+    one file.  A connection is opened per call so the cache can be used from any thread
+    and sent to worker processes.
+    """
+
+    TIMEOUT_SEC = 30.0  # How long to wait on another process holding the write lock
+
+    def __init__(self, path: str | pathlib.Path, sweep_seconds: float = DEFAULT_SWEEP_SECONDS):
+        super().__init__(sweep_seconds)
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS blick_cache "
+                         "(key TEXT PRIMARY KEY, expires REAL NOT NULL, results TEXT NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        try:
+            conn = sqlite3.connect(self.path, timeout=self.TIMEOUT_SEC)
+        except sqlite3.Error as e:
+            raise BlickException(f"Could not open cache database {self.path}: {e}") from e
+        return conn
+
+    def _execute(self, sql: str, params=()) -> list[tuple]:
+        conn = self._connect()
+        try:
+            # The context manager commits (or rolls back) but does not close
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> list[BlickResult] | None:
+        rows = self._execute("SELECT results FROM blick_cache WHERE key = ? AND expires > ?",
+                             (key, time.time()))
+        return _load_results(rows[0][0]) if rows else None
+
+    def put(self, key: str, results: Sequence[BlickResult], expires: float) -> None:
+        self._execute("INSERT OR REPLACE INTO blick_cache (key, expires, results) VALUES (?, ?, ?)",
+                      (key, expires, _dump_results(results)))
+        self._maybe_sweep()
+
+    def delete(self, key: str) -> None:
+        self._execute("DELETE FROM blick_cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._execute("DELETE FROM blick_cache")
+
+    def sweep(self) -> int:
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute("DELETE FROM blick_cache WHERE expires <= ?", (time.time(),)).rowcount
+        finally:
+            conn.close()
+
+
+class BlickFileCache(_PersistentCache):
+    """
+    Keep results in a folder with one JSON file per key.
+
+    Files are written to a temp file and renamed into place, so readers in other
+    processes see the old entry or the new one, never half of one.
+    """
+
+    def __init__(self, folder: str | pathlib.Path, sweep_seconds: float = DEFAULT_SWEEP_SECONDS):
+        super().__init__(sweep_seconds)
+        self.folder = pathlib.Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> pathlib.Path:
+        # Keys are function names that may not make good file names, so hash them
+        return self.folder / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    @staticmethod
+    def _read(path: pathlib.Path) -> dict | None:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            # Missing or deleted by another process mid-read
+            return None
+
+    def get(self, key: str) -> list[BlickResult] | None:
+        entry = self._read(self._path(key))
+        if entry is None or entry["expires"] <= time.time():
+            return None
+        return [BlickResult.from_dict(d) for d in entry["results"]]
+
+    def put(self, key: str, results: Sequence[BlickResult], expires: float) -> None:
+        entry = {"key": key, "expires": expires, "results": [r.as_dict() for r in results]}
+        write_json_atomic(self._path(key), entry, default=str)
+        self._maybe_sweep()
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        for path in self.folder.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    def sweep(self) -> int:
+        now = time.time()
+        removed = 0
+        for path in self.folder.glob("*.json"):
+            entry = self._read(path)
+            if entry is not None and entry["expires"] <= now:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
@@ -0,0 +1,164 @@
+"""
+An index of the rule catalog by attribute.
+
+Picking rules by tag, phase, level, ruid or module used to mean walking every function and
+checking each attribute against a list.  With tens of thousands of rules, and the API doing
+it on every request, that adds up.  The BlickCatalog is built once (by pre_collect) and maps
+every value of each attribute to the set of positions of the functions that have it, so a
+selection is a few dictionary lookups and set unions, intersections and differences.  Levels
+are also kept sorted so a level range is two bisects.
+
+Positions are the order of the functions the catalog was built from.  Functions the catalog
+hasn't seen are added when they are asked about.  A function whose attributes change after
+the catalog was built (auto ruids, or a tag set by hand) is moved before the next lookup:
+BlickFunction counts the changes to the attributes, and when the count has moved since the
+catalog last looked every function is checked again (update() moves a single one).
+"""
+import bisect
+from typing import Iterable, Sequence
+
+from .blick_function import BlickFunction
+
+# The attributes the catalog is indexed by
+ATTRIBUTES = ("tag", "phase", "level", "ruid", "module")
+
+
+def attribute_value(function_: BlickFunction, attribute: str):
+    """The value of an indexed attribute, modules are indexed by name like the results show them."""
+    if attribute == "module":
+        return getattr(function_.module, "__name__", function_.module) or ""
+    return getattr(function_, attribute)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class BlickCatalog:
+    """Sets of function positions for every value of every indexed attribute."""
+
+    def __init__(self, functions: Iterable[BlickFunction] = ()):
+        # BlickFunction.attribute_changes when the index was last known to be right
+        self._changes = BlickFunction.attribute_changes
+        self.functions: list[BlickFunction] = []
+        self._positions: dict[BlickFunction, int] = {}
+        self._keys: list[tuple] = []
+        self._index: dict[str, dict] = {attribute: {} for attribute in ATTRIBUTES}
+
+        # (level, position) pairs kept sorted for range queries
+        self._levels: list[tuple[int, int]] = []
+        for function_ in functions:
+            self.position(function_, sort=False)
+        self._levels.sort()
+
+    def __len__(self) -> int:
+        return len(self.functions)
+
+    def __repr__(self) -> str:
+        return f"BlickCatalog({len(self)} functions)"
+
+    def position(self, function_: BlickFunction, sort: bool = True) -> int:
+        """The position of a function, it is indexed if the catalog hasn't seen it yet."""
+        position = self._positions.get(function_)
+        if position is None:
+            position = len(self.functions)
+            self.functions.append(function_)
+            self._positions[function_] = position
+            self._keys.append(())
+            self._add(function_, position, sort)
+        return position
+
+    def _add(self, function_: BlickFunction, position: int, sort: bool = True):
+        key = tuple(attribute_value(function_, attribute) for attribute in ATTRIBUTES)
+        self._keys[position] = key
+        for attribute, value in zip(ATTRIBUTES, key):
+            self._index[attribute].setdefault(value, set()).add(position)
+        # Levels that aren't numbers can still be looked up, but they have no place in a range
+        if _is_number(function_.level):
+            if sort:
+                bisect.insort(self._levels, (function_.level, position))
+            else:
+                self._levels.append((function_.level, position))
+
+    def _remove(self, position: int):
+        for attribute, value in zip(ATTRIBUTES, self._keys[position]):
+            positions = self._index[attribute][value]
+            positions.discard(position)
+            if not positions:
+                del self._index[attribute][value]
+        level = self._keys[position][ATTRIBUTES.index("level")]
+        if _is_number(level):
+            self._levels.remove((level, position))
+
+    def update(self, function_: BlickFunction):
+        """Index a function again after its attributes were changed."""
+        position = self.position(function_)
+        if self._keys[position] != tuple(attribute_value(function_, attribute) for attribute in ATTRIBUTES):
+            self._remove(position)
+            self._add(function_, position)
+
+    def refresh(self):
+        """Index again the functions whose attributes were changed since the catalog last looked."""
+        if self._changes == BlickFunction.attribute_changes:
+            return
+        self._changes = BlickFunction.attribute_changes
+        for function_ in self.functions:
+            self.update(function_)
+
+    def values(self, attribute: str) -> list:
+        """The distinct values of an attribute, sorted."""
+        self.refresh()
+        return sorted(self._index[attribute])
+
+    def groups(self, attribute: str):
+        """(value, positions) pairs for every distinct value of an attribute."""
+        self.refresh()
+        return self._index[attribute].items()
+
+    def lookup(self, attribute: str, values: Iterable) -> set[int]:
+        """Positions of the functions whose attribute is any of values."""
+        self.refresh()
+        index = self._index[attribute]
+        found: set[int] = set()
+        for value in set(values):
+            found |= index.get(value, set())
+        return found
+
+    def select(self,
+               tags: Iterable[str] = (),
+               ruids: Iterable[str] = (),
+               levels: Iterable[int] = (),
+               phases: Iterable[str] = (),
+               modules: Iterable[str] = ()) -> set[int]:
+        """Positions of the functions matching ANY of the given attribute values."""
+        return (self.lookup("tag", tags) | self.lookup("ruid", ruids) | self.lookup("level", levels) |
+                self.lookup("phase", phases) | self.lookup("module", modules))
+
+    def level_range(self, low: int | None = None, high: int | None = None) -> set[int]:
+        """Positions of the functions with low <= level <= high, either end may be left open."""
+        self.refresh()
+        start = 0 if low is None else bisect.bisect_left(self._levels, (low, -1))
+        end = len(self._levels) if high is None else bisect.bisect_right(self._levels, (high, len(self.functions)))
+        return {position for _, position in self._levels[start:end]}
+
+    def all(self) -> set[int]:
+        """Positions of every function in the catalog."""
+        return set(range(len(self.functions)))
+
+    def index(self, functions: Iterable[BlickFunction]):
+        """Make sure every one of functions is in the catalog."""
+        for function_ in functions:
+            self.position(function_)
+
+    def pick(self, positions: set[int], functions: Sequence[BlickFunction] | None = None,
+             keep: bool = True) -> list[BlickFunction]:
+        """
+        The functions at positions.
+
+        With functions, the ones from that list (in its order) whose position is in positions,
+        or with keep=False the ones whose position isn't.  Without it, the functions at positions
+        in catalog order.
+        """
+        if functions is None:
+            return [self.functions[position] for position in sorted(positions)]
+        return [f for f in functions if (self.position(f) in positions) == keep]
@@ -2,20 +2,41 @@
 This class manages running the checker against a list of functions.
 There is also support for low level progress for functions/classes.
 """
+import asyncio
 import datetime as dt
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Sequence
+from typing import Any, Iterable, Sequence
 
+from .blick_cache import BlickCache
+from .blick_catalog import BlickCatalog
+from .blick_distributed import BlickCoordinator
+from .blick_env import BlickFixture, BlickLazyEnv, fixture_for, invalidate_fixtures
 from .blick_exception import BlickException
 from .blick_format import BlickAbstractRender, BlickRenderText
 from .blick_function import BlickFunction
+from .blick_history import BlickHistory, function_key
 from .blick_immutable import BlickEnvDict, BlickEnvList, BlickEnvSet
+from .blick_incremental import BlickIncremental
 from .blick_module import BlickModule
+from .blick_order import OrderByFile, OrderStrategy
 from .blick_package import BlickPackage
+from .blick_plan import BlickPlan
 from .blick_rc import BlickRC
 from .blick_result import BlickResult
 from .blick_ruid import empty_ruids, ruid_issues, valid_ruids
+from .blick_runner import (BlickRunner, _acollect_results, _collect_results, _worker_failure,
+                           dependency_order, dependency_skip, make_process_pool, passed, prerequisites)
 from .blick_score import ScoreByResult, ScoreStrategy
+from .blick_shard import check_shard, shard_functions
+from .blick_sink import BlickSink
+from .blick_stats import BlickRunStats
+from .blick_store import BlickResultStore
+
+
+# Default number of rules that ayield_all lets run at the same time.
+DEFAULT_MAX_CONCURRENCY = 50
 
 
 # pylint: disable=R0903
@@ -110,6 +131,9 @@ def _param_int_list(params: list[str] | list[int] | int | str | None) -> list[in
 
     """
 
+    if params is None:
+        return []
+
     if isinstance(params, int):
         return [params]
 
@@ -127,76 +151,61 @@ def _param_int_list(params: list[str] | list[int] | int | str | None) -> list[in
     return [int(param) for param in params]
 
 
-def exclude_ruids(ruids: list[str]):
-    """Return a filter function that will exclude the ruids from the list."""
+class _AttributeFilter:
+    """
+    Filter function on one attribute.
 
-    def filter_func(s_func: BlickFunction):
-        return s_func.ruid not in ruids
+    It can be called like any other filter function, but prepare answers it from the
+    rule catalog rather than calling it for every function.
+    """
 
-    return filter_func
+    def __init__(self, attribute: str, values, keep: bool):
+        self.attribute = attribute
+        self.values = frozenset(values)
+        self.keep = keep
 
+    def __call__(self, s_func: BlickFunction) -> bool:
+        return (getattr(s_func, self.attribute) in self.values) == self.keep
 
-def exclude_tags(tags: list[str]):
-    """Return a filter function that will exclude the tags from the list."""
 
-    def filter_func(s_func: BlickFunction):
-        return s_func.tag not in tags
+def exclude_ruids(ruids: list[str]):
+    """Return a filter function that will exclude the ruids from the list."""
+    return _AttributeFilter("ruid", ruids, keep=False)
 
-    return filter_func
+
+def exclude_tags(tags: list[str]):
+    """Return a filter function that will exclude the tags from the list."""
+    return _AttributeFilter("tag", tags, keep=False)
 
 
 def exclude_levels(levels: list[int]):
     """Return a filter function that will exclude the levels from the list."""
-
-    def filter_func(s_func: BlickFunction):
-        return s_func.level not in levels
-
-    return filter_func
+    return _AttributeFilter("level", levels, keep=False)
 
 
 def exclude_phases(phases: list[str]):
     """Return a filter function that will exclude the phases from the list."""
-
-    def filter_func(s_func: BlickFunction):
-        return s_func.phase not in phases
-
-    return filter_func
+    return _AttributeFilter("phase", phases, keep=False)
 
 
 def keep_ruids(ruids: list[str]):
     """Return a filter function that will keep the ruids from the list."""
-
-    def filter_func(s_func: BlickFunction):
-        return s_func.ruid in ruids
-
-    return filter_func
+    return _AttributeFilter("ruid", ruids, keep=True)
 
 
 def keep_tags(tags: list[str]):
     """Return a filter function that will keep the tags from the list."""
-
-    def filter_func(s_func: BlickFunction):
-        return s_func.tag in tags
-
-    return filter_func
+    return _AttributeFilter("tag", tags, keep=True)
 
 
 def keep_levels(levels: list[int]):
     """Return a filter function that will keep the levels from the list."""
-
-    def filter_func(s_func: BlickFunction):
-        return s_func.level in levels
-
-    return filter_func
+    return _AttributeFilter("level", levels, keep=True)
 
 
 def keep_phases(phases: list[str]):
     """Return a filter function that will keep the phases from the list."""
-
-    def filter_func(s_func: BlickFunction):
-        return s_func.phase in phases
-
-    return filter_func
+    return _AttributeFilter("phase", phases, keep=True)
 
 
 def debug_progress(count, msg: str | None = None, result: BlickResult | None = None
@@ -208,6 +217,31 @@ def debug_progress(count, msg: str | None = None, result: BlickResult | None = N
         print("+" if result.status else "-", end="")
 
 
+class _Collector:
+    """Hand results to the sinks of run_all and keep them if asked to."""
+
+    def __init__(self, checker: "BlickChecker", sinks: Sequence[BlickSink] | None, keep_results: bool):
+        self.checker = checker
+        self.sinks = list(sinks or [])
+        self.keep_results = keep_results
+        self.results: list[BlickResult] | BlickResultStore = BlickResultStore() if checker.result_store else []
+
+    def __enter__(self):
+        for sink in self.sinks:
+            sink.open(self.checker)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for sink in self.sinks:
+            sink.close()
+
+    def add(self, result: BlickResult):
+        for sink in self.sinks:
+            sink.write(result)
+        if self.keep_results:
+            self.results.append(result)
+
+
 class BlickChecker:
     """
     A checker object is what manages running rules against a system.
@@ -238,6 +272,17 @@ class BlickChecker:
             abort_on_exception=False,
             auto_setup: bool = False,
             auto_ruid: bool = False,
+            max_workers: int | None = None,
+            run_deadline: float | None = None,
+            order_strategy: OrderStrategy | None = None,
+            incremental: BlickIncremental | None = None,
+            cache: BlickCache | None = None,
+            shard_index: int | None = None,
+            shard_count: int | None = None,
+            shard_history: BlickHistory | None = None,
+            coordinator: BlickCoordinator | None = None,
+            result_store: bool = False,
+            env_workers: int | None = None,
     ):
         """
 
@@ -258,6 +303,34 @@ class BlickChecker:
             abort_on_exception: A bool flag indicating whether to abort on exceptions. def=False.
             auto_setup: A bool flag automatically invoke pre_collect/prepare. def=False.
             auto_ruid: A bool flag automatically generate rule_ids if they don't exist.
+            max_workers: Run the collected functions on a thread pool with this many threads.
+                         None or 1 runs the functions one at a time. Functions with
+                         executor="process" always run on a process pool of this size
+                         (or one per CPU if not set). def=None.
+            run_deadline: Seconds the whole run may take.  Functions still running at the
+                          deadline fail with a timed out result and functions that haven't
+                          started are skipped. def=None (no deadline).
+            order_strategy: An OrderStrategy used by prepare to order the collected functions.
+                            If not provided, def = OrderByFile.
+            incremental: A BlickIncremental state.  Rules with inputs that haven't changed
+                         since the last run replay their old results rather than running.
+                         The state is saved at the end of each run. def=None.
+            cache: Cache backend for rules with a ttl_minutes attribute.  Use a persistent
+                   cache (BlickSqliteCache or BlickFileCache) to keep results between runs
+                   and share them between processes.  If not provided each function keeps
+                   its own results in memory.
+            shard_index: Which shard of the collected functions this checker runs (0 based).
+            shard_count: How many shards the collected functions are split into.  Functions
+                         are assigned by a stable hash unless shard_history is given.
+            shard_history: A BlickHistory used to balance the shards by past runtime.  Every
+                           node must use the same history file.
+            coordinator: A BlickCoordinator.  The collected functions are sent to the workers
+                         connected to it rather than run here.  max_workers is ignored.
+            result_store: Keep the results of run_all in a BlickResultStore (columns) rather
+                          than a list of BlickResult objects.  Use it for runs with millions
+                          of results. def=False.
+            env_workers: Threads used to set up the env functions that declare provides or
+                         requires, 1 sets them up one at a time. def=None (up to 8).
         Raises:
             BlickException: If the provided packages, modules, or check_functions 
                              are not in the correct format.
@@ -270,8 +343,32 @@ class BlickChecker:
 
         # If the user has not provided a score strategy then use the simple one
         self.score_strategy = score_strategy or ScoreByResult()
+
+        # Run the functions in the order they were found unless told otherwise
+        self.order_strategy = order_strategy or OrderByFile()
+
+        # Incremental runs replay results for rules whose inputs didn't change
+        self.incremental = incremental
+
+        # Where TTL results are kept, None leaves each function with its own memory cache
+        self.cache = cache
+
+        # Split the rules over several machines
+        check_shard(shard_index, shard_count)
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.shard_history = shard_history
+
+        # Keys of every rule the shards split between them, so merge_runs can tell if one is missing
+        self.shard_expected: list[str] | None = None
+
+        # Hand the rules to remote workers rather than running them here
+        self.coordinator = coordinator
         self.score = 0.0
 
+        # Keep the results as columns rather than objects
+        self.result_store = result_store
+
         # Allow an RC object to be specified.
         self.rc = rc
 
@@ -290,6 +387,17 @@ class BlickChecker:
         # THis dict has the environment values that are NULL
         self.env_nulls: dict[str, Any] = {}
 
+        # Env functions with run scope set up by the current run
+        self._run_fixtures: list[BlickFixture] = []
+        self._full_env = BlickLazyEnv()
+
+        # Held by run_all and by each scheduler batch, so a checker shared by the scheduler and
+        # the API doesn't set up or tear down the environment under a run in another thread
+        self.run_lock = threading.RLock()
+
+        # Seconds each env function took to set up in the last run
+        self.env_timings: dict[str, float] = {}
+
         # Connect the progress output to the checker object.  The NoProgress
         # class is a dummy class that does no progress reporting.
         self.progress_callback: BlickProgress = progress_object or BlickNoProgress()
@@ -304,11 +412,35 @@ class BlickChecker:
         self.collected: list[BlickFunction] = []
         self.pre_collected: list[BlickFunction] = []
 
+        # Index of the pre-collected functions by attribute, see blick_catalog
+        self.catalog = BlickCatalog()
+
+        # What prepare worked out about the collected functions, see blick_plan
+        self.plan = BlickPlan(())
+
         self.start_time = dt.datetime.now()
         self.end_time = dt.datetime.now()
-        self.results: list[BlickResult] = []
+        self._results: list[BlickResult] = []
+        self.stats = BlickRunStats()
+        self._score = self.score_strategy.start()
         self.auto_ruid = auto_ruid
 
+        # Number of threads used to run check functions, 1 or less means run serially
+        if max_workers is not None and (isinstance(max_workers, bool) or not isinstance(max_workers, int)):
+            raise BlickException("max_workers must be an integer or None.")
+        self.max_workers = max_workers
+
+        # Threads used to set up env functions
+        if env_workers is not None and (isinstance(env_workers, bool) or not isinstance(env_workers, int)):
+            raise BlickException("env_workers must be an integer or None.")
+        self.env_workers = env_workers
+
+        # Wall clock budget for a run, per-rule limits are set with @attributes(timeout=...)
+        if run_deadline is not None and (isinstance(run_deadline, bool) or
+                                         not isinstance(run_deadline, (int, float)) or run_deadline <= 0):
+            raise BlickException("run_deadline must be a number of seconds > 0 or None.")
+        self.run_deadline = run_deadline
+
         if not self.packages and not self.modules and not self.check_functions:
             raise BlickException(
                 "You must provide at least one package, module or function to check."
@@ -401,10 +533,13 @@ class BlickChecker:
 
         self.pre_collected += [func for func in self.check_functions]
 
+        # Selecting rules by attribute is done on the index rather than by walking the functions
+        self.catalog = BlickCatalog(self.pre_collected)
+
         # List of all possible functions that could be run
         return self.pre_collected
 
-    def prepare(self, filter_functions=None):
+    def prepare(self, filter_functions=None, order_strategy: OrderStrategy | None = None):
         """
         Prepare the collected functions for running checks.
 
@@ -412,25 +547,38 @@ class BlickChecker:
         A list of filter functions may be provided to filter the functions. Filter
         functions must return True if the function should be kept.
 
+        The kept functions are then ordered by the order strategy (file order unless
+        history based ordering was asked for) and finally moved after any rules they
+        depend on.
+
         Args:
             filter_functions (_type_, optional): _description_. Defaults to None.
+            order_strategy: Order strategy for this run, defaults to the checker's.
 
         Returns:
             _type_: _description_
         """
 
-        # If no filter functions are provided then use a default one allows all functions
-        filter_functions = filter_functions or [lambda _: True]
+        # The catalog must be in pre-collected order, it isn't if pre_collected was changed by hand
+        if self.catalog.functions != self.pre_collected:
+            self.catalog = BlickCatalog(self.pre_collected)
 
         self.auto_gen_ruids()
 
         # At this point we have all the functions in the packages, modules and functions
         # Now we need to filter out the ones that are not wanted. Filter functions return
-        # True if the function should be kept
-        self.collected = []
-        for blick_func in self.pre_collected:
-            if all(f(blick_func) for f in filter_functions):
-                self.collected.append(blick_func)
+        # True if the function should be kept.  The attribute filters (keep_tags...) are
+        # worked out on the catalog, any others are called for the functions that are left.
+        kept = self.catalog.all()
+        other_filters = []
+        for filter_ in filter_functions or []:
+            if isinstance(filter_, _AttributeFilter):
+                matched = self.catalog.lookup(filter_.attribute, filter_.values)
+                kept = kept & matched if filter_.keep else kept - matched
+            else:
+                other_filters.append(filter_)
+        self.collected = [blick_func for blick_func in self.catalog.pick(kept)
+                          if all(f(blick_func) for f in other_filters)]
 
         # Now use the RC file.  Note that if you are running filter functions AND
         # an RC file this can be confusing.  Ideally you use one or the other. but
@@ -446,13 +594,46 @@ class BlickChecker:
 
         # If the user decided to set up ruids for every function OR if they didn't configure
         # any ruids then we can just run with the collected functions.
-        if empty_ruids(ruids) or valid_ruids(ruids):
-            return self.collected
+        if not (empty_ruids(ruids) or valid_ruids(ruids)):
+            # Otherwise there is a problem.
+            raise BlickException(
+                f"There are duplicate or missing RUIDS: {ruid_issues(ruids)}"
+            )
+
+        # Every node sees the same collected functions, so each can pick out its own shard.
+        if self.shard_count is not None:
+            self.shard_expected = [function_key(f) for f in self.collected]
+            self.collected = shard_functions(self.collected, self.shard_index, self.shard_count,
+                                             self.shard_history)
 
-        # Otherwise there is a problem.
-        raise BlickException(
-            f"There are duplicate or missing RUIDS: {ruid_issues(ruids)}"
-        )
+        if order_strategy is not None:
+            self.order_strategy = order_strategy
+        self.collected = self.order_strategy(self.collected)
+
+        self.order_by_dependencies()
+
+        # Work out everything about the collected functions that doesn't change during a run
+        self.plan = BlickPlan.compile(self.collected)
+        return self.collected
+
+    def order_by_dependencies(self) -> list[BlickFunction]:
+        """
+        Make sure every collected function runs after the rules it depends on.
+
+        Prerequisites must exist somewhere in the pre-collected functions, but if they
+        were filtered out they are ignored.
+
+        Raises:
+            BlickException: For unknown prerequisites or circular dependencies.
+        """
+        known = {f.ruid for f in self.pre_collected if f.ruid} | {f.ruid for f in self.collected if f.ruid}
+        for function_ in self.collected:
+            unknown = [ruid for ruid in function_.depends_on if ruid not in known]
+            if unknown:
+                raise BlickException(f"{function_.function_name} depends on unknown rule ids {unknown}")
+
+        self.collected = dependency_order(self.collected)
+        return self.collected
 
     def auto_gen_ruids(self, template='__ruid__@id@'):
         """ Provide a mechanism for to transition from no ruids to ruids.  This way they
@@ -463,6 +644,7 @@ class BlickChecker:
         for function in self.pre_collected:
             if function.ruid == '':
                 function.ruid = template.replace("@id@", f'{id_:04d}')
+                self.catalog.update(function)
                 id_ += 1
 
     def apply_rc(self, rc=None):
@@ -474,18 +656,18 @@ class BlickChecker:
         if not self.rc:
             return self.collected
 
-        self.collected = [function for function in self.collected
-                          if self.rc.does_match(ruid=function.ruid,
-                                                tag=function.tag,
-                                                phase=function.phase,
-                                                level=function.level)]
+        # The RC file is checked once per distinct attribute value in the catalog rather than
+        # once per function, see BlickRC.matching
+        self.catalog.index(self.collected)
+        self.collected = self.catalog.pick(self.rc.matching(self.catalog), self.collected)
 
         return self.collected
 
     def exclude_by_attribute(self, tags: Sequence[str] | str | None = None,
                              ruids: Sequence[str] | str | None = None,
                              levels: Sequence[int] | int | None = None,
-                             phases: Sequence[str] | str | None = None) -> list[BlickFunction]:
+                             phases: Sequence[str] | str | None = None,
+                             modules: Sequence[str] | str | None = None) -> list[BlickFunction]:
         """ Run everything except the ones that match these attributes """
 
         # Make everything nice lists
@@ -493,19 +675,20 @@ class BlickChecker:
         ruids = _param_str_list(ruids)
         phases = _param_str_list(phases)
         levels = _param_int_list(levels)
+        modules = _param_str_list(modules, disallowed=' ,')
 
         # Exclude attributes that don't match
-        self.collected = [f for f in self.collected if f.tag not in tags and
-                          f.ruid not in ruids and
-                          f.level not in levels and
-                          f.phase not in phases]
+        self.catalog.index(self.collected)
+        matched = self.catalog.select(tags=tags, ruids=ruids, levels=levels, phases=phases, modules=modules)
+        self.collected = self.catalog.pick(matched, self.collected, keep=False)
         return self.collected
 
     def include_by_attribute(self,
                              tags: list | str | None = None,
                              ruids: list | str | None = None,
                              levels: list | str | None = None,
-                             phases: list | str | None = None) -> list[BlickFunction]:
+                             phases: list | str | None = None,
+                             modules: list | str | None = None) -> list[BlickFunction]:
         """ Run everything that matches these attributes """
 
         # Make everything nice lists
@@ -513,47 +696,119 @@ class BlickChecker:
         ruids_ = _param_str_list(ruids)
         phases_ = _param_str_list(phases)
         levels_ = _param_int_list(levels)
+        modules_ = _param_str_list(modules, disallowed=' ,')
 
         # This is a special case to make including everything the default
-        if not tags and not ruids and not levels and not phases:
+        if not tags and not ruids and not levels and not phases and not modules:
             return self.collected
 
         # Only include the attributes that match
-        self.collected = [f for f in self.collected if (f.tag in tags_) or
-                          (f.ruid in ruids_) or
-                          (f.level in levels_) or
-                          (f.phase in phases_)]
+        self.catalog.index(self.collected)
+        matched = self.catalog.select(tags=tags_, ruids=ruids_, levels=levels_, phases=phases_, modules=modules_)
+        self.collected = self.catalog.pick(matched, self.collected)
 
         return self.collected
 
+    def include_level_range(self, low: int | None = None, high: int | None = None) -> list[BlickFunction]:
+        """ Run the ones with low <= level <= high, either end may be left open """
+        self.catalog.index(self.collected)
+        self.collected = self.catalog.pick(self.catalog.level_range(low, high), self.collected)
+        return self.collected
+
     def load_environments(self):
         """
         This takes the global environment and adds in the results
         from all the discovered environment functions.  The results
         are all merged into a dictionary of parameter names and their values.
 
-        This works very much like pytest, only without the scoping Parameters
-        that are needed in multiple places aren't regenerated.
+        This works very much like pytest.  Env functions with "module" or "session"
+        scope (see blick_env.env) are only called when they have no value kept from
+        an earlier run, "run" scope env functions are called every time and torn down
+        by teardown_environments at the end of the run.
+
+        Env functions that declare what they provide are lazy, they are called when a
+        collected function (or another env function) reads one of their names.  The ones
+        the collected functions need, plus those they require, are set up here on a thread
+        pool (env_workers), each as soon as the env functions it requires are done.  The
+        env functions no collected function needs never run.  Two env functions making
+        the same name raise a BlickException.
         Returns:
-
+            A BlickLazyEnv
         """
 
         # Prime the environment with top level config
         # This should be json-able things
-        full_env = self.env.copy()
+        needed = {name for function_ in self.collected for name in function_.parameters}
+        full_env = BlickLazyEnv(self.env, needed=needed)
 
+        self.teardown_environments()
+        eager = []
+        declared = []
         for m in self.modules:
             for env_func in m.env_functions:
-                # TODO: There should be exceptions on collisions
-                full_env.update(env_func(full_env))
+                fixture = fixture_for(env_func, m)
+                if fixture.scope == "run":
+                    self._run_fixtures.append(fixture)
+                if not fixture.provides and not fixture.requires:
+                    eager.append(fixture)
+                elif not fixture.provides:
+                    declared.append(fixture)
+                for name in fixture.provides:
+                    full_env.add_provider(name, fixture)
+
+                    # Env functions win over the global environment, as they always have
+                    full_env.values.pop(name, None)
+
+        # Env functions that don't say what they make run in order, each seeing the last
+        for fixture in eager:
+            full_env.load(fixture, override=True)
+
+        declared += [full_env.providers[name] for name in sorted(needed) if name in full_env.providers]
+        full_env.prefetch(list(dict.fromkeys(declared)), self.env_workers)
 
         # This is a concern, there should be no nulls, HOWEVER this is more complex
         # since there should be no nulls for parameters to the collected check functions.
-        # for now, I'm tracking this and dumping it in the results.
-        self.env_nulls = [key for key, value in full_env.items() if value is None]
+        # for now, I'm tracking this and dumping it in the results.  Lazy names are added
+        # when the run is over.
+        self._full_env = full_env
+        self.env_nulls = self._nulls()
+        self.env_timings = full_env.timings
 
         return full_env
 
+    def _nulls(self) -> list[str]:
+        return [key for key, value in self._full_env.values.items() if value is None]
+
+    def teardown_environments(self) -> int:
+        """
+        Tear down the run scope env functions of the last run, last set up first.
+
+        Returns:
+            The number of env functions torn down.
+        """
+        self.env_nulls = self._nulls()
+        fixtures, self._run_fixtures = self._run_fixtures, []
+        for fixture in reversed(fixtures):
+            fixture.teardown()
+        return len(fixtures)
+
+    def invalidate_environments(self, name: str | None = None) -> int:
+        """
+        Throw away the kept values of the module and session scope env functions of this
+        checker's modules (or just the one called name), they are made again next run.
+
+        Returns:
+            The number of env functions torn down.
+        """
+        count = 0
+        for m in self.modules:
+            for fixture in m.env_fixtures.values():
+                if name is None or fixture.name == name:
+                    count += fixture.value is not None
+                    fixture.teardown()
+        env_funcs = [func for m in self.modules for func in m.env_functions]
+        return count + invalidate_fixtures(env_funcs, name)
+
     @property
     def ruids(self):
         """
@@ -595,9 +850,80 @@ class BlickChecker:
         """
         return sorted(set(f.phase for f in self.collected))
 
+    def bind_environment(self, env):
+        """
+        Give the collected functions the environment of this run and bind the plan to it.
+
+        The collected functions can be changed after prepare (the API filters them directly),
+        in which case the plan is compiled again.
+        """
+        for function_ in self.collected:
+            function_.env = env
+            if self.cache is not None:
+                function_.cache = self.cache
+        if not self.plan.matches(self.collected):
+            self.plan = BlickPlan.compile(self.collected)
+        self.plan.bind(env)
+
     class AbortYieldException(Exception):
         """Allow breaking out of multi level loop without state variables"""
 
+    def _emit_results(self, count: int, function_: BlickFunction, results):
+        """
+        Render, report progress and check the early exits for each result of a function.
+
+        Shared by the sync and async runners.  Raises AbortYieldException when the
+        checker should stop.  Incremental runs record the results of each function
+        that gets to the end.
+        """
+        emitted = []
+
+        # Nothing here changes while a function's results are emitted, so look it up once
+        renderer, add_stats, add_score = self.renderer, self.stats.add, self._score.add
+        abort_on_fail, abort_on_exception = self.abort_on_fail, self.abort_on_exception
+        finish_on_fail = function_.finish_on_fail
+        progress, function_count = self.progress_callback, self.function_count
+        for result in results:
+
+            # The message is rendered when msg_rendered is first read, runs that only count or
+            # score never pay for it.
+            result.render_with(renderer)
+
+            add_stats(result)
+            add_score(result)
+            yield result
+            emitted.append(result)
+
+            # Check early exits
+            if abort_on_fail and result.status is False:
+                raise self.AbortYieldException()
+
+            if abort_on_exception and result.except_:
+                raise self.AbortYieldException()
+
+            # Stop yielding from a function
+            if finish_on_fail and result.status is False:
+                progress(count, function_count, f"Early exit. {function_.function_name} failed.")
+                break
+            progress(count, function_count, "", result)
+
+        if self.incremental:
+            self.incremental.record(function_, emitted)
+        self.progress_callback(count, self.function_count, "Func done.")
+
+    def _abort_progress(self, count: int, function_: BlickFunction | None):
+        """Report why a run was aborted."""
+        name = function_.function_name if function_ is not None else "???"
+
+        if self.abort_on_fail:
+            self.progress_callback(count,
+                                   self.function_count,
+                                   f"Abort on fail: {name}")
+        if self.abort_on_exception:
+            self.progress_callback(count,
+                                   self.function_count,
+                                   f"Abort on exception: {name}")
+
     def yield_all(self, env=None):
         """
         Yield all the results from the collected functions
@@ -616,8 +942,11 @@ class BlickChecker:
         # that the filter functions have filtered out all the
         # functions.
         count = 0
+        function_ = None
         self.progress_callback(count, self.function_count, "Start Rule Check")
         self.start_time = dt.datetime.now()
+        self.stats = BlickRunStats()
+        self._score = self.score_strategy.start()
 
         try:
             # Magic happens here.  Each module is checked for any functions that start with 
@@ -626,108 +955,252 @@ class BlickChecker:
             # time environments are global, hence there could be collisions on larger projects.
             env = self.load_environments()
 
-            # Shuts up linter
-            # result: BlickResult | None = None
-            # function: BlickFunction | None = None
+            # Lots of magic here
+            self.bind_environment(env)
 
-            # Count here to enable progress bars
-            for count, function_ in enumerate(self.collected, start=1):
+            # The runner decides where and when each function runs.  Functions on a pool are
+            # started as soon as their prerequisites are done and the results are picked up
+            # here in collected order, so the output is identical to a serial run.  With a
+            # coordinator the functions run on its workers, with the same guarantees.
+            if self.coordinator is not None:
+                runner = self.coordinator.runner(self.collected, self.run_deadline, self.incremental)
+            else:
+                runner = BlickRunner(self.collected, self.max_workers, self.run_deadline, self.incremental)
+            with runner:
 
-                # Lots of magic here
-                function_.env = env
+                # Count here to enable progress bars
+                for count, function_ in enumerate(self.collected, start=1):
 
-                self.progress_callback(count,
-                                       self.function_count,
-                                       f"Func Start {function_.function_name}")
-                for result in function_():
+                    self.progress_callback(count,
+                                           self.function_count,
+                                           f"Func Start {function_.function_name}")
 
-                    # Render the message if needed.  The render happens right before it is yielded so it "knows" as 
-                    # much as possible at this point.
-                    result.msg_rendered = result.msg if not self.renderer else self.renderer.render(result.msg)
+                    yield from self._emit_results(count, function_, runner.results(count - 1))
+                    runner.finished(count - 1)
 
-                    yield result
+        except self.AbortYieldException:
+            self._abort_progress(count, function_)
+        finally:
+            self.teardown_environments()
 
-                    # Check early exits
-                    if self.abort_on_fail and result.status is False:
-                        raise self.AbortYieldException()
+        if self.incremental:
+            self.incremental.save()
+
+        self.score = self._score.value()
+        self.end_time = dt.datetime.now()
+        self.progress_callback(count,
+                               self.function_count,
+                               "Rule Check Complete.")
 
-                    if self.abort_on_exception and result.except_:
-                        raise self.AbortYieldException()
+    async def ayield_all(self, env=None, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        """
+        Async version of yield_all.
 
-                    # Stop yielding from a function
-                    if function_.finish_on_fail and result.status is False:
-                        self.progress_callback(count, self.function_count,
-                                               f"Early exit. {function_.function_name} failed.")
-                        break
-                    self.progress_callback(count, self.function_count, "", result)
-                self.progress_callback(count, self.function_count, "Func done.")
+        All the collected functions are started on the running event loop at once, with
+        at most max_concurrency of them running at the same time.  Async rules are awaited
+        on the loop, so hundreds of network checks can share one loop, plain rules are
+        sent to a thread so they don't block it and process rules go to a process pool.
+        Results are yielded in collected order just like yield_all.
 
-        except self.AbortYieldException:
-            name = function_.function_name if function_ is not None else "???"
+        Args:
+            env: The environment to use for the rule functions
+            max_concurrency: Maximum number of rules running at the same time.
+
+        Yields:
+            _type_: BlickResult
+        """
+        if max_concurrency < 1:
+            raise BlickException("max_concurrency must be at least 1.")
+        if self.coordinator is not None:
+            raise BlickException("Rules can't be sent to a coordinator from ayield_all, use yield_all.")
+
+        count = 0
+        function_ = None
+        self.progress_callback(count, self.function_count, "Start Rule Check")
+        self.start_time = dt.datetime.now()
+        self.stats = BlickRunStats()
+        self._score = self.score_strategy.start()
+
+        process_pool = make_process_pool(self.collected, self.max_workers if self.parallel else None)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        loop = asyncio.get_running_loop()
+        tasks: list[asyncio.Task] = []
+        prereqs = prerequisites(self.collected)
+        deadline = time.time() + self.run_deadline if self.run_deadline is not None else None
+
+        async def run(index: int, f: BlickFunction) -> list[BlickResult]:
+            # Wait for the prerequisites before taking a slot so they can't be starved.
+            if prereqs[index]:
+                await asyncio.wait([tasks[p] for p in prereqs[index]])
+                failed = [self.collected[p].ruid for p in prereqs[index] if not passed(tasks[p].result())]
+                if failed:
+                    return [dependency_skip(f, failed)]
+
+            # Fingerprinting hits the file system, so keep it off the loop
+            replayed = await asyncio.to_thread(self.incremental.replay, f) if self.incremental else None
+            if replayed is not None:
+                return replayed
+
+            async with semaphore:
+                if f.executor == "process":
+                    try:
+                        return await loop.run_in_executor(process_pool, _collect_results, f, deadline)
+                    except Exception as e:  # pylint: disable=broad-except
+                        return [_worker_failure(f, e)]
+                if f.is_async:
+                    return await _acollect_results(f, deadline)
+                return await asyncio.to_thread(_collect_results, f, deadline)
+
+        try:
+            env = self.load_environments()
+            self.bind_environment(env)
+
+            tasks = [asyncio.ensure_future(run(i, f)) for i, f in enumerate(self.collected)]
+
+            for count, function_ in enumerate(self.collected, start=1):
 
-            if self.abort_on_fail:
-                self.progress_callback(count,
-                                       self.function_count,
-                                       f"Abort on fail: {name}")
-            if self.abort_on_exception:
                 self.progress_callback(count,
                                        self.function_count,
-                                       f"Abort on exception: {name}")
+                                       f"Func Start {function_.function_name}")
+
+                results = await tasks[count - 1]
 
+                for result in self._emit_results(count, function_, results):
+                    yield result
+
+        except self.AbortYieldException:
+            self._abort_progress(count, function_)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if process_pool:
+                process_pool.shutdown(wait=False, cancel_futures=True)
+            self.teardown_environments()
+
+        if self.incremental:
+            self.incremental.save()
+
+        self.score = self._score.value()
         self.end_time = dt.datetime.now()
         self.progress_callback(count,
                                self.function_count,
                                "Rule Check Complete.")
 
-    def run_all(self, env=None):
+    async def arun_all(self,
+                       env=None,
+                       max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                       sinks: Sequence[BlickSink] | None = None,
+                       keep_results: bool = True):
         """
-        List version of yield all.
+        List version of ayield_all.  See run_all for sinks and keep_results.
+        """
+        collector = _Collector(self, sinks, keep_results)
+        with collector:
+            async for result in self.ayield_all(env=env, max_concurrency=max_concurrency):
+                collector.add(result)
+        return self._finish_run(collector)
 
+    def run_all(self, env=None, sinks: Sequence[BlickSink] | None = None, keep_results: bool = True):
         """
+        List version of yield all.
 
-        # A deceptively important line of code
-        self.results = list(self.yield_all(env=env))
+        Args:
+            env: The environment to use for the rule functions
+            sinks: Each result is written to these sinks as it is produced.
+            keep_results: Keep the results in self.results.  Turn this off (and use a sink)
+                          for runs with too many results to hold in memory.  The counts and
+                          score are kept either way.
 
-        self.score = self.score_strategy(self.results)
+        Returns:
+            The results, an empty list if they weren't kept.
+        """
+        with self.run_lock:
+            collector = _Collector(self, sinks, keep_results)
+            with collector:
+                # A deceptively important line of code
+                for result in self.yield_all(env=env):
+                    collector.add(result)
+            return self._finish_run(collector)
+
+    def _finish_run(self, collector: "_Collector") -> list[BlickResult] | BlickResultStore:
+        self._results = collector.results
         self.progress_callback(self.function_count,
                                self.function_count,
                                f"Score = {self.score:.1f}")
         return self.results
 
+    @property
+    def running_score(self) -> float:
+        """Score of the results yielded so far, kept up to date during a run"""
+        return self._score.value()
+
+    @property
+    def results(self) -> list[BlickResult] | BlickResultStore:
+        """Results of the last run_all, a BlickResultStore if result_store is set"""
+        return self._results
+
+    @results.setter
+    def results(self, results: list[BlickResult] | BlickResultStore):
+        # Results set from outside are counted and scored again
+        self._results = results
+        self.stats = BlickRunStats.from_results(results)
+        self._score = self.score_strategy.start()
+        if isinstance(results, BlickResultStore):
+            self._score.add_store(results)
+        else:
+            for result in results:
+                self._score.add(result)
+        self.score = self._score.value()
+
+    @property
+    def parallel(self) -> bool:
+        """ Are check functions run on a thread pool?"""
+        return self.max_workers is not None and self.max_workers > 1
+
+    @property
+    def replay_count(self):
+        """ How many results were replayed from an earlier run"""
+        return self.stats.replay_count
+
+    @property
+    def timeout_count(self):
+        """ How many results ran out of time or were skipped at the run deadline"""
+        return self.stats.timeout_count
+
     @property
     def clean_run(self):
         """ No exceptions """
-        return all(not r.except_ for r in self.results)
+        return self.stats.clean_run
 
     @property
     def perfect_run(self):
         """No fails or skips"""
-        return all(r.status and not r.skipped and not r.warn_msg for r in self.results)
+        return self.stats.perfect_run
 
     @property
     def skip_count(self):
         """Number of skips"""
-        return len([r for r in self.results if r.skipped])
+        return self.stats.skip_count
 
     @property
     def warn_count(self):
         """Number of warns"""
-        return len([r for r in self.results if r.warn_msg])
+        return self.stats.warn_count
 
     @property
     def pass_count(self):
         """Number of passes"""
-        return len([r for r in self.results if r.status and not r.skipped])
+        return self.stats.pass_count
 
     @property
     def fail_count(self):
         """Number of fails"""
-        return len([r for r in self.results if not r.status and not r.skipped])
+        return self.stats.fail_count
 
     @property
     def result_count(self):
         """ Possibly redundant call to get the number of results."""
-        return len(self.results)
+        return self.stats.result_count
 
     @property
     def function_count(self):
@@ -762,7 +1235,13 @@ class BlickChecker:
             "phases": self.phases,
             "ruids": self.ruids,
             "score": self.score,
+            "score_strategy": self.score_strategy.strategy_name,
             "env_nulls": self.env_nulls,
+            "env_timings": dict(self.env_timings),
+            "shard_index": self.shard_index,
+            "shard_count": self.shard_count,
+            "shard_expected": self.shard_expected,
+            "shard_rules": None if self.shard_count is None else [function_key(f) for f in self.collected],
         }
         return header
 
@@ -782,6 +1261,7 @@ class BlickChecker:
             "failed_count": self.fail_count,
             "skip_count": self.skip_count,
             "total_count": self.result_count,
+            "stats": self.stats.as_dict(),
 
             # the meat of the output lives here
             "results": [r.as_dict() for r in self.results],
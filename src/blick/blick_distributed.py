@@ -0,0 +1,560 @@
+"""
+Run rules on worker processes that connect to a coordinator over a socket.
+
+Static sharding (blick_shard.py) leaves machines idle when a few rules are much
+slower than the rest.  Here the checker is the coordinator: it holds the prepared
+collected list and hands out small batches of rules to whichever worker asks for
+work.  A worker with nothing left to do gets work stolen from the busiest worker's
+queue, and a worker that stops sending heartbeats (or drops its connection) has its
+unfinished rules handed to someone else.  Results stream back into the checker's
+yield_all in collected order, just like a local run.
+
+Connections use multiprocessing.connection, so the address can be a (host, port)
+tuple for TCP or a path for a Unix socket, and both ends must share an authkey.
+Messages are pickled, so only run workers you trust against coordinators you trust.
+
+    coordinator = BlickCoordinator(("0.0.0.0", 5555), authkey=b"secret")
+    checker = BlickChecker(packages=[...], coordinator=coordinator, auto_setup=True)
+    results = checker.run_all()
+
+    # On each worker machine (same check code, same paths)
+    BlickWorker(("coordinator-host", 5555), authkey=b"secret").run()
+
+Rules are sent by name and imported again on the worker, so like the process
+executor they must be module level functions and the env values they use must pickle.
+"""
+import collections
+import itertools
+import os
+import pickle
+import socket
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Iterable, Sequence
+
+from .blick_exception import BlickException
+from .blick_function import BlickFunction
+from .blick_incremental import BlickIncremental
+from .blick_result import BlickResult
+from .blick_runner import _collect_results, dependency_skip, passed, prerequisites, timeout_result
+
+DEFAULT_BATCH_SIZE = 4  # Rules handed to a worker at a time
+DEFAULT_HEARTBEAT_SEC = 1.0  # How often workers say they are alive
+DEFAULT_HEARTBEAT_TIMEOUT = 10.0  # Workers not heard from in this long are dropped
+
+Address = tuple[str, int] | str
+
+# What recv raises when the other end goes away, or our end is closed from another thread
+_GONE = (OSError, EOFError, TypeError, pickle.UnpicklingError)
+
+
+def _sendable(results: list[BlickResult]) -> list[BlickResult]:
+    """Exceptions don't always pickle, send those as a BlickException with the same message."""
+    try:
+        pickle.dumps(results)
+        return results
+    except Exception:  # pylint: disable=broad-except
+        for result in results:
+            if result.except_ is not None:
+                result.except_ = BlickException(str(result.except_))
+        return results
+
+
+def _load_failure(name: str, ruid: str, e: Exception) -> BlickResult:
+    """Result for a rule the worker could not even load."""
+    result = BlickResult(status=False, func_name=name, ruid=ruid, except_=e)
+    result.msg = f"Exception '{e}' occurred while loading {name} on a worker."
+    return result
+
+
+class _WorkerHandle:
+    """The coordinator's view of one connected worker."""
+
+    def __init__(self, name: str, conn: Connection):
+        self.name = name
+        self.conn = conn
+        self.assigned: dict[int, int] = {}  # Sent to the worker and not reported back yet, by batch
+        self.batch = 0  # Id of the last batch sent
+        self.idle = False
+        self.stealing = False  # A steal request is out, don't ask twice
+        self.last_seen = time.time()
+        self._send_lock = threading.Lock()
+
+    def send(self, message: dict[str, Any]) -> bool:
+        """Send a message, False if the worker is gone."""
+        try:
+            with self._send_lock:
+                self.conn.send(message)
+            return True
+        except (OSError, EOFError, ValueError):
+            return False
+
+
+class _DistributedRun:
+    """
+    One run of a list of functions on the coordinator's workers.
+
+    This has the same interface as BlickRunner (results(index), finished(index) and a
+    context manager) so the checker doesn't care where its rules run.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self,
+                 coordinator: "BlickCoordinator",
+                 functions: Sequence[BlickFunction],
+                 run_deadline: float | None = None,
+                 incremental: BlickIncremental | None = None):
+        self.coordinator = coordinator
+        self.functions = list(functions)
+        self.run_id = next(self._ids)
+        self.run_deadline = run_deadline
+        self.deadline: float | None = None
+        self.incremental = incremental
+        self.closed = False
+
+        self.prerequisites = prerequisites(self.functions)
+        self.dependents: list[list[int]] = [[] for _ in self.functions]
+        for index, prereqs in enumerate(self.prerequisites):
+            for prereq in prereqs:
+                self.dependents[prereq].append(index)
+        self.waiting = [len(p) for p in self.prerequisites]
+        self.passed: list[bool | None] = [None] * len(self.functions)
+        self.futures = [Future() for _ in self.functions]
+        self.pending: collections.deque[int] = collections.deque()
+
+        # Pickle everything up front, so a rule that can't be sent fails here and not on a worker
+        self.payloads = [pickle.dumps(function_) for function_ in self.functions]
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self):
+        """Queue everything with no prerequisites and hand out the first batches."""
+        if self.run_deadline is not None:
+            self.deadline = time.time() + self.run_deadline
+        with self.coordinator.lock:
+            self.coordinator.attach(self)
+            for index, count in enumerate(self.waiting):
+                if count == 0:
+                    self._ready(index)
+            self.coordinator.dispatch()
+
+    def close(self):
+        with self.coordinator.lock:
+            self.closed = True
+            self.coordinator.detach(self)
+
+    def _ready(self, index: int):
+        """All prerequisites are done.  Skip, replay or queue the function.  Call with the lock held."""
+        function_ = self.functions[index]
+        failed = [self.functions[p].ruid for p in self.prerequisites[index] if self.passed[p] is False]
+        if failed:
+            self.complete(index, [dependency_skip(function_, failed)])
+            return
+        replayed = self.incremental.replay(function_) if self.incremental else None
+        if replayed is not None:
+            self.complete(index, replayed)
+            return
+        self.pending.append(index)
+
+    def take(self, count: int) -> list[tuple[int, str, str, bytes]]:
+        """Take up to count queued functions to send to a worker."""
+        items = []
+        while self.pending and len(items) < count:
+            index = self.pending.popleft()
+            function_ = self.functions[index]
+            items.append((index, function_.function_name, function_.ruid, self.payloads[index]))
+        return items
+
+    def requeue(self, indexes: Iterable[int]):
+        """Put functions a worker gave up (or lost) back at the front of the queue."""
+        for index in sorted(indexes, reverse=True):
+            if not self.futures[index].done():
+                self.pending.appendleft(index)
+
+    def complete(self, index: int, results: list[BlickResult]):
+        """Record the results of a function and queue anything waiting on it.  Call with the lock held."""
+        if self.futures[index].done():
+            # A worker we gave up on finished after all
+            return
+        self.passed[index] = passed(results)
+        self.futures[index].set_result(results)
+        for dependent in self.dependents[index]:
+            self.waiting[dependent] -= 1
+            if self.waiting[dependent] == 0:
+                self._ready(dependent)
+
+    def finished(self, index: int):
+        """Dependents are released as results arrive, so there is nothing to do here."""
+
+    def results(self, index: int) -> list[BlickResult]:
+        """
+        Wait for the results of a function.
+
+        With a run deadline, results that are not back shortly after the deadline (the
+        worker went quiet for example) are given a timed out result.
+        """
+        future = self.futures[index]
+        if self.deadline is None:
+            return self._wait(future)
+        grace = self.coordinator.heartbeat_timeout
+        try:
+            return future.result(timeout=max(0.0, self.deadline - time.time()) + grace)
+        except FutureTimeoutError:
+            function_ = self.functions[index]
+            return [timeout_result(function_, self.run_deadline, time.time(), 1)]
+
+    def _wait(self, future: Future) -> list[BlickResult]:
+        """Wait with no deadline, but give up once no worker has been connected for heartbeat_timeout."""
+        timeout = self.coordinator.heartbeat_timeout
+        alone_since = None
+        while True:
+            try:
+                return future.result(timeout=max(0.01, timeout / 4))
+            except FutureTimeoutError:
+                if self.coordinator.worker_count:
+                    alone_since = None
+                elif alone_since is None:
+                    alone_since = time.time()
+                elif time.time() - alone_since >= timeout:
+                    raise BlickException(f"No workers connected to the coordinator at {self.coordinator.address} "
+                                         f"for {timeout} seconds.") from None
+
+
+class BlickCoordinator:
+    """
+    Accept worker connections and hand them rules to run.
+
+    The coordinator starts listening as soon as it is made, so workers can connect
+    before the run starts.  It outlives runs, so workers stay connected (with their
+    check modules already imported) from one run to the next.
+
+    Args:
+        address: (host, port) for TCP, port 0 picks a free port, or a path for a Unix socket.
+        authkey: Shared secret, workers must use the same one.  A random key is made if not
+                 given, read it from the authkey attribute.
+        batch_size: How many rules a worker gets at a time.
+        heartbeat_timeout: Seconds without hearing from a worker before its rules are
+                           handed to other workers.
+    """
+
+    def __init__(self,
+                 address: Address = ("127.0.0.1", 0),
+                 authkey: bytes | None = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 heartbeat_timeout: float = DEFAULT_HEARTBEAT_TIMEOUT):
+        if batch_size < 1:
+            raise BlickException("batch_size must be at least 1.")
+        self.authkey = authkey or os.urandom(16)
+        self.batch_size = batch_size
+        self.heartbeat_timeout = heartbeat_timeout
+
+        self.listener = Listener(address, authkey=self.authkey)
+        self.address = self.listener.address
+
+        self.lock = threading.RLock()
+        self.workers: list[_WorkerHandle] = []
+        self.run: _DistributedRun | None = None
+        self._closed = threading.Event()
+
+        threading.Thread(target=self._accept, name="blick-accept", daemon=True).start()
+        threading.Thread(target=self._monitor, name="blick-monitor", daemon=True).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def worker_count(self) -> int:
+        with self.lock:
+            return len(self.workers)
+
+    def wait_for_workers(self, count: int, timeout: float | None = None) -> bool:
+        """Wait until at least count workers are connected, False on timeout."""
+        end = None if timeout is None else time.time() + timeout
+        while self.worker_count < count:
+            if end is not None and time.time() >= end:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def runner(self,
+               functions: Sequence[BlickFunction],
+               run_deadline: float | None = None,
+               incremental: BlickIncremental | None = None) -> _DistributedRun:
+        """A runner for the checker that sends the functions to the workers."""
+        return _DistributedRun(self, functions, run_deadline, incremental)
+
+    def attach(self, run: _DistributedRun):
+        if self.run is not None and not self.run.closed:
+            raise BlickException("The coordinator is already running rules for another checker.")
+        self.run = run
+
+    def detach(self, run: _DistributedRun):
+        """The run is over (or aborted).  Workers drop whatever they haven't started."""
+        if self.run is not run:
+            return
+        self.run = None
+        for worker in self.workers:
+            if worker.assigned:
+                worker.assigned.clear()
+                worker.send({"type": "cancel"})
+
+    def close(self):
+        """Tell the workers to stop and stop listening."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        with self.lock:
+            workers, self.workers = self.workers, []
+        for worker in workers:
+            worker.send({"type": "stop"})
+            worker.conn.close()
+
+        # Wake the accept thread so it sees we are closed, the handshake just fails
+        family = socket.AF_UNIX if isinstance(self.address, str) else socket.AF_INET
+        try:
+            with socket.socket(family) as sock:
+                sock.connect(self.address)
+        except OSError:
+            pass
+        self.listener.close()
+
+    def _accept(self):
+        while not self._closed.is_set():
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, ValueError, AuthenticationError):
+                # A bad handshake, or the listener was closed
+                continue
+            if self._closed.is_set():
+                conn.close()
+                break
+            threading.Thread(target=self._serve, args=(conn,), name="blick-serve", daemon=True).start()
+
+    def _serve(self, conn: Connection):
+        """Read messages from one worker until it goes away."""
+        try:
+            hello = conn.recv()
+        except _GONE:
+            conn.close()
+            return
+        worker = _WorkerHandle(hello.get("name", "worker"), conn)
+        with self.lock:
+            self.workers.append(worker)
+
+        try:
+            while not self._closed.is_set():
+                message = conn.recv()
+                worker.last_seen = time.time()
+                with self.lock:
+                    self._handle(worker, message)
+        except _GONE:
+            pass
+        with self.lock:
+            self._lost(worker)
+
+    def _handle(self, worker: _WorkerHandle, message: dict[str, Any]):
+        kind = message["type"]
+        run = self.run
+        current = run is not None and message.get("run") == run.run_id
+
+        if kind == "results":
+            # Results from an earlier run were dropped from assigned when that run ended
+            if current:
+                worker.assigned.pop(message["index"], None)
+                run.complete(message["index"], message["results"])
+        elif kind == "released":
+            worker.stealing = False
+            released = [i for i in message["indexes"] if i in worker.assigned]
+            for index in released:
+                del worker.assigned[index]
+            if current:
+                run.requeue(released)
+        elif kind == "idle":
+            # The worker has run (or dropped, a cancelled run for example) everything up to the batch it
+            # names.  An idle sent before a newer batch arrived says nothing about that batch.
+            batch = message.get("batch", 0)
+            dropped = [index for index, sent_in in worker.assigned.items() if sent_in <= batch]
+            for index in dropped:
+                del worker.assigned[index]
+            if run is not None:
+                run.requeue(dropped)
+            worker.idle = batch == worker.batch
+        self.dispatch()
+
+    def _lost(self, worker: _WorkerHandle):
+        """A worker disconnected or went quiet, give its rules to someone else.  Call with the lock held."""
+        if worker not in self.workers:
+            return
+        self.workers.remove(worker)
+        worker.conn.close()
+        if self.run is not None:
+            self.run.requeue(worker.assigned)
+        worker.assigned.clear()
+        self.dispatch()
+
+    def dispatch(self):
+        """Hand queued rules to idle workers, stealing from busy ones if the queue is empty.  Lock held."""
+        run = self.run
+        if run is None or run.closed:
+            return
+
+        for worker in [w for w in self.workers if w.idle]:
+            items = run.take(self.batch_size)
+            if not items:
+                break
+            batch = worker.batch + 1
+            message = {"type": "batch", "run": run.run_id, "batch": batch, "deadline": run.deadline, "items": items}
+            if worker.send(message):
+                worker.idle = False
+                worker.batch = batch
+                worker.assigned.update((index, batch) for index, *_ in items)
+            else:
+                run.requeue(index for index, *_ in items)
+
+        # Work stealing, ask the busiest worker to give back half of what it hasn't started.
+        if any(w.idle for w in self.workers) and not run.pending:
+            busy = [w for w in self.workers if not w.idle and not w.stealing and len(w.assigned) > 1]
+            if busy:
+                victim = max(busy, key=lambda w: len(w.assigned))
+                victim.stealing = True
+                victim.send({"type": "steal", "run": run.run_id, "count": len(victim.assigned) // 2})
+
+    def _monitor(self):
+        """Drop workers that stopped sending heartbeats."""
+        interval = max(0.01, self.heartbeat_timeout / 4)
+        while not self._closed.wait(interval):
+            now = time.time()
+            with self.lock:
+                for worker in [w for w in self.workers if now - w.last_seen > self.heartbeat_timeout]:
+                    self._lost(worker)
+
+
+class BlickWorker:
+    """
+    Connect to a coordinator and run the rules it sends until told to stop.
+
+    A worker runs one rule at a time.  It sends a heartbeat every heartbeat_sec from its
+    own thread, so a long rule doesn't look like a dead worker.
+
+    Args:
+        address: The coordinator's address.
+        authkey: The coordinator's authkey.
+        name: Shows up in logs, defaults to host:pid.
+        heartbeat_sec: Seconds between heartbeats.
+    """
+
+    def __init__(self,
+                 address: Address,
+                 authkey: bytes,
+                 name: str | None = None,
+                 heartbeat_sec: float = DEFAULT_HEARTBEAT_SEC):
+        self.address = address
+        self.authkey = authkey
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.heartbeat_sec = heartbeat_sec
+        self.run_count = 0
+
+        self._queue: collections.deque = collections.deque()
+        self._batch = 0  # Id of the last batch received, idle messages say which batch they follow
+        self._busy = False  # Running a rule, it says idle itself when done
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._send_lock = threading.Lock()
+        self._conn: Connection | None = None
+
+    def _send(self, message: dict[str, Any]):
+        with self._send_lock:
+            self._conn.send(message)
+
+    def stop(self):
+        with self._cond:
+            self._stop.set()
+            self._cond.notify_all()
+
+    def run(self):
+        """Work until the coordinator says stop or goes away."""
+        self._conn = Client(self.address, authkey=self.authkey)
+        try:
+            self._send({"type": "hello", "name": self.name})
+            self._send({"type": "idle", "batch": 0})
+            threading.Thread(target=self._receive, name="blick-receive", daemon=True).start()
+            threading.Thread(target=self._heartbeat, name="blick-heartbeat", daemon=True).start()
+            self._work()
+        except (OSError, EOFError):
+            pass
+        finally:
+            self.stop()
+            self._conn.close()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stop.is_set():
+                    self._cond.wait()
+                if self._stop.is_set():
+                    return
+                run_id, deadline, (index, name, ruid, payload) = self._queue.popleft()
+                self._busy = True
+
+            try:
+                function_ = pickle.loads(payload)
+                results = _collect_results(function_, deadline)
+            except Exception as e:  # pylint: disable=broad-except
+                results = [_load_failure(name, ruid, e)]
+            self.run_count += 1
+
+            self._send({"type": "results", "run": run_id, "index": index, "results": _sendable(results)})
+            with self._cond:
+                self._busy = False
+                empty, batch = not self._queue, self._batch
+            if empty:
+                self._send({"type": "idle", "batch": batch})
+
+    def _receive(self):
+        try:
+            while not self._stop.is_set():
+                message = self._conn.recv()
+                kind = message["type"]
+                if kind == "batch":
+                    with self._cond:
+                        self._queue.extend((message["run"], message["deadline"], item) for item in message["items"])
+                        self._batch = message["batch"]
+                        self._cond.notify_all()
+                elif kind == "steal":
+                    with self._cond:
+                        released = []
+                        while self._queue and len(released) < message["count"] and \
+                                self._queue[-1][0] == message["run"]:
+                            released.append(self._queue.pop()[2][0])
+                    self._send({"type": "released", "run": message["run"], "indexes": released})
+                elif kind == "cancel":
+                    with self._cond:
+                        self._queue.clear()
+                        idle, batch = not self._busy, self._batch
+                    if idle:
+                        self._send({"type": "idle", "batch": batch})
+                elif kind == "stop":
+                    break
+        except _GONE:
+            pass
+        self.stop()
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.heartbeat_sec):
+            try:
+                self._send({"type": "heartbeat"})
+            except (OSError, EOFError, ValueError):
+                return
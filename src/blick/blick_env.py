@@ -0,0 +1,437 @@
+"""
+Environment functions with a scope, like pytest fixtures.
+
+Environment functions (env_ functions in rule modules) used to run at the start of every
+run.  That is fine for a few constants, but env functions that open database engines or
+parse workbooks redo that work for every run, and the API server runs on every request.
+
+The @env decorator gives an env function a scope:
+
+- "run" (the default): called at the start of each run and torn down at the end.
+- "module": called once and kept with its BlickModule for later runs.
+- "session": called once and kept for the life of the process.
+
+Kept values can be given a time to live (same units as ttl_minutes) and can be thrown
+away with invalidate_fixtures or BlickChecker.invalidate_environments.
+
+An env function can be a generator that yields its dictionary once.  The code after the
+yield is the teardown, it runs when the value is thrown away (end of the run for "run"
+scope, invalidation, expiry or the end of the process for the others).
+
+    @env(scope="session", ttl_minutes="30m", provides="engine")
+    def env_db(_: dict):
+        engine = create_engine(URL)
+        yield {"engine": engine}
+        engine.dispose()
+
+Env functions that declare what they provide are lazy.  The checker hands the rules a
+BlickLazyEnv and an env function is only called the first time a rule (or another env
+function) reads one of its names, so a filtered run never opens the fixtures that its
+rules don't use.  Env functions that don't say what they provide are called up front.
+Env functions are still passed a dict, a copy of what is loaded so far that loads the
+lazy names when they are read, so changing it doesn't change the environment.
+
+Env functions can also say which names they require.  The lazy env functions the rules
+need (and the ones they require) are then set up before the rules run, on a thread pool,
+each one as soon as the env functions it requires are done.  Independent fixtures (a
+database engine, a workbook, a big CSV) load at the same time instead of one after the
+other.  Two env functions making the same name is an error.
+"""
+import atexit
+import inspect
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterator, Mapping
+
+from .blick_attribute import _parse_ttl_string
+from .blick_exception import BlickException
+
+SCOPES = ("run", "module", "session")
+
+DEFAULT_SCOPE = "run"
+DEFAULT_ENV_TTL_MIN = 0  # Kept values don't expire
+DEFAULT_ENV_WORKERS = 8  # Threads used to set up env functions
+
+# Fixtures with session scope, by env function
+_SESSION_FIXTURES: dict[Callable, "BlickFixture"] = {}
+
+
+def _names(names, what: str) -> tuple[str, ...]:
+    """Allow "a b", "a,b" or ["a", "b"]"""
+    if isinstance(names, str):
+        names = names.replace(',', ' ').split()
+    names = tuple(names)
+    if not all(isinstance(name, str) and name.isidentifier() for name in names):
+        raise BlickException(f"{what} must be a list of parameter names not {names}")
+    return names
+
+
+def env(*, scope: str = DEFAULT_SCOPE, ttl_minutes=DEFAULT_ENV_TTL_MIN, provides=(), requires=()):
+    """
+    Decorator to set how long the values of an env function are kept.
+
+    Args:
+        scope: "run", "module" or "session".
+        ttl_minutes: Values of module and session fixtures are made again after this long,
+                     "30sec", "2h" or a number of minutes.  0 keeps them until invalidated.
+        provides: Names the env function adds to the environment.  Env functions that
+                  declare them are only called when one of the names is used.
+        requires: Names the env function reads from the environment it is passed.  They
+                  are loaded before it is called.
+    """
+    if scope not in SCOPES:
+        raise BlickException(f"Env scope must be one of {SCOPES} not '{scope}'.")
+
+    # throws exception on bad input
+    ttl_minutes = _parse_ttl_string(str(ttl_minutes))
+    provides = _names(provides, "provides")
+    requires = _names(requires, "requires")
+
+    def decorator(func):
+        func.env_scope = scope
+        func.env_ttl_minutes = ttl_minutes
+        func.env_provides = provides
+        func.env_requires = requires
+        return func
+
+    return decorator
+
+
+class BlickFixture:
+    """
+    The value of one env function and how to tear it down.
+
+    The value is made by setup the first time it is asked for (and again once it expires
+    or is invalidated).  Generator env functions are resumed by teardown to clean up.
+    """
+
+    def __init__(self, func: Callable):
+        self.func = func
+        self.name = getattr(func, "__name__", str(func))
+
+        # Env functions in different modules can have the same name, errors use this one
+        self.qualified_name = f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', self.name)}"
+        self.scope = getattr(func, "env_scope", DEFAULT_SCOPE)
+        self.ttl_minutes = getattr(func, "env_ttl_minutes", DEFAULT_ENV_TTL_MIN)
+        self.provides: tuple[str, ...] = getattr(func, "env_provides", ())
+        self.requires: tuple[str, ...] = getattr(func, "env_requires", ())
+        self.value: dict[str, Any] | None = None
+        self.created = 0.0
+
+        # Seconds the env function took the last time it was called
+        self.setup_sec = 0.0
+        self._generator = None
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return f"BlickFixture({self.name}, scope={self.scope})"
+
+    @property
+    def ready(self) -> bool:
+        """Has a value that hasn't expired"""
+        return self.value is not None and not self.expired
+
+    @property
+    def expired(self) -> bool:
+        return self.ttl_minutes > 0 and time.time() - self.created > self.ttl_minutes * 60
+
+    def setup(self, full_env: dict[str, Any]) -> dict[str, Any]:
+        """The dictionary the env function adds to the environment, made if needed."""
+        with self._lock:
+            if self.ready:
+                return self.value
+            self.teardown()
+
+            start = time.perf_counter()
+            value = self.func(full_env)
+            if inspect.isgenerator(value):
+                generator = value
+                try:
+                    value = next(generator)
+                except StopIteration as e:
+                    raise BlickException(f"Env function {self.name} did not yield its environment.") from e
+                self._generator = generator
+            self.setup_sec = time.perf_counter() - start
+            if value is None:
+                value = {}
+            if not isinstance(value, dict):
+                self.teardown()
+                raise BlickException(f"Env function {self.name} must return a dict not {type(value).__name__}.")
+
+            self.value = value
+            self.created = time.time()
+            return value
+
+    def teardown(self) -> None:
+        """Throw the value away, running the code after the yield of a generator env function."""
+        with self._lock:
+            generator, self._generator = self._generator, None
+            self.value = None
+            if generator is None:
+                return
+            try:
+                next(generator)
+            except StopIteration:
+                return
+            generator.close()
+            raise BlickException(f"Env function {self.name} yielded more than once.")
+
+
+class _EnvDict(dict):
+    """
+    The dict an env function is passed: the names loaded so far, and lazy names loaded from
+    the environment the first time they are read.
+    """
+
+    def __init__(self, env: "BlickLazyEnv"):
+        with env._lock:
+            super().__init__(env.values)
+        self._env = env
+
+    def __missing__(self, name: str) -> Any:
+        value = self[name] = self._env[name]
+        return value
+
+    def __contains__(self, name: object) -> bool:
+        return super().__contains__(name) or name in self._env
+
+    def get(self, name: str, default: Any = None) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+
+class BlickLazyEnv(Mapping[str, Any]):
+    """
+    The environment handed to rules, with the names of lazy env functions filled in the
+    first time they are read.
+
+    values holds what is loaded so far (the global environment and the env functions
+    that ran).  providers says which fixture makes each name that isn't loaded yet.
+    Checking for a name (in) doesn't load it, reading it does.  The fixtures are handed a
+    dict copy of this environment (_EnvDict), so the env functions they depend on are
+    loaded as they are read.
+    """
+
+    def __init__(self, values: Mapping[str, Any] | None = None,
+                 providers: dict[str, BlickFixture] | None = None,
+                 needed: set[str] | None = None):
+        self.values: dict[str, Any] = dict(values or {})
+        self.providers: dict[str, BlickFixture] = providers if providers is not None else {}
+
+        # Parameter names of the rules that will use this environment
+        self.needed: set[str] = needed or set()
+
+        # Which env function loaded each name, seconds each env function took this run
+        # and the env functions that failed (they aren't tried again by this environment)
+        self.origins: dict[str, BlickFixture] = {}
+        self.timings: dict[str, float] = {}
+        self.errors: dict[BlickFixture, Exception] = {}
+
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+    def _loading(self) -> list[BlickFixture]:
+        """Fixtures being loaded by this thread, to catch loops."""
+        if not hasattr(self._local, "loading"):
+            self._local.loading = []
+        return self._local.loading
+
+    def add_provider(self, name: str, fixture: BlickFixture) -> None:
+        """fixture makes name, an error if another env function already does."""
+        other = self.providers.get(name)
+        if other is not None and other is not fixture:
+            raise BlickException(f"Env functions {other.qualified_name} and {fixture.qualified_name} "
+                                 f"both provide '{name}'.")
+        self.providers[name] = fixture
+
+    def load(self, fixture: BlickFixture, override: bool = False) -> dict[str, Any]:
+        """
+        Set up a fixture and add its values.  Names from the global environment are kept
+        unless override, a name another env function loaded is a collision.
+        """
+        if fixture in self.errors:
+            raise self.errors[fixture]
+        loading = self._loading()
+        if fixture in loading:
+            loop = " -> ".join(f.name for f in loading + [fixture])
+            raise BlickException(f"Env functions depend on each other in a loop: {loop}")
+        loading.append(fixture)
+        created = fixture.created
+        try:
+            value = fixture.setup(_EnvDict(self))
+        except Exception as e:
+            self.errors[fixture] = e
+            raise
+        finally:
+            loading.pop()
+
+        with self._lock:
+            if fixture.created != created:
+                self.timings[fixture.name] = fixture.setup_sec
+            for name, item in value.items():
+                origin = self.origins.get(name)
+                if origin is not None and origin is not fixture:
+                    raise BlickException(f"Env functions {origin.qualified_name} and {fixture.qualified_name} "
+                                         f"both set '{name}'.")
+                if override or origin is None and name not in self.values:
+                    self.values[name] = item
+                    self.origins[name] = fixture
+        return value
+
+    def _required(self, fixtures: list[BlickFixture]) -> dict[BlickFixture, set[BlickFixture]]:
+        """The fixtures (and the ones they require, all the way down) with what each waits for."""
+        graph: dict[BlickFixture, set[BlickFixture]] = {}
+        todo = list(fixtures)
+        while todo:
+            fixture = todo.pop()
+            if fixture in graph:
+                continue
+            graph[fixture] = set()
+            for name in fixture.requires:
+                provider = self.providers.get(name)
+                if provider is not None and name not in self.values:
+                    graph[fixture].add(provider)
+                    todo.append(provider)
+                elif provider is None and name not in self.values:
+                    raise BlickException(f"Env function {fixture.name} requires '{name}' which nothing provides.")
+            graph[fixture].discard(fixture)
+        return graph
+
+    def prefetch(self, fixtures: list[BlickFixture], max_workers: int | None = None) -> None:
+        """
+        Set up fixtures, and the fixtures they require, before they are read.  Each one
+        starts on a thread pool as soon as the fixtures it requires are done.  Failures are
+        kept and raised again when a rule reads one of the names, the fixtures that
+        require a failed one are left to load (and fail) then too.
+        """
+        graph = self._required(fixtures)
+        order = _topological(graph)
+        waiting = {fixture: set(needs) for fixture, needs in graph.items()}
+        dependents: dict[BlickFixture, list[BlickFixture]] = {fixture: [] for fixture in graph}
+        for fixture, needs in graph.items():
+            for need in needs:
+                dependents[need].append(fixture)
+
+        workers = min(max_workers or DEFAULT_ENV_WORKERS, len(graph))
+        if workers <= 1:
+            for fixture in order:
+                try:
+                    self.load(fixture)
+                except Exception:  # pylint: disable=broad-except
+                    pass
+            return
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="blick-env") as pool:
+            running: dict[Future, BlickFixture] = {}
+
+            def start_ready():
+                for fixture in [f for f, needs in waiting.items() if not needs]:
+                    del waiting[fixture]
+                    running[pool.submit(self.load, fixture)] = fixture
+
+            start_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    fixture = running.pop(future)
+                    if future.exception() is not None:
+                        continue
+                    for dependent in dependents[fixture]:
+                        if dependent in waiting:
+                            waiting[dependent].discard(fixture)
+                start_ready()
+
+        # Anything still waiting requires a fixture that failed, it fails when it is read
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return self.values[name]
+        except KeyError:
+            pass
+        fixture = self.providers.get(name)
+        if fixture is None:
+            raise KeyError(name)
+        self.load(fixture)
+        try:
+            return self.values[name]
+        except KeyError:
+            raise BlickException(f"Env function {fixture.name} did not provide '{name}'.") from None
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.values or name in self.providers
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(dict.fromkeys([*self.values, *self.providers]))
+
+    def __len__(self) -> int:
+        return len(set(self.values) | set(self.providers))
+
+    def __repr__(self):
+        return f"BlickLazyEnv(loaded={sorted(self.values)}, lazy={sorted(set(self.providers) - set(self.values))})"
+
+    @property
+    def unused(self) -> list[str]:
+        """Lazy names that nothing has read (so far), their env functions haven't run."""
+        return sorted(name for name in self.providers if name not in self.values)
+
+
+def _topological(graph: dict[BlickFixture, set[BlickFixture]]) -> list[BlickFixture]:
+    """Fixtures ordered so the ones they require come first."""
+    order: list[BlickFixture] = []
+    waiting = {fixture: set(needs) for fixture, needs in graph.items()}
+    while waiting:
+        ready = [fixture for fixture, needs in waiting.items() if not needs]
+        if not ready:
+            names = ", ".join(sorted(f.name for f in waiting))
+            raise BlickException(f"Env functions depend on each other in a loop: {names}")
+        for fixture in ready:
+            del waiting[fixture]
+            order.append(fixture)
+        for needs in waiting.values():
+            needs.difference_update(ready)
+    return order
+
+
+def fixture_for(func: Callable, module=None) -> BlickFixture:
+    """
+    The fixture that holds the values of an env function.  Session fixtures are shared by
+    the whole process, module fixtures are kept on the module and run fixtures are new.
+    """
+    scope = getattr(func, "env_scope", DEFAULT_SCOPE)
+    if scope == "session":
+        fixture = _SESSION_FIXTURES.get(func)
+        if fixture is None:
+            fixture = _SESSION_FIXTURES[func] = BlickFixture(func)
+        return fixture
+    if scope == "module" and module is not None:
+        fixture = module.env_fixtures.get(func)
+        if fixture is None:
+            fixture = module.env_fixtures[func] = BlickFixture(func)
+        return fixture
+    return BlickFixture(func)
+
+
+def invalidate_fixtures(funcs: list[Callable] | None = None, name: str | None = None) -> int:
+    """
+    Tear down kept session fixtures, all of them, those of funcs or the one named name.
+
+    Returns:
+        The number of fixtures torn down.
+    """
+    count = 0
+    for func, fixture in list(_SESSION_FIXTURES.items()):
+        if funcs is not None and func not in funcs:
+            continue
+        if name is not None and fixture.name != name:
+            continue
+        if fixture.value is not None:
+            count += 1
+        fixture.teardown()
+    return count
+
+
+# Session fixtures are cleaned up when the process ends
+atexit.register(invalidate_fixtures)
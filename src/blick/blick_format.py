@@ -16,9 +16,17 @@ the inline text.
 
 The default formatting is plain text, which effectively just removes all formatting.
 
+Renderers list what each tag turns into (replacements) and the markup is rewritten in one
+pass with a compiled regex, so rendering costs the same however many tags there are.
+Recently rendered messages are remembered, rules tend to produce the same messages again
+and again.
+
 """
 
+import functools
+import re
 from abc import ABC, abstractmethod
+from typing import Iterable
 
 # Supported HTML style tags
 # Define your tags as constants
@@ -214,6 +222,54 @@ class BlickMarkup:
 BM = BlickMarkup()
 
 
+class _CompiledMarkup:
+    """
+    Rewrites every <<tag>> and <</tag>> of a message in a single regex pass.
+
+    Known tags become their replacement (or nothing), anything else that looks like a tag
+    is left alone.  Rendered messages are kept in an LRU of cache_size entries.
+    """
+
+    def __init__(self, tags: Iterable[str], replacements: dict[str, tuple[str, str]], cache_size: int,
+                 markup: BlickMarkup | None = None):
+        markup = markup or BlickMarkup()
+        self.lookup: dict[str, str] = {}
+        for tag in tags:
+            self.lookup[markup.open_tag(tag)] = ''
+            self.lookup[markup.close_tag(tag)] = ''
+        for tag, (open_, close) in replacements.items():
+            self.lookup[markup.open_tag(tag)] = open_
+            self.lookup[markup.close_tag(tag)] = close
+
+        # <<(\w+)>> or <</(\w+)>> for the default delimiters
+        delims = [markup.open_delim.split('@', 1), markup.close_delim.split('@', 1)]
+        self.pattern = re.compile('|'.join(f'{re.escape(before)}\\w+{re.escape(after)}' for before, after in delims))
+
+        # Text every tag starts with, messages without it are returned as is
+        self.marker = _common_prefix(delims[0][0], delims[1][0])
+        self.render = functools.lru_cache(maxsize=cache_size)(self._render)
+
+    def _replace(self, match: re.Match) -> str:
+        token = match.group()
+        return self.lookup.get(token, token)
+
+    def _render(self, msg: str) -> str:
+        if self.marker and self.marker not in msg:
+            return msg
+        return self.pattern.sub(self._replace, msg)
+
+
+def _common_prefix(a: str, b: str) -> str:
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    return a[:i]
+
+
+# Compiled markup for each renderer class, made the first time the class renders
+_COMPILED: dict[tuple[type, bool], _CompiledMarkup] = {}
+
+
 class BlickAbstractRender(ABC):
     """
     Base class for all blick renderers.  This has a list of all supported tags, the abstract
@@ -226,21 +282,36 @@ class BlickAbstractRender(ABC):
             TAG_PASS, TAG_CODE, TAG_RED, TAG_BLUE, TAG_GREEN, TAG_PURPLE, TAG_ORANGE, TAG_YELLOW, TAG_BLACK, TAG_WHITE,
             TAG_WARN, TAG_SKIP]
 
+    # Open and close text for each tag the renderer formats, the other tags are removed.
+    replacements: dict[str, tuple[str, str]] = {}
+
+    # How many rendered messages each renderer class remembers
+    cache_size = 4096
+
     @abstractmethod
     def render(self, msg):  # pragma: no cover
         """Base class render method"""
 
+    def render_many(self, msgs: Iterable[str]) -> list[str]:
+        """Render a batch of messages."""
+        render = self.render
+        return [render(msg) for msg in msgs]
+
+    def compiled(self, cleanup_only: bool = False) -> _CompiledMarkup:
+        """The compiled markup of this renderer class (just removing tags if cleanup_only)."""
+        key = (type(self), cleanup_only)
+        compiled = _COMPILED.get(key)
+        if compiled is None:
+            replacements = {} if cleanup_only else self.replacements
+            compiled = _COMPILED[key] = _CompiledMarkup(self.tags, replacements, self.cache_size)
+        return compiled
+
     def cleanup(self, msg):
         """
         It is optional for subclasses to replace all the render tags.  This method provides
         support to wipeout all un rendered tags.
         """
-        fmt = BlickMarkup()
-
-        # Find all the defined tags and blow them away.
-        for tag in self.tags:
-            msg = msg.replace(f'{fmt.open_tag(tag)}', '').replace(f'{fmt.close_tag(tag)}', '')
-        return msg
+        return self.compiled(cleanup_only=True).render(msg)
 
 
 class BlickRenderText(BlickAbstractRender):
@@ -248,150 +319,99 @@ class BlickRenderText(BlickAbstractRender):
     This class strips all html formatting and is suitable for text output for things like CLI or API
     
     These messages are generally considered 'one-liners'
+
+    Subclasses only need to fill in replacements, the tags they leave out are removed.
     """
 
     def render(self, msg):
-        # Call the baseclass cleanup messages since this is a do-nothing class.
-        return self.cleanup(msg)
+        # Replace the tags of this class and remove the rest in one go.
+        return self.compiled().render(msg)
 
 
 class BlickBasicMarkdown(BlickRenderText):
     """Markdown render class"""
 
-    def render(self, msg):
-        """Basic markdown render method that converts tags to markdown"""
-        fmt = BlickMarkup()
-        replacements = {TAG_BOLD: '**',
-                        TAG_ITALIC: '*',
-                        TAG_STRIKETHROUGH: '~~',
-                        TAG_CODE: '`',
-                        TAG_PASS: '`',
-                        TAG_FAIL: '`',
-                        TAG_WARN: '`',
-                        TAG_SKIP: '`',
-                        TAG_EXPECTED: '`',
-                        TAG_ACTUAL: '`'}
-        # Phase 1 replace all substitutions
-        for md, replacement in replacements.items():
-            open_tag = fmt.open_tag(md)
-            close_tag = fmt.close_tag(md)
-            msg = msg.replace(open_tag, replacement).replace(close_tag, replacement)
-
-        # Phase 2 replace all unused tags.
-        return self.cleanup(msg)
+    replacements = {TAG_BOLD: ('**', '**'),
+                    TAG_ITALIC: ('*', '*'),
+                    TAG_STRIKETHROUGH: ('~~', '~~'),
+                    TAG_CODE: ('`', '`'),
+                    TAG_PASS: ('`', '`'),
+                    TAG_FAIL: ('`', '`'),
+                    TAG_WARN: ('`', '`'),
+                    TAG_SKIP: ('`', '`'),
+                    TAG_EXPECTED: ('`', '`'),
+                    TAG_ACTUAL: ('`', '`')}
 
 
 class BlickBasicRichRenderer(BlickRenderText):
     """Rich render class"""
 
-    def render(self, msg):
-        """Basic markdown render method that converts tags to rich formatted code"""
-        fmt = BlickMarkup()
-        replacements = {TAG_BOLD: ('[bold]', '[/bold]'),
-                        TAG_ITALIC: ('[italic]', '[/italic]'),
-                        TAG_UNDERLINE: ('[u]', '[/u]'),
-                        TAG_STRIKETHROUGH: ('[strike]', '[/strike]'),
-                        TAG_PASS: ('[green]', '[/green]'),
-                        TAG_FAIL: ('[red]', '[/red]'),
-                        TAG_WARN: ('[orange]', '[/orange]'),
-                        TAG_SKIP: ('[purple]', '[/purple]'),
-                        TAG_EXPECTED: ('[green]', '[/green]'),
-                        TAG_ACTUAL: ('[green]', '[/green]'),
-                        TAG_RED: ('[red]', '[/red]'),
-                        TAG_GREEN: ('[green]', '[/green]'),
-                        TAG_BLUE: ('[blue]', '[/blue]'),
-                        TAG_YELLOW: ('[yellow]', '[/yellow]'),
-                        TAG_ORANGE: ('[orange]', '[/orange]'),
-                        TAG_PURPLE: ('[purple]', '[/purple]'),
-                        TAG_BLACK: ('[black]', '[/black]'),
-                        TAG_WHITE: ('[white]', '[/white]'),
-                        }
-
-        # Phase 1 replace all substitutions
-        for md, replacement in replacements.items():
-            msg = msg.replace(f"{fmt.open_tag(md)}", replacement[0]).replace(f"{fmt.close_tag(md)}", replacement[1])
-
-        # Phase 2 replace all unused tags.
-        return self.cleanup(msg)
+    replacements = {TAG_BOLD: ('[bold]', '[/bold]'),
+                    TAG_ITALIC: ('[italic]', '[/italic]'),
+                    TAG_UNDERLINE: ('[u]', '[/u]'),
+                    TAG_STRIKETHROUGH: ('[strike]', '[/strike]'),
+                    TAG_PASS: ('[green]', '[/green]'),
+                    TAG_FAIL: ('[red]', '[/red]'),
+                    TAG_WARN: ('[orange]', '[/orange]'),
+                    TAG_SKIP: ('[purple]', '[/purple]'),
+                    TAG_EXPECTED: ('[green]', '[/green]'),
+                    TAG_ACTUAL: ('[green]', '[/green]'),
+                    TAG_RED: ('[red]', '[/red]'),
+                    TAG_GREEN: ('[green]', '[/green]'),
+                    TAG_BLUE: ('[blue]', '[/blue]'),
+                    TAG_YELLOW: ('[yellow]', '[/yellow]'),
+                    TAG_ORANGE: ('[orange]', '[/orange]'),
+                    TAG_PURPLE: ('[purple]', '[/purple]'),
+                    TAG_BLACK: ('[black]', '[/black]'),
+                    TAG_WHITE: ('[white]', '[/white]'),
+                    }
 
 
 class BlickBasicStreamlitRenderer(BlickRenderText):
     """Streamlit renderer class."""
 
-    def render(self, msg):
-        """Basic markdown render method that converts tags to streamlit format strings"""
-
-        fmt = BlickMarkup()
-        replacements = {
-            TAG_BOLD: ('**', '**'),
-            TAG_ITALIC: ('*', '*'),
-            TAG_CODE: ('`', '`'),
-            TAG_PASS: (':green[', ']'),
-            TAG_FAIL: (':red[', ']'),
-            TAG_WARN: (':orange[', ']'),
-            TAG_SKIP: (':purple[', ']'),
-            TAG_EXPECTED: (':green[', ']'),
-            TAG_ACTUAL: (':green[', ']'),
-            TAG_RED: (':red[', ']'),
-            TAG_GREEN: (':green[', ']'),
-            TAG_BLUE: (':blue[', ']'),
-            TAG_YELLOW: (':yellow[', ']'),
-            TAG_ORANGE: (':orange[', ']'),
-            TAG_PURPLE: (':purple[', ']'),
-            TAG_BLACK: (':black[', ']'),
-            TAG_WHITE: (':white[', ']'),
-        }
-
-        # Phase 1 replace all substitutions
-        for md, replacement in replacements.items():
-            open_tag = fmt.open_tag(md)
-            close_tag = fmt.close_tag(md)
-
-            msg = msg.replace(open_tag, replacement[0]).replace(close_tag, replacement[1])
-
-        # Phase 2 replace all unused tags.
-        msg = self.cleanup(msg)
-
-        return msg
+    replacements = {
+        TAG_BOLD: ('**', '**'),
+        TAG_ITALIC: ('*', '*'),
+        TAG_CODE: ('`', '`'),
+        TAG_PASS: (':green[', ']'),
+        TAG_FAIL: (':red[', ']'),
+        TAG_WARN: (':orange[', ']'),
+        TAG_SKIP: (':purple[', ']'),
+        TAG_EXPECTED: (':green[', ']'),
+        TAG_ACTUAL: (':green[', ']'),
+        TAG_RED: (':red[', ']'),
+        TAG_GREEN: (':green[', ']'),
+        TAG_BLUE: (':blue[', ']'),
+        TAG_YELLOW: (':yellow[', ']'),
+        TAG_ORANGE: (':orange[', ']'),
+        TAG_PURPLE: (':purple[', ']'),
+        TAG_BLACK: (':black[', ']'),
+        TAG_WHITE: (':white[', ']'),
+    }
 
 
 class BlickBasicHTMLRenderer(BlickRenderText):
     """HTML renderer"""
 
-    def render(self, msg):
-        """Basic markdown render method that converts tags to html"""
-
-        fmt = BlickMarkup()
-        replacements = {
-            TAG_BOLD: ('<b>', '</b>'),
-            TAG_ITALIC: ('<i>', '</i>'),
-            TAG_UNDERLINE: ('<u>', '</u>'),
-            TAG_STRIKETHROUGH: ('<s>', '</s>'),
-            TAG_CODE: ('<code>', '</code>'),
-            TAG_PASS: ('<span style="color:green">', '</span>'),
-            TAG_FAIL: ('<span style="color:red">', '</span>'),
-            TAG_WARN: ('<span style="color:orange">', '</span>'),
-            TAG_SKIP: ('<span style="color:purple">', '</span>'),
-            TAG_EXPECTED: ('<span style="color:green">', '</span>'),
-            TAG_ACTUAL: ('<span style="color:red">', '</span>'),
-            TAG_RED: ('<span style="color:red">', '</span>'),
-            TAG_GREEN: ('<span style="color:green">', '</span>'),
-            TAG_BLUE: ('<span style="color:blue">', '</span>'),
-            TAG_YELLOW: ('<span style="color:yellow">', '</span>'),
-            TAG_ORANGE: ('<span style="color:orange">', '</span>'),
-            TAG_PURPLE: ('<span style="color:purple">', '</span>'),
-            TAG_BLACK: ('<span style="color:black">', '</span>'),
-            TAG_WHITE: ('<span style="color:white">', '</span>'),
-        }
-
-        # Phase 1 replace all substitutions
-        for md, replacement in replacements.items():
-            open_tag = fmt.open_tag(md)
-            close_tag = fmt.close_tag(md)
-
-            msg = msg.replace(open_tag, replacement[0]).replace(close_tag, replacement[1])
-
-        # Phase 2 replace all unused tags.
-        msg = self.cleanup(msg)
-
-        return msg
+    replacements = {
+        TAG_BOLD: ('<b>', '</b>'),
+        TAG_ITALIC: ('<i>', '</i>'),
+        TAG_UNDERLINE: ('<u>', '</u>'),
+        TAG_STRIKETHROUGH: ('<s>', '</s>'),
+        TAG_CODE: ('<code>', '</code>'),
+        TAG_PASS: ('<span style="color:green">', '</span>'),
+        TAG_FAIL: ('<span style="color:red">', '</span>'),
+        TAG_WARN: ('<span style="color:orange">', '</span>'),
+        TAG_SKIP: ('<span style="color:purple">', '</span>'),
+        TAG_EXPECTED: ('<span style="color:green">', '</span>'),
+        TAG_ACTUAL: ('<span style="color:red">', '</span>'),
+        TAG_RED: ('<span style="color:red">', '</span>'),
+        TAG_GREEN: ('<span style="color:green">', '</span>'),
+        TAG_BLUE: ('<span style="color:blue">', '</span>'),
+        TAG_YELLOW: ('<span style="color:yellow">', '</span>'),
+        TAG_ORANGE: ('<span style="color:orange">', '</span>'),
+        TAG_PURPLE: ('<span style="color:purple">', '</span>'),
+        TAG_BLACK: ('<span style="color:black">', '</span>'),
+        TAG_WHITE: ('<span style="color:white">', '</span>'),
+    }
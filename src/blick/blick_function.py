@@ -4,15 +4,21 @@ deal of metadata is stored in the function and extracted from information about
 its signature, its generator status etc.  This information is used so users do not need to
 configure functions in multiple places.  Design elements from fastapi and pytest are obvious.
 """
+import asyncio
+import importlib
 import inspect
+import pathlib
 import re
+import sys
 import time
-import traceback
-from typing import Any, Generator
+import threading
+from types import ModuleType
+from typing import Any, AsyncGenerator, Generator
 
 from .blick_attribute import get_attribute
+from .blick_cache import DEFAULT_MEMORY_CACHE, BlickCache, args_fingerprint
 from .blick_exception import BlickException
-from .blick_result import BlickResult
+from .blick_result import BlickResult, BlickResultMeta
 
 
 def result_hook_fix_blank_msg(sfunc: "BlickFunction",
@@ -52,7 +58,78 @@ def result_hook_fix_blank_msg(sfunc: "BlickFunction",
 
 
 ATTRIBUTES = ("tag", "level", "phase", "weight", "skip", "ruid", "skip_on_none",
-              "fail_on_none", "ttl_minutes", "finish_on_fail")
+              "fail_on_none", "ttl_minutes", "finish_on_fail", "executor", "depends_on", "timeout",
+              "inputs", "interval")
+
+# Attributes the shared result meta record is made from, setting one of them drops the record
+_META_SOURCES = frozenset({"function_name", "module", "doc", "tag", "level", "phase", "ruid",
+                           "ttl_minutes", "skip_on_none", "fail_on_none"})
+
+
+def _import_function(module_name: str, qual_name: str, module_file: str):
+    """
+    Find a check function by name, importing its module if needed.
+
+    This is how a function gets rebuilt inside a worker process.  Modules land in
+    sys.modules so each worker only imports a check module once no matter how many
+    of its functions it is asked to run.
+    """
+    module = sys.modules.get(module_name)
+    if module is None:
+        module_dir = str(pathlib.Path(module_file).parent.resolve()) if module_file else ""
+        if module_dir and module_dir not in sys.path:
+            sys.path.insert(0, module_dir)
+        module = importlib.import_module(module_name)
+
+    obj = module
+    for name in qual_name.split("."):
+        obj = getattr(obj, name)
+    return module, obj
+
+
+# The watchdog (blick_runner) gives each watched call its own thread and puts an event here.  Once
+# the call times out the event is set, and the call must leave the cache alone.
+_call_state = threading.local()
+
+
+def _abandoned() -> bool:
+    """Was the call running on this thread given up on?"""
+    event = getattr(_call_state, "abandoned", None)
+    return event is not None and event.is_set()
+
+
+async def _acollect(results: AsyncGenerator[BlickResult, None]) -> list[BlickResult]:
+    """Gather everything from an async generator into a list."""
+    return [result async for result in results]
+
+
+def _run_coroutine(coro):
+    """
+    Run a coroutine to completion from synchronous code.
+
+    If this thread already has a running event loop (for example a sync checker run
+    started from an async FastAPI endpoint) asyncio.run is not allowed, so the
+    coroutine gets its own loop on a helper thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    box: dict[str, Any] = {}
+
+    def runner():
+        try:
+            box["value"] = asyncio.run(coro)
+        except BaseException as e:  # pylint: disable=broad-except
+            box["error"] = e
+
+    thread = threading.Thread(target=runner)
+    thread.start()
+    thread.join()
+    if "error" in box:
+        raise box["error"]
+    return box["value"]
 
 
 class BlickFunction:
@@ -78,16 +155,23 @@ class BlickFunction:
         - __call__(*args, **keywords): Calls the function and gathers result info.
         """
 
+    # Goes up whenever one of _META_SOURCES is set on any function, so an index of functions
+    # (the BlickCatalog) can tell cheaply whether it has to look at them again
+    attribute_changes = 0
+
     def __init__(self, function_: Any,
                  module: str = '',
                  allowed_exceptions: tuple[type[BaseException], ...] = None,  # So mypy understands types
                  env: dict[Any, Any] = None,
                  pre_sr_hooks: Any = None,
-                 post_sr_hooks: Any = None):
+                 post_sr_hooks: Any = None,
+                 cache: BlickCache | None = None):
         self.env = env or {}
         self.module = module
         self.function = function_
         self.is_generator = inspect.isgeneratorfunction(function_)
+        self.is_coroutine = inspect.iscoroutinefunction(function_)
+        self.is_async_generator = inspect.isasyncgenfunction(function_)
         self.function_name = function_.__name__
 
         # Using inspect gets the docstring without the python indent.
@@ -123,14 +207,28 @@ class BlickFunction:
         self.fail_on_none: bool = get_attribute(function_, "fail_on_none")
         self.ttl_minutes: float = get_attribute(function_, "ttl_minutes")
         self.finish_on_fail: bool = get_attribute(function_, "finish_on_fail")
+        self.executor: str = get_attribute(function_, "executor")
+        self.depends_on: tuple[str, ...] = get_attribute(function_, "depends_on")
+        self.timeout: float | None = get_attribute(function_, "timeout")
+        self.inputs: tuple[str, ...] = get_attribute(function_, "inputs")
+        self.interval: float = get_attribute(function_, "interval")
         self.index = get_attribute(function_, "index")
 
         # Support Time To Live using the return value of time.time.  Resolution of this
         # is on the order of 10e-6 depending on OS.  In my case this is WAY more than I
         # need, and I'm assuming you aren't building a trading system with this, so you don't
-        # care about microseconds.
-        self.last_ttl_start: float = 0.0  # this will be compared to time.time() for ttl caching
-        self.last_results: list[BlickResult] = []
+        # care about microseconds.  Results go to a memory cache shared by all functions
+        # unless a persistent cache is given.
+        self.cache: BlickCache = cache if cache is not None else DEFAULT_MEMORY_CACHE
+
+        # Cache key of the last call that was cached, last_results reads them back from the cache
+        self._last_key: str | None = None
+
+        # Function attributes shared by all the results of this function
+        self._result_meta: BlickResultMeta | None = None
+
+        # (env, args, meta, hooks) worked out by the plan of the current run, see bind_plan
+        self._bound: tuple | None = None
 
         if self.weight in [True, False, None]:
             raise BlickException("Boolean and none types are not allowed for weights.")
@@ -148,7 +246,68 @@ class BlickFunction:
     def __str__(self):
         return f"BlickFunction({self.function_name=})"
 
+    @property
+    def is_importable(self) -> bool:
+        """Can this function be found again by name from another process?"""
+        return "<locals>" not in self.function.__qualname__ and self.function.__module__ != "__main__"
+
+    def __getstate__(self):
+        """
+        Pickle support so a blick function can be sent to a worker process.
+
+        The function itself is sent by name and re-imported on the other side, and only the
+        part of the environment that this function uses is sent along.
+        """
+        if not self.is_importable:
+            raise BlickException(f"Function {self.function_name} must be defined at module level to "
+                                 "run in another process.")
+        state = self.__dict__.copy()
+        module = sys.modules.get(self.function.__module__)
+        state["function"] = (self.function.__module__,
+                             self.function.__qualname__,
+                             getattr(module, "__file__", "") or "")
+        state["module"] = self.module if not isinstance(self.module, ModuleType) else None
+        state["parameters"] = None
+        state["env"] = {name: self.env[name] for name in self.parameters if name in self.env}
+        state["_last_key"] = None
+        state["_bound"] = None
+        return state
+
+    def __setstate__(self, state):
+        module_name, qual_name, module_file = state["function"]
+        module, function_ = _import_function(module_name, qual_name, module_file)
+        self.__dict__.update(state)
+        self.function = function_
+        self.module = module if state["module"] is None else state["module"]
+        self.parameters = inspect.signature(function_).parameters
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in _META_SOURCES:
+            object.__setattr__(self, "_result_meta", None)
+            BlickFunction.attribute_changes += 1
+
+    def bind_plan(self, env, args, meta: BlickResultMeta, hooks: tuple) -> None:
+        """
+        Use the argument values, meta record and hooks worked out by a BlickPlan.
+
+        They are used for as long as the function runs with env, args may be the exception
+        raised while the arguments were looked up.
+        """
+        self._bound = (env, args, meta, hooks)
+
+    def _plan_for_env(self) -> tuple | None:
+        """What the plan worked out, if it was worked out for the current environment."""
+        bound = self._bound
+        return bound if bound is not None and bound[0] is self.env else None
+
     def _get_parameter_values(self):
+        bound = self._plan_for_env()
+        if bound is not None:
+            if isinstance(bound[1], BaseException):
+                raise bound[1]
+            return bound[1]
+
         args = []
         for param in self.parameters.values():
             if param.name in self.env:
@@ -158,10 +317,121 @@ class BlickFunction:
 
         return args
 
-    def _cache_result(self, result):
+    @property
+    def cache_key(self) -> str:
+        """
+        Key for the TTL cache, the ruid (if there is one) and the qualified function name.
+
+        Functions share the default cache, so the function name is always part of the key,
+        two functions with the same ruid must not get each other's results.  Closures also
+        get the id of the function object, since one function body can be wrapped many times
+        around different values.
+        """
+        key = f"{self.function.__module__}.{self.function.__qualname__}"
+        if getattr(self.function, "__closure__", None):
+            key += f"@{id(self.function):x}"
+        return f"{self.ruid}|{key}" if self.ruid else key
+
+    def _args_key(self, args) -> str | None:
+        """
+        Cache key for a call with these argument values, so new env values mean new results.
+        None when an argument can't be fingerprinted, the call is then not cached.
+        """
+        if not args:
+            return self.cache_key
+        fingerprint = args_fingerprint(args)
+        return f"{self.cache_key}#{fingerprint}" if fingerprint is not None else None
+
+    def _cache_result(self, kept: list[BlickResult], result):
         """Simple caching saves results if ttl_minutes is no 0"""
         if self.ttl_minutes:
-            self.last_results.append(result)
+            kept.append(result)
+
+    def _store_cache(self, key: str | None, kept: list[BlickResult], ttl_start: float):
+        """
+        Save the results of this call to the cache, they expire ttl_minutes after the call started.
+        A call that timed out is not cached, what it got through is not all of its results.
+        """
+        if self.ttl_minutes and key is not None and not _abandoned():
+            self.cache.put(key, kept, ttl_start + self.ttl_minutes * 60)
+            self._last_key = key
+
+    @property
+    def last_results(self) -> list[BlickResult]:
+        """
+        Results of the last call that was cached, while the cache still has them.  They are
+        only kept in the cache, so its limits hold for them too.
+        """
+        if self._last_key is None:
+            return []
+        return self.cache.get(self._last_key) or []
+
+    @property
+    def is_async(self) -> bool:
+        """Is this an async def function or async generator?"""
+        return self.is_coroutine or self.is_async_generator
+
+    def _none_arg_result(self, args) -> BlickResult | None:
+        """
+        If any arguments are None that is a bad thing.  That means that
+        a file could not be opened or other data is not available. If
+        Functions are not allowed to update the environment this only
+        needs to run once, rather than on every function call
+        """
+        for count, arg in enumerate([arg for arg in args if arg is None], start=1):
+
+            # Make a nice message if there is a ruid for this rule
+            ruid_msg = f'|{self.ruid}' if self.ruid else ''
+
+            if self.fail_on_none:
+                return BlickResult(status=False,
+                                   msg=f"Failed due to None arg. {count} in func='{self.function_name}'{ruid_msg}",
+                                   fail_on_none=True)
+            if self.skip_on_none:
+                return BlickResult(status=None, skipped=True,
+                                   msg=f"Skipped due to None arg. {count} in func='{self.function_name}{ruid_msg}'",
+                                   skip_on_none=True)
+        return None
+
+    def _cached_results(self, key: str | None) -> list[BlickResult] | None:
+        """If the results from an earlier call are still alive we can just yield them back"""
+        if not self.ttl_minutes or key is None:
+            return None
+        return self.cache.get(key)
+
+    def _returned_results(self, results) -> list[BlickResult]:
+        """Convert whatever a non-generator function returned into a list of results."""
+        if isinstance(results, BlickResult):
+            results = [results]
+
+        # TODO: I could not make a decorator work for this, so I just put it here.
+        #       Ideally the attribute decorator could see a non generator function
+        #       and wrap at creation rather than having this crap here.
+        elif isinstance(results, bool):
+            results = [BlickResult(status=results)]
+        if not isinstance(results[0], BlickResult):
+            raise BlickException(f"Invalid return from blick function {self.function_name}")
+        return results
+
+    @staticmethod
+    def _yielded_result(result) -> BlickResult:
+        """Convert a single yielded value into a result."""
+        if isinstance(result, bool):
+            result = BlickResult(status=result)
+        elif isinstance(result, list):
+            raise BlickException(
+                "Function yielded a list rather than a BlickResult or boolean"
+            )
+        return result
+
+    def _exception_result(self, e: BaseException, count: int) -> BlickResult:
+        """Generically handle exceptions here so we can keep running."""
+        result = BlickResult(status=False)
+        result = self.load_result(result, 0, 0, count)
+        result.except_ = e
+        mod_msg = "" if not self.module else f"{self.module}"
+        result.msg = f"Exception '{e}' occurred while running {mod_msg}.{self.function.__name__}"
+        return result
 
     def __call__(self, *args, **kwargs) -> Generator[BlickResult, None, None]:
         """Call the user provided function and collect information about the result.
@@ -172,6 +442,9 @@ class BlickFunction:
         manages the details that we'd prefer to handle in the core of the system
         rather than inside the check functions.
 
+        Async functions are run to completion on an event loop so this always works
+        from synchronous code.  Use acall to run them on an existing loop.
+
         Raises:
             BlickException: Exceptions are remapped to BlickExceptions for easier handling
 
@@ -181,98 +454,134 @@ class BlickFunction:
         Yields:
             Iterator[BlickResult]:
         """
+        if self.is_async:
+            yield from _run_coroutine(_acollect(self.acall(*args, **kwargs)))
+            return
+
         # Call the stored function and collect information about the result
         start_time: float = time.time()
 
-        # Function returns a generator that needs to be iterated over
-        args = self._get_parameter_values()
-
-        # If any arguments are None that is a bad thing.  That means that
-        # a file could not be opened or other data is not available. If
-        # Functions are not allowed to update the environment this only
-        # needs to run once, rather than on every function call
-        for count, arg in enumerate([arg for arg in args if arg is None], start=1):
-
-            # Make a nice message if there is a ruid for this rule
-            ruid_msg = f'|{self.ruid}' if self.ruid else ''
+        # Function returns a generator that needs to be iterated over.  Lazy env functions
+        # run while the parameters are looked up, so their failures fail this rule.
+        try:
+            args = self._get_parameter_values()
+        except self.allowed_exceptions as e:
+            yield self._exception_result(e, 1)
+            return
 
-            if self.fail_on_none:
-                yield BlickResult(status=False,
-                                  msg=f"Failed due to None arg. {count} in func='{self.function_name}'{ruid_msg}",
-                                  fail_on_none=True)
-                return
-            if self.skip_on_none:
-                yield BlickResult(status=None, skipped=True,
-                                  msg=f"Skipped due to None arg. {count} in func='{self.function_name}{ruid_msg}'",
-                                  skip_on_none=True)
-                return
+        none_result = self._none_arg_result(args)
+        if none_result:
+            yield none_result
+            return
 
         # It is possible for an exception to occur before the generator is created.
         # so we need a value to be set for count.
         count = 1
 
-        # If we need values from the result cache, then we can just yield them back
-        if self.ttl_minutes * 60 + self.last_ttl_start > time.time():
-            yield from self.last_results
+        cache_key = self._args_key(args) if self.ttl_minutes else ""
+        cached = self._cached_results(cache_key)
+        if cached is not None:
+            yield from cached
             return
 
+        kept: list[BlickResult] = []
+        ttl_start = start_time
         try:
-            self.last_results = []
-            self.last_ttl_start = start_time
-
             # This allows for returning a single result using return or
             # multiple results returning a list of results.
             if not self.is_generator:
                 # If the function is not a generator, then just call it
-                results = self.function(*args)
+                results = self._returned_results(self.function(*args))
                 end_time = time.time()
-                if isinstance(results, BlickResult):
-                    results = [results]
-
-                # TODO: I could not make a decorator work for this, so I just put it here.
-                #       Ideally the attribute decorator could see a non generator function
-                #       and wrap at creation rather than having this crap here.
-                elif isinstance(results, bool):
-                    results = [BlickResult(status=results)]
-                if not isinstance(results[0], BlickResult):
-                    raise BlickException(f"Invalid return from blick function {self.function_name}")
                 for count, r in enumerate(results, start=1):
                     # TODO: Time is wrong here, we should estimate each part taking
                     #       1/count of the total time
                     r = self.load_result(r, start_time, end_time, count=1)
                     yield r
 
-                    self._cache_result(r)
+                    self._cache_result(kept, r)
 
             else:
                 # Functions can return multiple results, track them with a count attribute.
                 for count, result in enumerate(self.function(*args, **kwargs), start=1):
                     end_time = time.time()
 
-                    if isinstance(result, bool):
-                        result = BlickResult(status=result)
-                    elif isinstance(result, list):
-                        raise BlickException(
-                            "Function yielded a list rather than a BlickResult or boolean"
-                        )
+                    result = self._yielded_result(result)
 
                     result = self.load_result(result, start_time, end_time, count)
 
                     yield result
 
-                    self._cache_result(result)
+                    self._cache_result(kept, result)
 
                     start_time = time.time()
 
         except self.allowed_exceptions as e:
-            # Generically handle exceptions here so we can keep running.
-            result = BlickResult(status=False)
-            result = self.load_result(result, 0, 0, count)
-            result.except_ = e
-            result.traceback = traceback.format_exc()
-            mod_msg = "" if not self.module else f"{self.module}"
-            result.msg = f"Exception '{e}' occurred while running {mod_msg}.{self.function.__name__}"
-            yield result
+            yield self._exception_result(e, count)
+
+        finally:
+            self._store_cache(cache_key, kept, ttl_start)
+
+    async def acall(self, *args, **kwargs) -> AsyncGenerator[BlickResult, None]:
+        """
+        Async version of __call__ for use on an event loop.
+
+        Async functions and async generators are awaited on the running loop.  Plain
+        functions are just run, so callers that care about blocking the loop should send
+        those to a thread instead.
+        """
+        if not self.is_async:
+            for result in self(*args, **kwargs):
+                yield result
+            return
+
+        start_time: float = time.time()
+        try:
+            args = self._get_parameter_values()
+        except self.allowed_exceptions as e:
+            yield self._exception_result(e, 1)
+            return
+
+        none_result = self._none_arg_result(args)
+        if none_result:
+            yield none_result
+            return
+
+        count = 1
+
+        cache_key = self._args_key(args) if self.ttl_minutes else ""
+        cached = self._cached_results(cache_key)
+        if cached is not None:
+            for result in cached:
+                yield result
+            return
+
+        kept: list[BlickResult] = []
+        ttl_start = start_time
+        try:
+
+            if self.is_coroutine:
+                results = self._returned_results(await self.function(*args))
+                end_time = time.time()
+                for count, r in enumerate(results, start=1):
+                    r = self.load_result(r, start_time, end_time, count=1)
+                    yield r
+                    self._cache_result(kept, r)
+            else:
+                count = 0
+                async for result in self.function(*args, **kwargs):
+                    count += 1
+                    end_time = time.time()
+                    result = self.load_result(self._yielded_result(result), start_time, end_time, count)
+                    yield result
+                    self._cache_result(kept, result)
+                    start_time = time.time()
+
+        except self.allowed_exceptions as e:
+            yield self._exception_result(e, max(count, 1))
+
+        finally:
+            self._store_cache(cache_key, kept, ttl_start)
 
     def _get_section(self, header="", text=None):
         """
@@ -309,6 +618,30 @@ class BlickFunction:
         # If the header wasn't found, return the text before the first header
         return ""
 
+    def result_meta(self) -> BlickResultMeta:
+        """
+        The record of function attributes every result of this function shares.
+
+        It is made once, attributes like the ruid can be changed after the function is made
+        (auto ruids, rc files), so setting any of them drops it and the next result makes it
+        again (see __setattr__).
+        """
+        if self._result_meta is not None:
+            return self._result_meta
+        # Use getattr to avoid repeating the same pattern of checking if self.module exists
+        self._result_meta = BlickResultMeta(func_name=self.function_name,
+                               pkg_name=getattr(self.module, "__package__", ""),
+                               module_name=getattr(self.module, "__name__", ""),
+                               doc=self.doc,
+                               tag=self.tag,
+                               level=self.level,
+                               phase=self.phase,
+                               ruid=self.ruid,
+                               ttl_minutes=self.ttl_minutes,
+                               skip_on_none=self.skip_on_none,
+                               fail_on_none=self.fail_on_none)
+        return self._result_meta
+
     def load_result(self, result: BlickResult, start_time, end_time, count=1):
         """
         Provide a bunch of metadata about the function call, mostly hoisting
@@ -318,26 +651,18 @@ class BlickFunction:
         1 possible hierarchy.  Tall-skinny data that can be transformed into wide or
         hierarchical.
         """
-        # Use getattr to avoid repeating the same pattern of checking if self.module exists
-        result.pkg_name = getattr(self.module, "__package__", "")
-        result.module_name = getattr(self.module, "__name__", "")
-
-        # Assign the rest of the attributes directly
-        result.ruid = self.ruid
-        result.func_name = self.function_name
-        result.doc = self.doc
-        result.tag = self.tag
-        result.level = self.level
-        result.phase = self.phase
+        # Every result of the function shares one record of its attributes, during a run
+        # it was made when the plan was bound.
+        bound = self._plan_for_env()
+        if bound is not None:
+            result.meta, hooks = bound[2], bound[3]
+        else:
+            result.meta, hooks = self.result_meta(), self.result_hooks
         result.runtime_sec = end_time - start_time
-        result.ttl_minutes = self.ttl_minutes
         result.count = count
 
-        result.fail_on_none = self.fail_on_none
-        result.skip_on_none = self.skip_on_none
-
         # Apply all (usually 1 or 0) hooks to the result
-        for hook in self.result_hooks:
+        for hook in hooks:
             if result is not None:
                 result = hook(self, result)
 
@@ -0,0 +1,99 @@
+"""
+Keep track of how rules behaved on earlier runs.
+
+After a run the results are folded into a small JSON stats file holding the runtime
+and pass/fail record for each rule.  The next run can use those stats to decide what
+order to run rules in (see blick_order.py).
+
+Rules are keyed by ruid.  Rules without a ruid fall back to module.function, which
+works fine until someone renames something, one more reason to use ruids.
+"""
+import json
+import pathlib
+from typing import Iterable
+
+from .blick_exception import BlickException
+from .blick_function import BlickFunction
+from .blick_result import BlickResult
+from .blick_util import write_json_atomic
+
+DEFAULT_HISTORY_FILE = ".blick_history.json"
+
+# How much the latest runtime counts against the older ones.
+RUNTIME_SMOOTHING = 0.3
+
+
+def function_key(function_: BlickFunction) -> str:
+    """The key used to look up a function in the history."""
+    return function_.ruid or f"{getattr(function_.module, '__name__', '')}.{function_.function_name}"
+
+
+def result_key(result: BlickResult) -> str:
+    """The key used to store a result in the history, matches function_key."""
+    return result.ruid or f"{result.module_name}.{result.func_name}"
+
+
+class BlickHistory:
+    """
+    Runtime and pass/fail stats per rule, loaded from and saved to a local file.
+
+    history = BlickHistory.load(".blick_history.json")
+    checker.prepare(order_strategy=OrderLongestFirst(history))
+    results = checker.run_all()
+    history.update(results)
+    history.save()
+    """
+
+    def __init__(self, path: str | pathlib.Path | None = None, stats: dict[str, dict] | None = None):
+        self.path = pathlib.Path(path or DEFAULT_HISTORY_FILE)
+        self.stats: dict[str, dict] = stats or {}
+
+    @classmethod
+    def load(cls, path: str | pathlib.Path | None = None) -> "BlickHistory":
+        """Load the history file.  A missing file is just an empty history."""
+        path = pathlib.Path(path or DEFAULT_HISTORY_FILE)
+        if not path.exists():
+            return cls(path)
+        try:
+            stats = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            raise BlickException(f"Could not read history file {path}: {e}") from e
+        if not isinstance(stats, dict):
+            raise BlickException(f"History file {path} does not hold a dictionary of rule stats.")
+        return cls(path, stats)
+
+    def save(self, path: str | pathlib.Path | None = None):
+        """Write the history file."""
+        write_json_atomic(path or self.path, self.stats, indent=2)
+
+    def update(self, results: Iterable[BlickResult]):
+        """
+        Fold the results of a run into the stats.
+
+        A rule's runtime is the total over all its results and it failed if any of them
+        failed.  Rules that were skipped entirely don't tell us anything and are ignored.
+        """
+        runs: dict[str, dict] = {}
+        for result in results:
+            if result.skipped:
+                continue
+            run = runs.setdefault(result_key(result), {"runtime_sec": 0.0, "failed": False})
+            run["runtime_sec"] += result.runtime_sec
+            run["failed"] |= result.status is False
+
+        for key, run in runs.items():
+            stat = self.stats.setdefault(key, {"runs": 0, "fails": 0, "runtime_sec": run["runtime_sec"]})
+            stat["runs"] += 1
+            stat["fails"] += int(run["failed"])
+            stat["runtime_sec"] += RUNTIME_SMOOTHING * (run["runtime_sec"] - stat["runtime_sec"])
+            stat["last_status"] = not run["failed"]
+
+    def runtime(self, function_: BlickFunction) -> float | None:
+        """Typical runtime of a rule in seconds, None if it has never been run."""
+        stat = self.stats.get(function_key(function_))
+        return stat["runtime_sec"] if stat else None
+
+    def fail_rate(self, function_: BlickFunction) -> float | None:
+        """Fraction of runs where the rule failed, None if it has never been run."""
+        stat = self.stats.get(function_key(function_))
+        return stat["fails"] / stat["runs"] if stat and stat["runs"] else None
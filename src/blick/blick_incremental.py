@@ -0,0 +1,154 @@
+"""
+Incremental runs, only re-run rules whose inputs changed.
+
+A rule can declare the files it looks at with @attributes(inputs=...).  After each
+run the state file records a fingerprint of those files (size and modification time,
+plus a content hash if asked for) along with the rule's results.  On the next run a
+rule whose fingerprint hasn't changed is not run, its old results are replayed with
+replayed=True instead.
+
+The fingerprint also covers the source of the rule itself, so editing a rule makes
+it run again.  Rules without inputs always run, as do rules that raised exceptions or
+ran out of time last time since those are usually worth another try.
+"""
+import glob
+import hashlib
+import inspect
+import json
+import os
+import pathlib
+from typing import Any, Sequence
+
+from .blick_exception import BlickException
+from .blick_function import BlickFunction
+from .blick_history import function_key
+from .blick_result import BlickResult
+from .blick_util import write_json_atomic
+
+DEFAULT_INCREMENTAL_FILE = ".blick_incremental.json"
+
+# Hash files in chunks so big files don't need to fit in memory
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _code_hash(function_: BlickFunction) -> str:
+    """Hash of the rule's source, falling back to the bytecode for functions without source."""
+    try:
+        code = inspect.getsource(function_.function).encode()
+    except (OSError, TypeError):
+        code = getattr(function_.function, "__code__", None)
+        code = code.co_code if code else function_.function_name.encode()
+    return hashlib.sha256(code).hexdigest()
+
+
+def fingerprint_inputs(inputs: Sequence[str], hash_contents: bool = False) -> dict[str, Any]:
+    """
+    Fingerprint the files matching a list of paths and glob patterns.
+
+    Every matching file is recorded with its size and mtime (and a sha256 if hash_contents
+    is set).  Patterns that match nothing are recorded too, so a file showing up later
+    counts as a change.
+    """
+    files: dict[str, Any] = {}
+    for pattern in inputs:
+        matches = sorted(glob.glob(pattern, recursive=True))
+        if not matches:
+            files[pattern] = None
+        for match in matches:
+            if os.path.isdir(match):
+                continue
+            stat = os.stat(match)
+            files[match] = [stat.st_size, stat.st_mtime_ns]
+            if hash_contents:
+                files[match].append(_file_hash(match))
+    return files
+
+
+class BlickIncremental:
+    """
+    State for incremental runs, loaded from and saved to a local file.
+
+    incremental = BlickIncremental.load(".blick_incremental.json")
+    checker = BlickChecker(packages=..., incremental=incremental, auto_setup=True)
+    checker.run_all()   # The state file is saved at the end of the run
+    """
+
+    def __init__(self,
+                 path: str | pathlib.Path | None = None,
+                 hash_contents: bool = False,
+                 state: dict[str, dict] | None = None):
+        self.path = pathlib.Path(path or DEFAULT_INCREMENTAL_FILE)
+        self.hash_contents = hash_contents
+        self.state: dict[str, dict] = state or {}
+
+        # Fingerprints taken at the start of this run, saved with the results when they arrive
+        self._fingerprints: dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, path: str | pathlib.Path | None = None, hash_contents: bool = False) -> "BlickIncremental":
+        """Load the state file.  A missing file means everything runs."""
+        path = pathlib.Path(path or DEFAULT_INCREMENTAL_FILE)
+        if not path.exists():
+            return cls(path, hash_contents)
+        try:
+            state = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            raise BlickException(f"Could not read incremental state file {path}: {e}") from e
+        if not isinstance(state, dict):
+            raise BlickException(f"Incremental state file {path} does not hold a dictionary.")
+        return cls(path, hash_contents, state)
+
+    def save(self, path: str | pathlib.Path | None = None):
+        """Write the state file."""
+        write_json_atomic(path or self.path, self.state, default=str)
+
+    def fingerprint(self, function_: BlickFunction) -> dict[str, Any]:
+        """Fingerprint of the rule and everything it says it reads."""
+        return {"code": _code_hash(function_),
+                "hashed": self.hash_contents,
+                "inputs": fingerprint_inputs(function_.inputs, self.hash_contents)}
+
+    def replay(self, function_: BlickFunction) -> list[BlickResult] | None:
+        """
+        Results from the last run if nothing the rule depends on has changed, else None.
+
+        The fingerprint taken here is the one saved with the new results, so a file that
+        changes while the rule is running will be picked up next time.
+        """
+        if not function_.inputs:
+            return None
+
+        key = function_key(function_)
+        fingerprint = self.fingerprint(function_)
+        self._fingerprints[key] = fingerprint
+
+        previous = self.state.get(key)
+        if not previous or previous["fingerprint"] != fingerprint:
+            return None
+
+        results = [BlickResult.from_dict(d) for d in previous["results"]]
+        for result in results:
+            result.replayed = True
+        return results
+
+    def record(self, function_: BlickFunction, results: Sequence[BlickResult]):
+        """Save the results of a rule that just ran along with the fingerprint taken before it ran."""
+        key = function_key(function_)
+        fingerprint = self._fingerprints.pop(key, None)
+        if fingerprint is None or not results or any(r.replayed for r in results):
+            return
+
+        if any(r.except_ or r.timed_out for r in results):
+            self.state.pop(key, None)
+            return
+
+        self.state[key] = {"fingerprint": fingerprint,
+                           "results": [r.as_dict() for r in results]}
@@ -34,6 +34,9 @@ class BlickModule:
         self.module_name: str = module_name
         self.check_functions: list[BlickFunction] = []
         self.env_functions: list = env_functions or []
+
+        # Values of "module" scope env functions, kept between runs
+        self.env_fixtures: dict = {}
         self.module = None
         self.module_file: str = module_file
         self.check_prefix: str = check_prefix
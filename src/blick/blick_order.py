@@ -0,0 +1,93 @@
+"""
+Strategies for the order rules are run in.
+
+The default is file order, rules run in the order they were found.  The other
+strategies use the stats from earlier runs (see blick_history.py):
+
+- Longest first gets the slow rules started early so a parallel run isn't left
+  waiting on one long rule at the end.
+- Fail first runs the rules that usually fail early so abort_on_fail gives an
+  answer sooner.
+
+Rules with no history are put first since nothing is known about them and new
+rules are the ones most likely to be slow or broken.
+
+Whatever the strategy, rules are still run after the rules they depend on.
+"""
+
+import abc
+from typing import Sequence
+
+from .blick_exception import BlickException
+from .blick_function import BlickFunction
+from .blick_history import BlickHistory
+
+
+class OrderStrategy(abc.ABC):
+    """
+    A strategy for ordering the collected functions.  Like score strategies these can
+    be made from code (by providing a class) or by name (from a file or command line).
+    """
+
+    strategy_name: str | None = None
+
+    def __init__(self, history: BlickHistory | None = None):
+        self.history = history or BlickHistory()
+
+    @abc.abstractmethod
+    def order(self, functions: Sequence[BlickFunction]) -> list[BlickFunction]:  # pragma: no cover
+        """Abstract order method"""
+
+    def __call__(self, functions: Sequence[BlickFunction]) -> list[BlickFunction]:
+        return self.order(functions)
+
+    @classmethod
+    def strategy_factory(cls, strategy_name_or_class, history: BlickHistory | None = None) -> "OrderStrategy":
+        """Make a strategy object from a name or class."""
+        if isinstance(strategy_name_or_class, str):
+            for subclass in cls.__subclasses__():
+                if strategy_name_or_class in (subclass.strategy_name, subclass.__name__):
+                    return subclass(history)
+            raise BlickException(
+                f"No order strategy with name '{strategy_name_or_class}' found."
+            )
+        if isinstance(strategy_name_or_class, type) and issubclass(strategy_name_or_class, cls):
+            return strategy_name_or_class(history)
+        raise BlickException(
+            "Argument must be a strategy name or an OrderStrategy subclass.")
+
+
+class OrderByFile(OrderStrategy):
+    """Run rules in the order they were found, this is the default."""
+
+    strategy_name = "file_order"
+
+    def order(self, functions: Sequence[BlickFunction]) -> list[BlickFunction]:
+        return list(functions)
+
+
+class OrderLongestFirst(OrderStrategy):
+    """Run the rules that historically took the longest first."""
+
+    strategy_name = "longest_first"
+
+    def order(self, functions: Sequence[BlickFunction]) -> list[BlickFunction]:
+        def key(function_):
+            runtime = self.history.runtime(function_)
+            return (runtime is not None, -(runtime or 0.0))
+
+        # sorted is stable so ties stay in file order
+        return sorted(functions, key=key)
+
+
+class OrderFailFirst(OrderStrategy):
+    """Run the rules that historically failed most often first."""
+
+    strategy_name = "fail_first"
+
+    def order(self, functions: Sequence[BlickFunction]) -> list[BlickFunction]:
+        def key(function_):
+            fail_rate = self.history.fail_rate(function_)
+            return (fail_rate is not None, -(fail_rate or 0.0))
+
+        return sorted(functions, key=key)
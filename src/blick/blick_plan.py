@@ -0,0 +1,103 @@
+"""
+The compiled plan of a run.
+
+Calling a BlickFunction on its own works everything out on every call: which parameters
+come from the environment, the record of attributes its results share, its result hooks.
+That is fine for one call, but in a run with many rules (or rules with many results) it is
+framework overhead paid over and over for answers that don't change during the run.
+
+prepare() compiles the collected functions into a BlickPlan, one frozen BlickPlanStep per
+function with everything worked out up front:
+
+- the parameter names and defaults, so binding the arguments is a tuple build
+- the BlickResultMeta record every result of the function shares
+- the result hooks
+
+At the start of each run the plan binds the argument tuple of every step to the
+environment and hands each function its step.  The run itself then does no reflection.
+A function called outside a run (or after its environment was replaced) works things out
+for itself as it always has.
+"""
+import inspect
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping, Sequence
+
+from .blick_function import BlickFunction
+from .blick_result import BlickResultMeta
+
+# Marks a parameter without a default
+_REQUIRED = inspect.Parameter.empty
+
+
+@dataclass(frozen=True, slots=True)
+class BlickPlanStep:
+    """Everything a run needs to know about one function, worked out once."""
+
+    function: BlickFunction
+    meta: BlickResultMeta
+    arg_names: tuple[str, ...]
+    arg_defaults: tuple[Any, ...]
+    hooks: tuple[Callable, ...]
+
+    @classmethod
+    def compile(cls, function_: BlickFunction) -> "BlickPlanStep":
+        parameters = function_.parameters.values()
+        return cls(function=function_,
+                   meta=function_.result_meta(),
+                   arg_names=tuple(p.name for p in parameters),
+                   arg_defaults=tuple(p.default for p in parameters),
+                   hooks=tuple(function_.result_hooks))
+
+    def matches(self, function_: BlickFunction) -> bool:
+        """Is this still the step for function_?  Attributes like the ruid can change after prepare."""
+        return (self.function is function_ and
+                self.meta is function_.result_meta() and
+                self.hooks == tuple(function_.result_hooks))
+
+    def arguments(self, env: Mapping[str, Any]) -> tuple:
+        """The argument values from env, same rules as BlickFunction._get_parameter_values."""
+        args = []
+        for name, default in zip(self.arg_names, self.arg_defaults):
+            if name in env:
+                args.append(env[name])
+            elif default is not _REQUIRED:
+                args.append(default)
+        return tuple(args)
+
+    def bind(self, env: Mapping[str, Any]) -> None:
+        """
+        Hand the function its arguments, meta record and hooks for this run.
+
+        A lazy env function that fails with one of the function's allowed_exceptions is
+        reported by the function when it runs, like it is without a plan.  Anything else
+        isn't the function's to handle and is raised here.
+        """
+        try:
+            args: tuple | BaseException = self.arguments(env)
+        except self.function.allowed_exceptions as e:
+            args = e
+        self.function.bind_plan(env, args, self.meta, self.hooks)
+
+
+@dataclass(frozen=True, slots=True)
+class BlickPlan:
+    """The compiled steps of the collected functions, in run order."""
+
+    steps: tuple[BlickPlanStep, ...]
+
+    @classmethod
+    def compile(cls, functions: Sequence[BlickFunction]) -> "BlickPlan":
+        return cls(tuple(BlickPlanStep.compile(f) for f in functions))
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def matches(self, functions: Sequence[BlickFunction]) -> bool:
+        """Was the plan compiled for exactly these functions, in this order, as they are now?"""
+        return len(functions) == len(self.steps) and \
+            all(step.matches(f) for step, f in zip(self.steps, functions))
+
+    def bind(self, env: Mapping[str, Any]) -> None:
+        """Bind every step to the environment of a run."""
+        for step in self.steps:
+            step.bind(env)
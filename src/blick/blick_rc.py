@@ -6,6 +6,39 @@ from typing import Sequence
 
 from .blick_exception import BlickException
 
+# The attributes an RC file selects on, in the order of does_match's arguments
+RC_ATTRIBUTES = ("ruid", "tag", "phase", "level")
+
+
+class _Matcher:
+    """
+    Any-of-a-list-of-patterns full match, compiled once.
+
+    The patterns are joined into one alternation so each value is matched with a single
+    regex call.  Patterns with groups are kept apart since joining them would renumber
+    their backreferences, and so are patterns that don't compile once joined (inline
+    global flags like (?i) must start the whole expression).
+    """
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        try:
+            compiled = [re.compile(pattern) for pattern in self.patterns]
+        except re.error as e:
+            raise BlickException(f"Invalid pattern in RC file: {e}") from e
+        if compiled and not any(c.groups for c in compiled):
+            try:
+                compiled = [re.compile("|".join(f"(?:{pattern})" for pattern in self.patterns))]
+            except re.error:
+                pass
+        self._compiled = compiled
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def __call__(self, value: str) -> bool:
+        return any(c.fullmatch(value) for c in self._compiled)
+
 
 class BlickRC:
     """
@@ -43,6 +76,11 @@ class BlickRC:
         self.levels: Sequence[int] = []
         self.ex_levels: Sequence[int] = []
 
+        # Compiled matchers and remembered verdicts, made by expand_attributes
+        self._include: dict[str, _Matcher] = {}
+        self._exclude: dict[str, _Matcher] = {}
+        self._verdicts: dict[str, dict[str, bool]] = {}
+
         self.expand_attributes(rc_data)
         self.name = rc_data['display_name']
 
@@ -110,6 +148,47 @@ class BlickRC:
         self.tags, self.ex_tags = self._separate_values(rc_data.get('tags', []))
         self.phases, self.ex_phases = self._separate_values(rc_data.get('phases', []))
         self.levels, self.ex_levels = self._separate_values(rc_data.get('levels', []))
+        self._compile()
+
+    def _compile(self):
+        """
+        Compile the patterns of each attribute into one include and one exclude matcher.
+
+        Rules share a handful of tags, phases and levels, so the verdict for each value of
+        each attribute is also remembered.
+        """
+        self._include = {"ruid": _Matcher(self.ruids), "tag": _Matcher(self.tags),
+                         "phase": _Matcher(self.phases), "level": _Matcher(self.levels)}
+        self._exclude = {"ruid": _Matcher(self.ex_ruids), "tag": _Matcher(self.ex_tags),
+                         "phase": _Matcher(self.ex_phases), "level": _Matcher(self.ex_levels)}
+        self._verdicts = {attribute: {} for attribute in RC_ATTRIBUTES}
+
+    def _allows(self, attribute: str, value: str) -> bool:
+        """Does one attribute value pass the RC file?  Empty values always do."""
+        verdicts = self._verdicts[attribute]
+        verdict = verdicts.get(value)
+        if verdict is None:
+            include, exclude = self._include[attribute], self._exclude[attribute]
+            verdict = not value or (
+                (self.is_inclusion_list_empty or not include or include(value)) and not exclude(value))
+            verdicts[value] = verdict
+        return verdict
+
+    def matching(self, catalog) -> set[int]:
+        """
+        Positions of the functions in a BlickCatalog that pass the RC file.
+
+        Each distinct value of each attribute is checked once and the functions having it
+        are taken out with one set difference, rather than checking every function.
+        """
+        rejected: set[int] = set()
+        for attribute in RC_ATTRIBUTES:
+            if not self._include[attribute] and not self._exclude[attribute]:
+                continue
+            for value, positions in catalog.groups(attribute):
+                if not self._allows(attribute, str(value) if attribute == "level" else value):
+                    rejected |= positions
+        return catalog.all() - rejected
 
     def does_match(self, ruid: str = "", tag: str = "", phase: str = "", level: str = "") -> bool:
         """
@@ -132,29 +211,6 @@ class BlickRC:
         # This is sort of a hack levels must be integers, this makes any non integer level not match
         level = str(level)
 
-        # This is a bit problematic because levels are ints not strs
-        patterns: list[tuple[Sequence[str], str]] = [(self.ruids, ruid),
-                                            (self.tags, tag),
-                                            (self.levels, level),
-                                            (self.phases, phase)]
-        ex_patterns: list[tuple[Sequence[str], str]] = [(self.ex_ruids, ruid),
-                                               (self.ex_tags, tag),
-                                               (self.ex_levels, level),
-                                               (self.ex_phases, phase)]
-
-        # Check if any of the inputs match an inclusion pattern
-        if not self.is_inclusion_list_empty:
-            for pattern_list, attribute in patterns:
-                if not attribute:
-                    continue
-                if pattern_list and not any(re.fullmatch(pat, attribute) for pat in pattern_list):
-                    return False
-
-        # Check if any of the inputs match an exclusion pattern
-        for ex_pattern_list, attribute in ex_patterns:
-            if not attribute:
-                continue
-            if any(re.fullmatch(exclusion, attribute) for exclusion in ex_pattern_list):
-                return False
-
-        return True
+        # Every attribute must match an inclusion pattern (if there are any) and no exclusion pattern
+        return (self._allows("ruid", ruid) and self._allows("tag", tag) and
+                self._allows("level", level) and self._allows("phase", phase))
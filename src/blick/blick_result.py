@@ -1,9 +1,9 @@
 """ This module contains the BlickResult class and some common result transformers. """
 
 import itertools
-import traceback
+import traceback as _traceback
 from collections import Counter
-from dataclasses import asdict, dataclass, field
+from dataclasses import dataclass, fields, replace
 from functools import wraps
 from operator import attrgetter
 from typing import Any, Generator, Sequence
@@ -12,17 +12,78 @@ from .blick_exception import BlickException
 from .blick_format import BlickMarkup
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class BlickResultMeta:
+    """
+    What a result knows about the function that made it.
+
+    Every result from a function shares one of these rather than carrying its own copy
+    of the docstring, tag and so on, which matters for rules that yield 100k results.
+    It is immutable, setting one of these attributes on a result gives that result a new
+    record and leaves the others alone.
+    """
+    func_name: str = ""
+    pkg_name: str = ""
+    module_name: str = ""
+    doc: str = ""
+    tag: str = ""
+    level: int = 1
+    phase: str = ""
+    ruid: str = ""
+    ttl_minutes: float = 0.0
+    skip_on_none: bool = False
+    fail_on_none: bool = False
+
+
+META_FIELDS = tuple(f.name for f in fields(BlickResultMeta))
+EMPTY_META = BlickResultMeta()
+
+# Every field of a result in the order they have always been in (init, repr and as_dict)
+RESULT_FIELDS = ("status", "func_name", "pkg_name", "module_name", "msg", "info_msg", "warn_msg", "doc",
+                 "runtime_sec", "except_", "traceback", "skipped", "weight", "tag", "level", "phase", "count",
+                 "ruid", "ttl_minutes", "mit_msg", "owner_list", "skip_on_none", "fail_on_none",
+                 "summary_result", "timed_out", "replayed")
+
+
+def _meta_property(name: str) -> property:
+    """An attribute of a result that lives in its shared BlickResultMeta."""
+
+    def get(self):
+        return getattr(self.meta, name)
+
+    def set_(self, value):
+        self.meta = replace(self.meta, **{name: value})
+
+    return property(get, set_)
+
+
+def _drop_frames(except_: BaseException):
+    """Let an exception, and the ones it was raised from or while handling, go of their frames."""
+    seen: set[int] = set()
+    pending = [except_]
+    while pending:
+        exception = pending.pop()
+        if exception is None or id(exception) in seen:
+            continue
+        seen.add(id(exception))
+        exception.__traceback__ = None
+        pending += [exception.__cause__, exception.__context__]
+
+
 class BlickResult:
     """
     Return value of a BlickFunction.
 
-    This dataclass tracks the status of a BlickFunction. It includes data relating to the function
+    This class tracks the status of a BlickFunction. It includes data relating to the function
     call, such as the status, module name, function name, message, additional info, warning message,
     docstring, runtime, exceptions, traceback, skip flag, tag, level, and count.
 
     This data can be used for reporting purposes.
 
+    Results use slots, and the attributes that come from the function (names, doc, tag,
+    level, phase, ruid...) live in a BlickResultMeta shared by all the results of a
+    function.  They are read and set like any other attribute.
+
     Attributes:
         status (bool): Check status. Default is False.
         module_name (str): Module name. Default is "".
@@ -35,70 +96,220 @@ class BlickResult:
         except_ (Exception): Raised exception, if any. Default is None.
         traceback (str): Exception traceback, if any. Default is "".
         skipped (bool): Function skip flag. Default is False.
+        timed_out (bool): The function was stopped by a timeout or the run deadline. Default is False.
+        replayed (bool): The result was copied from an earlier run because the inputs of
+                         the function did not change. Default is False.
         tag (str): Function tag. Default is "".
         level (int): Function level. Default is 1.
         count (int): Return value count from a BlickFunction.
+        meta (BlickResultMeta): The shared function attributes.
         """
 
-    status: bool | None = False
+    __slots__ = ("status", "msg", "info_msg", "warn_msg", "_msg_rendered", "_renderer", "runtime_sec",
+                 "_except", "_traceback", "skipped", "weight", "count", "mit_msg", "_owner_list",
+                 "summary_result", "timed_out", "replayed", "meta")
 
-    # Name hierarchy
-    func_name: str = ""
-    pkg_name: str = ""
-    module_name: str = ""
+    # Results hold a list and aren't hashable, just like the dataclass they used to be
+    __hash__ = None  # type: ignore[assignment]
 
-    # Msg Hierarchy
-    msg: str = ""
-    info_msg: str = ""
-    warn_msg: str = ""
+    mu = BlickMarkup()
 
-    msg_rendered = ""
+    # Name hierarchy
+    func_name = _meta_property("func_name")
+    pkg_name = _meta_property("pkg_name")
+    module_name = _meta_property("module_name")
 
     # Function Info
-    doc: str = ""
+    doc = _meta_property("doc")
 
-    # Timing Info
-    runtime_sec: float = 0.0
+    # Attribute Info
+    tag = _meta_property("tag")
+    level = _meta_property("level")
+    phase = _meta_property("phase")
+    ruid = _meta_property("ruid")
+    ttl_minutes = _meta_property("ttl_minutes")
 
-    # Error Info
-    except_: Exception | None = None
-    traceback: str = ""
-    skipped: bool = False
+    # Bad parameters
+    skip_on_none = _meta_property("skip_on_none")
+    fail_on_none = _meta_property("fail_on_none")
+
+    def __init__(self,
+                 status: bool | None = False,
+                 func_name: str = "",
+                 pkg_name: str = "",
+                 module_name: str = "",
+                 msg: str = "",
+                 info_msg: str = "",
+                 warn_msg: str = "",
+                 doc: str = "",
+                 runtime_sec: float = 0.0,
+                 except_: Exception | None = None,
+                 traceback: str = "",
+                 skipped: bool = False,
+                 weight: float = 100.0,
+                 tag: str = "",
+                 level: int = 1,
+                 phase: str = "",
+                 count: int = 0,
+                 ruid: str = "",
+                 ttl_minutes: float = 0.0,
+                 mit_msg: str = "",
+                 owner_list: list[str] | None = None,
+                 skip_on_none: bool = False,
+                 fail_on_none: bool = False,
+                 summary_result: bool = False,
+                 timed_out: bool = False,
+                 replayed: bool = False,
+                 meta: BlickResultMeta | None = None):
+        self.status = status
+
+        # Msg Hierarchy
+        self.msg = msg
+        self.info_msg = info_msg
+        self.warn_msg = warn_msg
+
+        # Rendered the first time someone reads msg_rendered
+        self._msg_rendered: str | None = None
+        self._renderer = None
+
+        # Timing Info
+        self.runtime_sec = runtime_sec
+
+        # Error Info
+        self._traceback: str | _traceback.TracebackException = traceback
+        self.except_ = except_
+        self.skipped = skipped
+
+        self.weight = weight
+        self.count = count
+
+        # Mitigations, the list is only made if someone asks for it
+        self.mit_msg = mit_msg
+        self._owner_list = owner_list
+
+        # Indicate summary results, so they can be filtered
+        self.summary_result = summary_result
+
+        # The function ran out of time (rule timeout or checker run deadline)
+        self.timed_out = timed_out
+
+        # The result came from an earlier run (incremental runs)
+        self.replayed = replayed
+
+        if meta is None:
+            values = (func_name, pkg_name, module_name, doc, tag, level, phase, ruid, ttl_minutes,
+                      skip_on_none, fail_on_none)
+            meta = BlickResultMeta(*values) if values != _EMPTY_META_VALUES else EMPTY_META
+        self.meta = meta
 
-    weight: float = 100.0
+    @property
+    def except_(self) -> BaseException | None:
+        """The exception the rule raised, if any."""
+        return self._except
+
+    @except_.setter
+    def except_(self, value: BaseException | None):
+        # Only a summary of the stack is kept (no frames, no locals, source lines are read
+        # when it is formatted) and the exception lets go of its frames, a result that is
+        # kept around must not keep everything the failed rule had alive.
+        if value is not None and value.__traceback__ is not None and not self._traceback:
+            self._traceback = _traceback.TracebackException.from_exception(value, capture_locals=False,
+                                                                           lookup_lines=False)
+            _drop_frames(value)
+        self._except = value
 
-    # Attribute Info - This needs to be factored out?
-    tag: str = ""
-    level: int = 1
-    phase: str = ""
-    count: int = 0
-    ruid: str = ""
-    ttl_minutes: float = 0.0
+    @property
+    def traceback(self) -> str:
+        """
+        Traceback of except_.  It is only formatted the first time it is read, most results
+        with an exception are only ever counted.
+        """
+        if isinstance(self._traceback, _traceback.TracebackException):
+            self._traceback = "".join(self._traceback.format())
+        elif not self._traceback and self._except is not None:
+            self._traceback = "".join(_traceback.format_exception(self._except))
+        return self._traceback
 
-    # Mitigations
-    mit_msg: str = ""
-    owner_list: list[str] = field(default_factory=list)
+    @traceback.setter
+    def traceback(self, value: str):
+        self._traceback = value
 
-    # Bad parameters
-    skip_on_none: bool = False
-    fail_on_none: bool = False
+    @property
+    def msg_rendered(self) -> str:
+        """msg run through the renderer set by render_with, rendered once when first read."""
+        if self._msg_rendered is None:
+            self._msg_rendered = self._renderer.render(self.msg) if self._renderer else self.msg
+        return self._msg_rendered
+
+    @msg_rendered.setter
+    def msg_rendered(self, value: str):
+        self._msg_rendered = value
+
+    def render_with(self, renderer) -> None:
+        """Render msg with renderer when msg_rendered is read (None leaves it as is)."""
+        self._renderer = renderer
+        self._msg_rendered = None
+
+    def __getstate__(self):
+        # Exceptions are pickled without their frames, so the traceback is made first.  The
+        # rendered message is made too rather than sending the renderer along.
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state["_traceback"] = self.traceback
+        state["_msg_rendered"] = self.msg_rendered
+        state["_renderer"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]):
+        for name, value in state.items():
+            setattr(self, name, value)
 
-    # Indicate summary results, so they can be filtered
-    summary_result: bool = False
+    @property
+    def owner_list(self) -> list[str]:
+        if self._owner_list is None:
+            self._owner_list = []
+        return self._owner_list
 
-    mu = BlickMarkup()
+    @owner_list.setter
+    def owner_list(self, value: list[str]):
+        self._owner_list = value
 
-    def __post_init__(self):
-        # Automatically grab the traceback for better debugging.
-        if self.except_ is not None and not self.traceback:
-            self.traceback = traceback.format_exc()
+    def _values(self) -> tuple:
+        return tuple(getattr(self, name) for name in RESULT_FIELDS)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in RESULT_FIELDS)
+        return f"{self.__class__.__qualname__}({values})"
 
     def as_dict(self):
         """Convert the BlickResult instance to a dictionary."""
-        d = asdict(self)
+        d = {name: getattr(self, name) for name in RESULT_FIELDS}
+        d['owner_list'] = list(d['owner_list'])
         d['except_'] = str(d['except_'])
         return d
 
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> "BlickResult":
+        """
+        Make a result from the output of as_dict.
+
+        Exceptions only survive as_dict as strings, so they come back as a BlickException
+        holding the original message.  Unknown keys are ignored.
+        """
+        d = {k: v for k, v in d.items() if k in RESULT_FIELDS}
+        except_ = d.pop('except_', None)
+        result = cls(**d)
+        if except_ not in (None, '', 'None'):
+            result.except_ = BlickException(except_)
+        return result
+
+
+_EMPTY_META_VALUES = tuple(getattr(EMPTY_META, name) for name in META_FIELDS)
+
 
 # Shorthand
 BR = BlickResult
@@ -370,6 +581,10 @@ def group_by(results: Sequence[BlickResult], keys: Sequence[str]) -> dict[str, A
     if not keys:
         raise BlickException("Empty key list for grouping results.")
 
+    # A BlickResultStore groups its own columns
+    if hasattr(results, "group_by"):
+        return results.group_by(keys)
+
     key = keys[0]
     key_func = attrgetter(key)
 
@@ -390,6 +605,21 @@ def group_by(results: Sequence[BlickResult], keys: Sequence[str]) -> dict[str, A
     return dict(group_results)
 
 
+def result_category(result: BlickResult) -> str:
+    """The one word overview category of a result: skip, error, fail, warn or pass."""
+    return 'skip' if result.skipped else \
+        'error' if result.except_ else \
+        'fail' if not result.status else \
+        'warn' if result.warn_msg else \
+        'pass'
+
+
+def overview_text(total: int, categories: Counter) -> str:
+    """Format counts of result categories as the overview line."""
+    return f"Total: {total}, Passed: {categories['pass']}, Failed: {categories['fail']}, " \
+           f"Errors: {categories['error']}, Skipped: {categories['skip']}, Warned: {categories['warn']}"
+
+
 def overview(results: list[BlickResult]) -> str:
     """
     Returns an overview of the results.
@@ -400,22 +630,6 @@ def overview(results: list[BlickResult]) -> str:
     Returns:
         str: A summary of the results.
     """
-
-    result_counter = Counter(
-        'skip' if result.skipped else
-        'error' if result.except_ else
-        'fail' if not result.status else
-        'warn' if result.warn_msg else
-        'pass'
-        for result in results
-    )
-
-    total = len(results)
-    passed = result_counter['pass']
-    failed = result_counter['fail']
-    errors = result_counter['error']
-    skipped = result_counter['skip']
-    warned = result_counter['warn']
-
-    return f"Total: {total}, Passed: {passed}, Failed: {failed}, " \
-           f"Errors: {errors}, Skipped: {skipped}, Warned: {warned}"
+    if hasattr(results, "categories"):
+        return overview_text(len(results), results.categories())
+    return overview_text(len(results), Counter(result_category(result) for result in results))
@@ -0,0 +1,428 @@
+"""
+The runner is the part of the checker that actually calls the collected functions.
+
+The checker decides what runs and reports the results in order, the runner decides
+where and when each function runs.  Functions can run inline, on a thread pool or
+on a process pool, and functions that depend on other rules are only started after
+their prerequisites are done (or skipped if a prerequisite did not pass).
+
+Functions with a timeout (or any function when the checker has a run deadline) are
+run on a watchdog thread.  Python can't kill a thread, so a hung function is left to
+finish in the background while the run moves on with a failed, timed out result.
+"""
+import asyncio
+import heapq
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Generator, Iterable, Sequence
+
+from .blick_exception import BlickException
+from .blick_function import BlickFunction, _call_state
+from .blick_incremental import BlickIncremental
+from .blick_result import BlickResult
+
+
+class _Raised:
+    """Carries an exception from the watchdog thread back to the caller."""
+
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+_DONE = object()
+
+
+def time_limit(function_: BlickFunction, deadline: float | None) -> float | None:
+    """Seconds the function may run, the smaller of its timeout and what is left before the deadline."""
+    limits = [function_.timeout] if function_.timeout else []
+    if deadline is not None:
+        limits.append(deadline - time.time())
+    return min(limits) if limits else None
+
+
+def deadline_skip(function_: BlickFunction) -> BlickResult:
+    """The result given to a function that was not started because the run deadline had passed."""
+    result = function_.load_result(BlickResult(status=None, skipped=True, timed_out=True), 0, 0)
+    result.msg = f"Skipped {function_.function_name} because the run deadline passed."
+    return result
+
+
+def timeout_result(function_: BlickFunction, limit: float, start_time: float, count: int) -> BlickResult:
+    """The failed result given to a function that ran out of time."""
+    result = function_.load_result(BlickResult(status=False, timed_out=True), start_time, time.time(), count)
+    if function_.timeout and limit >= function_.timeout:
+        result.msg = f"{function_.function_name} timed out after {function_.timeout:g} seconds."
+    else:
+        result.msg = f"{function_.function_name} was stopped at the run deadline."
+    return result
+
+
+def _watched_results(function_: BlickFunction, limit: float) -> Generator[BlickResult, None, None]:
+    """
+    Run a blick function on a watchdog thread and stream its results back.
+
+    If the function doesn't finish within limit seconds a timed out result is yielded
+    and the thread is abandoned.  It keeps running, but what it finishes is not cached.
+    If the caller stops early (finish_on_fail) the thread is told to stop at its next
+    result.
+    """
+    results: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    abandoned = threading.Event()
+
+    def watched():
+        _call_state.abandoned = abandoned
+        try:
+            for result in function_():
+                results.put(result)
+                if stop.is_set():
+                    break
+        except BaseException as e:  # pylint: disable=broad-except
+            results.put(_Raised(e))
+        finally:
+            results.put(_DONE)
+
+    start_time = time.time()
+    end_time = start_time + limit
+    threading.Thread(target=watched, name=f"blick-{function_.function_name}", daemon=True).start()
+
+    count = 0
+    try:
+        while True:
+            try:
+                item = results.get(timeout=max(0.0, end_time - time.time()))
+            except queue.Empty:
+                abandoned.set()
+                yield timeout_result(function_, limit, start_time, count + 1)
+                return
+            if item is _DONE:
+                return
+            if isinstance(item, _Raised):
+                raise item.exception
+            count += 1
+            yield item
+    finally:
+        stop.set()
+
+
+def run_function(function_: BlickFunction, deadline: float | None = None) -> Iterable[BlickResult]:
+    """
+    Start a blick function, with a watchdog if it has a time limit.
+
+    Args:
+        function_: The function to run.
+        deadline: time.time() value after which functions are no longer started.
+    """
+    if deadline is not None and time.time() >= deadline:
+        return [deadline_skip(function_)]
+    limit = time_limit(function_, deadline)
+    if limit is None:
+        return function_()
+    return _watched_results(function_, limit)
+
+
+def _collect_results(function_: BlickFunction, deadline: float | None = None) -> list[BlickResult]:
+    """
+    Run a blick function to completion and return its results as a list.
+
+    This is what runs on the worker threads.  The finish_on_fail check is repeated
+    here so a worker stops pulling from the generator at the same point that the
+    checker would have stopped.
+    """
+    results = []
+    for result in run_function(function_, deadline):
+        results.append(result)
+        if function_.finish_on_fail and result.status is False:
+            break
+    return results
+
+
+async def _acollect_results(function_: BlickFunction, deadline: float | None = None) -> list[BlickResult]:
+    """Async twin of _collect_results used for async def rules on the event loop."""
+    if deadline is not None and time.time() >= deadline:
+        return [deadline_skip(function_)]
+
+    results = []
+
+    async def collect():
+        async for result in function_.acall():
+            results.append(result)
+            if function_.finish_on_fail and result.status is False:
+                break
+
+    # Coroutines can be cancelled, so no watchdog thread is needed here.
+    start_time = time.time()
+    limit = time_limit(function_, deadline)
+    try:
+        await asyncio.wait_for(collect(), limit)
+    except asyncio.TimeoutError:
+        results.append(timeout_result(function_, limit, start_time, len(results) + 1))
+    return results
+
+
+def _worker_failure(function_: BlickFunction, e: Exception) -> BlickResult:
+    """Make a failed result for a function that could not be run on a worker."""
+    result = function_.load_result(BlickResult(status=False), 0, 0)
+    result.except_ = e
+    result.msg = f"Exception '{e}' occurred while running {function_.function_name} on a worker."
+    return result
+
+
+def _future_results(function_: BlickFunction, future: Future) -> list[BlickResult]:
+    """
+    Get the results of a function that ran on a pool.
+
+    Problems that happen outside the blick function (for example an environment value
+    that can't be pickled for a worker process) are turned into a failed result
+    rather than taking down the whole run.
+    """
+    try:
+        return future.result()
+    except Exception as e:  # pylint: disable=broad-except
+        return [_worker_failure(function_, e)]
+
+
+def passed(results: Iterable[BlickResult]) -> bool:
+    """A prerequisite passed if none of its results failed or were skipped."""
+    return all(result.status is True for result in results)
+
+
+def dependency_skip(function_: BlickFunction, failed_ruids: Sequence[str]) -> BlickResult:
+    """The result given to a function that was not run because a prerequisite did not pass."""
+    result = function_.load_result(BlickResult(status=None, skipped=True), 0, 0)
+    result.msg = (f"Skipped {function_.function_name} because prerequisite "
+                  f"{', '.join(failed_ruids)} did not pass.")
+    return result
+
+
+def prerequisites(functions: Sequence[BlickFunction]) -> list[list[int]]:
+    """
+    For each function, the indexes of the functions it depends on.
+
+    Prerequisites that are not in the list (usually because they were filtered out) are
+    ignored since there is no way to know how they would have turned out.
+    """
+    index_of = {f.ruid: i for i, f in enumerate(functions) if f.ruid}
+    return [[index_of[ruid] for ruid in f.depends_on if ruid in index_of] for f in functions]
+
+
+def dependency_order(functions: Sequence[BlickFunction]) -> list[BlickFunction]:
+    """
+    Sort functions so every function comes after the functions it depends on.
+
+    This is a topological sort that keeps the original order whenever it can, so a
+    catalog with no dependencies comes back unchanged.
+
+    Raises:
+        BlickException: If the dependencies are circular.
+    """
+    prereqs = prerequisites(functions)
+    remaining = [len(p) for p in prereqs]
+    dependents: list[list[int]] = [[] for _ in functions]
+    for index, prereq_list in enumerate(prereqs):
+        for prereq in prereq_list:
+            dependents[prereq].append(index)
+
+    # Always take the earliest function that is ready
+    ready = [index for index, count in enumerate(remaining) if count == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        index = heapq.heappop(ready)
+        order.append(index)
+        for dependent in dependents[index]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                heapq.heappush(ready, dependent)
+
+    if len(order) != len(functions):
+        stuck = [functions[i].function_name for i, count in enumerate(remaining) if count]
+        raise BlickException(f"Circular rule dependencies found in {stuck}")
+
+    return [functions[index] for index in order]
+
+
+def make_process_pool(functions: Sequence[BlickFunction],
+                      max_workers: int | None = None) -> ProcessPoolExecutor | None:
+    """Make a process pool if any function wants to run in another process."""
+    process_funcs = [f for f in functions if f.executor == "process"]
+    if not process_funcs:
+        return None
+
+    # Worker processes find functions by name so closures and lambdas can't be sent there.
+    for f in process_funcs:
+        if not f.is_importable:
+            raise BlickException(f"Function {f.function_name} must be defined at module "
+                                 "level to use the process executor.")
+    return ProcessPoolExecutor(max_workers=max_workers)
+
+
+class BlickRunner:
+    """
+    Run a list of blick functions and hand back their results by index.
+
+    With no pool the functions are run inline when their results are asked for, so
+    results stream out of the generator exactly like they always have.  With a pool
+    every function is started as soon as its prerequisites are done and results(index)
+    waits for it to finish.
+
+    Use it as a context manager so pools are shut down when the run is over or aborted.
+    """
+
+    def __init__(self,
+                 functions: Sequence[BlickFunction],
+                 max_workers: int | None = None,
+                 run_deadline: float | None = None,
+                 incremental: BlickIncremental | None = None):
+        self.functions = list(functions)
+        self.max_workers = max_workers
+        self.run_deadline = run_deadline
+        self.incremental = incremental
+        self.deadline: float | None = None
+        self.prerequisites = prerequisites(self.functions)
+
+        self.dependents: list[list[int]] = [[] for _ in self.functions]
+        for index, prereqs in enumerate(self.prerequisites):
+            for prereq in prereqs:
+                self.dependents[prereq].append(index)
+
+        # Pass/fail status of each function once it is known.
+        self.passed: list[bool | None] = [None] * len(self.functions)
+
+        self._lock = threading.Lock()
+        self._closed = False
+        self._futures: dict[int, Future] = {}
+        self._waiting: dict[int, set[int]] = {}
+        self.pool: ThreadPoolExecutor | None = None
+        self.process_pool: ProcessPoolExecutor | None = None
+
+    @property
+    def parallel(self) -> bool:
+        """Are functions run on a thread pool?"""
+        return self.max_workers is not None and self.max_workers > 1
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self):
+        """Create the pools and start everything that has no prerequisites."""
+        if self.run_deadline is not None:
+            self.deadline = time.time() + self.run_deadline
+
+        self.process_pool = make_process_pool(self.functions, self.max_workers if self.parallel else None)
+        if self.parallel:
+            self.pool = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        # Functions that run on a pool get a placeholder future that is resolved when the
+        # function is done, since dependent functions are not submitted right away.
+        for index, function_ in enumerate(self.functions):
+            if self._on_pool(function_):
+                self._futures[index] = Future()
+                self._waiting[index] = set(self.prerequisites[index])
+
+        # Find everything that is ready before submitting anything, since a completing
+        # function starts its own dependents.
+        ready = [index for index in self._futures if not self._waiting[index]]
+        for index in ready:
+            self._schedule(index)
+
+    def close(self):
+        """Anything that hasn't started is thrown away.  Running functions finish in the background."""
+        with self._lock:
+            self._closed = True
+        for pool in (self.pool, self.process_pool):
+            if pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def _on_pool(self, function_: BlickFunction) -> bool:
+        return function_.executor == "process" or self.pool is not None
+
+    def _failed_prerequisites(self, index: int) -> list[str]:
+        """Ruids of the prerequisites that are known to not have passed."""
+        return [self.functions[p].ruid for p in self.prerequisites[index] if self.passed[p] is False]
+
+    def _replay(self, function_: BlickFunction) -> list[BlickResult] | None:
+        """Results from the last run if this is an incremental run and nothing changed."""
+        return self.incremental.replay(function_) if self.incremental else None
+
+    def _schedule(self, index: int):
+        """All prerequisites are done, so either skip the function, replay it or send it to a pool."""
+        function_ = self.functions[index]
+        failed = self._failed_prerequisites(index)
+        if failed:
+            self._complete(index, [dependency_skip(function_, failed)])
+            return
+
+        replayed = self._replay(function_)
+        if replayed is not None:
+            self._complete(index, replayed)
+            return
+
+        pool = self.process_pool if function_.executor == "process" else self.pool
+        with self._lock:
+            if self._closed:
+                return
+            future = pool.submit(_collect_results, function_, self.deadline)
+        future.add_done_callback(lambda f: self._complete(index, _future_results(function_, f)))
+
+    def _complete(self, index: int, results: list[BlickResult]):
+        """Record the results of a pooled function and start anything that was waiting on it."""
+        self.passed[index] = passed(results)
+        self._futures[index].set_result(results)
+        self.finished(index)
+
+    def finished(self, index: int):
+        """
+        The function at index is done, so start any pooled functions that were waiting on it.
+
+        Pooled functions call this themselves, the checker calls it once it has read all the
+        results from an inline function.
+        """
+        ready = []
+        with self._lock:
+            for dependent in self.dependents[index]:
+                waiting = self._waiting.get(dependent)
+                if waiting is None or index not in waiting:
+                    continue
+                waiting.discard(index)
+                if not waiting:
+                    ready.append(dependent)
+        for dependent in ready:
+            self._schedule(dependent)
+
+    def _track(self, index: int, results: Iterable[BlickResult]) -> Generator[BlickResult, None, None]:
+        """Record pass/fail for an inline function as its results stream by."""
+        self.passed[index] = True
+        for result in results:
+            if result.status is not True:
+                self.passed[index] = False
+            yield result
+
+    def results(self, index: int) -> Iterable[BlickResult]:
+        """
+        Results for the function at index.
+
+        Pooled functions block until they are done.  Inline functions are started here,
+        after a check that none of their prerequisites failed and that they can't just
+        be replayed.
+        """
+        if index in self._futures:
+            return self._futures[index].result()
+
+        function_ = self.functions[index]
+        failed = self._failed_prerequisites(index)
+        if failed:
+            self.passed[index] = False
+            return [dependency_skip(function_, failed)]
+
+        replayed = self._replay(function_)
+        if replayed is not None:
+            self.passed[index] = passed(replayed)
+            return replayed
+        return self._track(index, run_function(function_, self.deadline))
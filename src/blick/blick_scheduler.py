@@ -0,0 +1,220 @@
+"""
+Run rules over and over, each on its own schedule.
+
+Running blick from cron re-imports everything and runs every rule at the same rate.
+The scheduler keeps a prepared checker loaded and runs each rule when it is due,
+based on its interval attribute (or ttl_minutes if there is no interval, or a default
+if there is neither).  The timers live in a heap keyed by the next time each rule is
+due, so finding the next rule to run is cheap no matter how many rules there are.
+
+The latest results for every rule are kept, and can be published as they arrive with
+a callback.  Each batch is a run as far as env functions go, run scope env functions are
+torn down after every batch and set up again for the next one.
+
+    checker = BlickChecker(packages=[BlickPackage("checks")], auto_setup=True)
+    scheduler = BlickScheduler(checker, on_results=print_failures)
+    scheduler.run_forever()
+"""
+import heapq
+import threading
+import time
+from typing import Callable, Sequence
+
+from .blick_exception import BlickException
+from .blick_function import BlickFunction
+from .blick_history import function_key
+from .blick_result import BlickResult
+from .blick_runner import BlickRunner, dependency_skip, passed
+
+DEFAULT_INTERVAL_MIN = 5.0  # Rules with no interval or ttl_minutes are run this often
+
+
+class BlickScheduler:
+    """
+    Run the collected functions of a checker on their own intervals.
+
+    Args:
+        checker: A checker that has been prepared.  Its max_workers, run_deadline and
+                 score_strategy are used.  Its results and score are kept up to date with
+                 the latest results for each rule so it can still be used for reporting.
+                 Batches hold its run_lock, so its own runs (the API for example) wait
+                 for the batch to finish.
+        default_interval_min: Interval for rules with no interval or ttl_minutes.
+        on_results: Called with the function and its results every time a rule runs.
+    """
+
+    def __init__(self,
+                 checker,
+                 default_interval_min: float = DEFAULT_INTERVAL_MIN,
+                 on_results: Callable[[BlickFunction, list[BlickResult]], None] | None = None):
+        if default_interval_min <= 0:
+            raise BlickException("default_interval_min must be greater than 0.")
+
+        self.checker = checker
+        self.default_interval_min = default_interval_min
+        self.on_results = on_results
+
+        self.functions: list[BlickFunction] = []
+        self.latest: dict[str, list[BlickResult]] = {}
+        self.run_count = 0
+
+        # (due time, index in functions) pairs, the index breaks ties in collected order
+        self._timers: list[tuple[float, int]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._started = False
+        self._env_loaded = False
+
+    def interval_sec(self, function_: BlickFunction) -> float:
+        """Seconds between runs of a function."""
+        return (function_.interval or function_.ttl_minutes or self.default_interval_min) * 60
+
+    def start(self, now: float | None = None):
+        """Load the environment and make every rule due right away."""
+        now = time.time() if now is None else now
+        with self.checker.run_lock:
+            self._load_environment()
+            self.functions = list(self.checker.collected)
+            self.checker.results = []
+
+        self._timers = [(now, index) for index in range(len(self.functions))]
+        heapq.heapify(self._timers)
+        self._started = True
+
+    def _load_environment(self):
+        env = self.checker.load_environments()
+        self.checker.bind_environment(env)
+        self._env_loaded = True
+
+    def next_due(self) -> float | None:
+        """The time the next rule is due, None if there are no rules."""
+        return self._timers[0][0] if self._timers else None
+
+    def _pop_due(self, now: float) -> list[int]:
+        """Take every rule that is due off the heap and put it back at its next due time."""
+        due = []
+        while self._timers and self._timers[0][0] <= now:
+            due_time, index = heapq.heappop(self._timers)
+            due.append(index)
+
+            # Stay on the original beat, but if we fell behind don't run it over and over to catch up
+            next_time = due_time + self.interval_sec(self.functions[index])
+            if next_time <= now:
+                next_time = now + self.interval_sec(self.functions[index])
+            heapq.heappush(self._timers, (next_time, index))
+
+        # Collected order is dependency order, so run the batch in that order
+        return sorted(due)
+
+    def _prerequisite_skip(self, function_: BlickFunction, batch: set[str]) -> list[BlickResult] | None:
+        """Skip a rule if a prerequisite outside this batch didn't pass the last time it ran."""
+        failed = [ruid for ruid in function_.depends_on
+                  if ruid not in batch and ruid in self.latest and not passed(self.latest[ruid])]
+        return [dependency_skip(function_, failed)] if failed else None
+
+    def run_pending(self, now: float | None = None) -> list[BlickResult]:
+        """
+        Run every rule that is due and return their results.
+
+        Prerequisites that are due in the same batch are handled by the runner, the others
+        are judged by their latest results.
+        """
+        if not self._started:
+            self.start(now)
+        now = time.time() if now is None else now
+
+        due = [self.functions[index] for index in self._pop_due(now)]
+        if not due:
+            return []
+
+        batch = {f.ruid for f in due if f.ruid}
+        skipped = {id(f): self._prerequisite_skip(f, batch) for f in due}
+        to_run = [f for f in due if skipped[id(f)] is None]
+
+        # The checker can be shared (blicker watch --api), its runs wait for the batch and the other way around
+        with self.checker.run_lock:
+            results = self._run_batch(due, to_run, skipped)
+
+            # Runs of the checker replace its results and stats, so they are counted again from the latest
+            self.checker.results = self.latest_results()
+        self.run_count += 1
+        return results
+
+    def _run_batch(self, due: list[BlickFunction], to_run: list[BlickFunction], skipped: dict) -> list[BlickResult]:
+        """Run a batch with the environment loaded, run scope env functions are torn down after it."""
+        if not self._env_loaded:
+            self._load_environment()
+
+        results: list[BlickResult] = []
+        try:
+            with BlickRunner(to_run, self.checker.max_workers, self.checker.run_deadline) as runner:
+                ran = iter(range(len(to_run)))
+                for function_ in due:
+                    function_results = skipped[id(function_)]
+                    if function_results is None:
+                        index = next(ran)
+                        function_results = []
+                        for result in runner.results(index):
+                            function_results.append(result)
+                            if function_.finish_on_fail and result.status is False:
+                                break
+                        runner.finished(index)
+                    self._publish(function_, function_results)
+                    results.extend(function_results)
+        finally:
+            # Run scope env functions last one batch, the next batch sets them up again
+            if self.checker.teardown_environments():
+                self._env_loaded = False
+        return results
+
+    def _publish(self, function_: BlickFunction, results: list[BlickResult]):
+        for result in results:
+            result.render_with(self.checker.renderer)
+        with self._lock:
+            self.latest[function_key(function_)] = results
+        if self.on_results:
+            self.on_results(function_, results)
+
+    def latest_results(self) -> list[BlickResult]:
+        """The latest results of every rule that has run, in collected order."""
+        with self._lock:
+            return [result
+                    for function_ in self.functions
+                    for result in self.latest.get(function_key(function_), [])]
+
+    def run_forever(self, max_batches: int | None = None):
+        """
+        Run rules as they come due until stop() is called (or max_batches batches have run).
+
+        The wait between batches is on an event, so stop() takes effect right away.
+        """
+        if not self._started:
+            self.start()
+
+        batches = 0
+        while not self._stop.is_set():
+            if max_batches is not None and batches >= max_batches:
+                break
+            self.run_pending()
+            batches += 1
+
+            next_due = self.next_due()
+            if next_due is None:
+                break
+            self._stop.wait(max(0.0, next_due - time.time()))
+
+    def start_thread(self, max_batches: int | None = None) -> threading.Thread:
+        """Run the scheduler on a daemon thread, handy next to a web server."""
+        thread = threading.Thread(target=self.run_forever, args=(max_batches,),
+                                  name="blick-scheduler", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Stop run_forever after the current batch.  A stopped scheduler stays stopped."""
+        self._stop.set()
+
+    @property
+    def functions_by_due(self) -> Sequence[tuple[float, BlickFunction]]:
+        """Functions with the time they are next due, soonest first."""
+        return [(due, self.functions[index]) for due, index in sorted(self._timers)]
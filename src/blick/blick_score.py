@@ -1,10 +1,58 @@
-"""Basic scoring algorithms for Blick test results. """
+"""Basic scoring algorithms for Blick test results.
+
+Each strategy can score a list of results, or score them one at a time as they are
+produced with an accumulator:
+
+    acc = strategy.start()
+    for result in checker.yield_all():
+        acc.add(result)
+    score = acc.value()
+
+The built-in accumulators do a constant amount of work per result, so the score can
+be kept up to date during a run without holding on to the results.  The list API
+(strategy(results) or strategy.score(results)) runs on top of the accumulator.  A
+BlickResultStore is scored straight from its columns with add_store.
+"""
 
 import abc
-from typing import Any
+from typing import Iterable
 
 from .blick_exception import BlickException
 from .blick_result import BlickResult
+from .blick_store import BlickResultStore
+
+
+class ScoreAccumulator(abc.ABC):
+    """Running score of the results added so far."""
+
+    @abc.abstractmethod
+    def add(self, result: BlickResult) -> None:  # pragma: no cover
+        """Add one result to the score."""
+
+    def add_store(self, store: BlickResultStore) -> None:
+        """Add every result in a store.  Override to work on the columns directly."""
+        for result in store:
+            self.add(result)
+
+    @abc.abstractmethod
+    def value(self) -> float:  # pragma: no cover
+        """The score of the results added so far."""
+
+
+class _ListAccumulator(ScoreAccumulator):
+    """For strategies that only know how to score a whole list, keep the list."""
+
+    def __init__(self, strategy: "ScoreStrategy"):
+        if type(strategy).score is ScoreStrategy.score:
+            raise BlickException(f"{type(strategy).__name__} must implement start or score.")
+        self.strategy = strategy
+        self.results: list[BlickResult] = []
+
+    def add(self, result: BlickResult) -> None:
+        self.results.append(result)
+
+    def value(self) -> float:
+        return self.strategy.score(self.results)
 
 
 class ScoreStrategy(abc.ABC):
@@ -13,15 +61,31 @@ class ScoreStrategy(abc.ABC):
     It is assumed that many scoring strategies could be implemented, this provides a way
     for those strategies to be implemented in code (by providing a class) or from file
     by providing a name that matches the class strategy name attribute.
+
+    Subclasses implement start (returning a ScoreAccumulator) to be scored one result
+    at a time.  Strategies that only implement score still work, their accumulator just
+    keeps the results until the score is asked for.
     """
 
     strategy_name: str | None = None
 
-    @abc.abstractmethod
-    def score(self, results: list[BlickResult]) -> float:  # pragma: no cover
-        """Abstract score method"""
+    def start(self) -> ScoreAccumulator:
+        """A new accumulator to score a run with."""
+        return _ListAccumulator(self)
 
-    def __call__(self, results: list[BlickResult]):
+    def score(self, results: Iterable[BlickResult] | None = None) -> float:
+        """Score a list of results."""
+        if results is None:
+            return 0.0
+        accumulator = self.start()
+        if isinstance(results, BlickResultStore):
+            accumulator.add_store(results)
+        else:
+            for result in results:
+                accumulator.add(result)
+        return accumulator.value()
+
+    def __call__(self, results: Iterable[BlickResult] | None):
         return self.score(results)
 
     @classmethod
@@ -42,30 +106,91 @@ class ScoreStrategy(abc.ABC):
             "Argument must be a strategy name or a ScoreStrategy subclass.")
 
 
+class _WeightedAccumulator(ScoreAccumulator):
+    """Weighted fraction of the results that passed, skipped results don't count."""
+
+    def __init__(self):
+        self.count = 0
+        self.weight_sum = 0.0
+        self.passed_sum = 0.0
+
+    def add(self, result: BlickResult) -> None:
+        if result.skipped:
+            return
+        self.count += 1
+        self.weight_sum += result.weight
+        if result.status:
+            self.passed_sum += result.weight
+
+    def add_store(self, store: BlickResultStore) -> None:
+        for status, skipped, weight in zip(store.status, store.skipped, store.weight):
+            if skipped:
+                continue
+            self.count += 1
+            self.weight_sum += weight
+            if status == 1:
+                self.passed_sum += weight
+
+    def value(self) -> float:
+        if not self.count:
+            return 0.0
+        return (100.0 * self.passed_sum) / self.weight_sum
+
+
 class ScoreByResult(ScoreStrategy):
     """Calculate the score by individually weighting each result"""
 
     strategy_name = "by_result"
 
-    def score(self, results: list[BlickResult] | None = None) -> float:
+    def start(self) -> ScoreAccumulator:
         """Weighted result of all results."""
-
-        if results is None:
-            return 0.0
-
-        weight_sum = 0.0
-        passed_sum = 0.0
-        # Remove any skipped results
-        results = [result for result in results if not result.skipped]
-        if not results:
+        return _WeightedAccumulator()
+
+
+class _FunctionBinaryAccumulator(ScoreAccumulator):
+    """Fraction of the functions where every result passed."""
+
+    def __init__(self):
+        self.unskipped = 0
+        self.functions: dict[tuple[str, str, str], bool] = {}
+        self.passed = 0
+
+    def add(self, result: BlickResult) -> None:
+        if not result.skipped:
+            self.unskipped += 1
+        key = (result.pkg_name, result.module_name, result.func_name)
+        status = bool(result.status)
+        previous = self.functions.get(key)
+        if previous is None:
+            self.functions[key] = status
+            self.passed += status
+        elif previous and not status:
+            self.functions[key] = False
+            self.passed -= 1
+
+    def add_store(self, store: BlickResultStore) -> None:
+        self.unskipped += len(store) - sum(store.skipped)
+
+        # Fold the rows into one status per meta record, then per function
+        meta_status: dict[int, bool] = {}
+        for index, status in zip(store.meta_index, store.status):
+            meta_status[index] = meta_status.get(index, True) and status == 1
+        for index, status in meta_status.items():
+            meta = store.metas[index]
+            key = (meta.pkg_name, meta.module_name, meta.func_name)
+            previous = self.functions.get(key)
+            if previous is None:
+                self.functions[key] = status
+                self.passed += status
+            elif previous and not status:
+                self.functions[key] = False
+                self.passed -= 1
+
+    def value(self) -> float:
+        if not self.unskipped:
             return 0.0
-            # raise BlickException("No results to score.")
-
-        for result in results:
-            passed_sum += result.weight if result.status else 0.0
-            weight_sum += result.weight
-
-        return (100.0 * passed_sum) / (weight_sum * 1.0)
+        # The score should be the average of the scores for each function
+        return (100.0 * self.passed) / len(self.functions)
 
 
 class ScoreByFunctionBinary(ScoreStrategy):
@@ -74,32 +199,20 @@ class ScoreByFunctionBinary(ScoreStrategy):
 
     strategy_name = "by_function_binary"
 
-    def score(self, results: list[BlickResult] | None = None) -> float:
+    def start(self) -> ScoreAccumulator:
         """If any result on a function fails then the function fails."""
-        if results is None:
-            return 0.0
-
-        score_functions: dict[str, Any] = {}
-
-        for result in results:
-            key = f"{result.pkg_name}.{result.module_name}.{result.func_name}".lstrip(
-                "."
-            )
-            score_functions.setdefault(key, []).append(result)
+        return _FunctionBinaryAccumulator()
 
-        # Remove any skipped results
-        results = [result for result in results if not result.skipped]
-        if not results:
-            return 0.0
 
-        for key, results_ in score_functions.items():
-            if not results_:
-                score_functions[key] = 0.0
-            else:
-                score_functions[key] = 100.0 if all(r.status for r in results_) else 0.0
+class _FunctionMeanAccumulator(_WeightedAccumulator):
+    """Every result is counted by weight, so the grouping by function doesn't change the mean."""
 
-        # The score should be the average of the scores for each function
-        return sum(score_functions.values()) / (len(score_functions) * 1.0)
+    def value(self) -> float:
+        # This does not appear to be possible.  The empty list is protected against
+        # and each of the summed weights must be > 0.  This could be removed?
+        if self.count and self.weight_sum == 0.0:
+            raise BlickException("The sum of weights is 0.  This is not allowed.")
+        return super().value()
 
 
 class ScoreByFunctionMean(ScoreStrategy):
@@ -108,40 +221,48 @@ class ScoreByFunctionMean(ScoreStrategy):
 
     strategy_name = "by_function_mean"
 
-    def score(self, results: list[BlickResult] | None = None) -> float:
+    def start(self) -> ScoreAccumulator:
         """Find the average of the results from each function."""
-        if results is None:
-            return 0.0
+        return _FunctionMeanAccumulator()
 
-        function_results: dict[str, Any] = {}
 
-        # Remove any skipped results
-        results = [result for result in results if not result.skipped]
-        if not results:
-            return 0.0
+class _BinaryAccumulator(ScoreAccumulator):
+    """Tracks whether any (unskipped) result passed or failed."""
 
-        for result in results:
-            key = f"{result.pkg_name}.{result.module_name}.{result.func_name}".lstrip(
-                "."
-            )
-            function_results.setdefault(key, []).append(result)
+    def __init__(self):
+        self.count = 0
+        self.any_pass = False
+        self.any_fail = False
 
-        sum_weights = 0.0
-        sum_passed = 0.0
+    def add(self, result: BlickResult) -> None:
+        self.count += 1
+        if result.skipped:
+            return
+        if result.status:
+            self.any_pass = True
+        else:
+            self.any_fail = True
 
-        # Now we have a dictionary of results for each function.  We can now score each function
-        for key, results_ in function_results.items():
-            for result in results_:
-                sum_weights += result.weight
-                sum_passed += result.weight if result.status else 0.0
+    def add_store(self, store: BlickResultStore) -> None:
+        self.count += len(store)
+        for status, skipped in zip(store.status, store.skipped):
+            if not skipped:
+                if status == 1:
+                    self.any_pass = True
+                else:
+                    self.any_fail = True
 
-        # This does not appear to be possible.  The empty list is protected against
-        # and each of the summed weights must be > 0.  This could be removed?
-        if sum_weights == 0.0:
-            raise BlickException("The sum of weights is 0.  This is not allowed.")
 
-        # The score should be the average of the scores for each function
-        return (100.0 * sum_passed) / (sum_weights * 1.0)
+class _BinaryFailAccumulator(_BinaryAccumulator):
+
+    def value(self) -> float:
+        return 0.0 if not self.count or self.any_fail else 100.0
+
+
+class _BinaryPassAccumulator(_BinaryAccumulator):
+
+    def value(self) -> float:
+        return 100.0 if self.any_pass else 0.0
 
 
 class ScoreBinaryFail(ScoreStrategy):
@@ -149,26 +270,13 @@ class ScoreBinaryFail(ScoreStrategy):
 
     strategy_name = "by_binary_fail"
 
-    def score(self, results: list[BlickResult] | None) -> float:
-        if results is None:
-            return 0.0
-
-        if not results:
-            return 0.0
-
-        if any(not result.status for result in results if not result.skipped):
-            return 0.0
-        return 100.0
+    def start(self) -> ScoreAccumulator:
+        return _BinaryFailAccumulator()
 
 
 class ScoreBinaryPass(ScoreStrategy):
     """Anything passes then the test is a pass. Empty results fail. """
     strategy_name = "by_binary_pass"
 
-    def score(self, results: list[BlickResult] | None) -> float:
-        if results is None:
-            return 0.0
-
-        if any(result.status for result in results if not result.skipped):
-            return 100.0
-        return 0.0
+    def start(self) -> ScoreAccumulator:
+        return _BinaryPassAccumulator()
@@ -0,0 +1,202 @@
+"""
+Split a run over several machines and put the results back together.
+
+Every node collects the same rules and keeps the ones for its shard.  Rules are
+assigned by a stable hash of their ruid (or module.function), so every node agrees
+on the split without talking to the others.  Given the same history file every node
+can also balance shards by past runtime instead, largest first onto the least loaded
+shard.  The nodes must read the same history, one that none of them is updating, or
+they would each work out a different split.
+
+Rules that depend on each other are always put in the same shard, otherwise the
+prerequisite would be missing on the node that runs the dependent rule.
+
+Each node writes its run (BlickChecker.as_dict) to a file and merge_runs combines
+them into a single run with the header, counts and score worked out again.  Each run
+lists every rule that was split up, so a rule no shard ran is reported too.
+"""
+import datetime as dt
+import hashlib
+from collections import Counter
+from typing import Any, Sequence
+
+from .blick_exception import BlickException
+from .blick_function import BlickFunction
+from .blick_history import BlickHistory, function_key
+from .blick_result import BlickResult
+from .blick_score import ScoreByResult, ScoreStrategy
+from .blick_stats import BlickRunStats
+
+
+def check_shard(shard_index: int | None, shard_count: int | None) -> None:
+    """Make sure the shard settings make sense, both or neither must be given."""
+    if shard_index is None and shard_count is None:
+        return
+    for name, value in (("shard_index", shard_index), ("shard_count", shard_count)):
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise BlickException(f"{name} must be an integer when sharding, not {value!r}.")
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise BlickException(f"shard_index must be in 0..{shard_count - 1} and shard_count >= 1.")
+
+
+def shard_hash(function_: BlickFunction) -> int:
+    """A hash of the function's key that is the same on every machine (unlike hash())."""
+    return int(hashlib.sha256(function_key(function_).encode()).hexdigest()[:16], 16)
+
+
+def dependency_groups(functions: Sequence[BlickFunction]) -> list[list[BlickFunction]]:
+    """Group functions that are connected by depends_on, in order of first appearance."""
+    parent = list(range(len(functions)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    index_of = {f.ruid: i for i, f in enumerate(functions) if f.ruid}
+    for i, function_ in enumerate(functions):
+        for ruid in function_.depends_on:
+            if ruid in index_of:
+                parent[find(i)] = find(index_of[ruid])
+
+    groups: dict[int, list[BlickFunction]] = {}
+    for i, function_ in enumerate(functions):
+        groups.setdefault(find(i), []).append(function_)
+    return list(groups.values())
+
+
+def _balanced(groups: list[list[BlickFunction]], shard_count: int, history: BlickHistory) -> list[int]:
+    """Assign groups to shards longest first, each onto the shard with the least work so far."""
+    runtimes = [[history.runtime(f) for f in group] for group in groups]
+    known = [r for group in runtimes for r in group if r is not None]
+
+    # Rules that never ran are guessed to be average
+    guess = sum(known) / len(known) if known else 1.0
+    work = [sum(guess if r is None else r for r in group) for group in runtimes]
+
+    order = sorted(range(len(groups)), key=lambda g: (-work[g], min(shard_hash(f) for f in groups[g])))
+    loads = [0.0] * shard_count
+    shards = [0] * len(groups)
+    for g in order:
+        shard = loads.index(min(loads))
+        shards[g] = shard
+        loads[shard] += work[g]
+    return shards
+
+
+def shard_functions(functions: Sequence[BlickFunction],
+                    shard_index: int,
+                    shard_count: int,
+                    history: BlickHistory | None = None) -> list[BlickFunction]:
+    """
+    The functions that belong to one shard, in their original order.
+
+    Args:
+        functions: All the collected functions, the same list on every node.
+        shard_index: Which shard this is, 0 to shard_count - 1.
+        shard_count: How many shards there are.
+        history: If given, balance shards by past runtime rather than hashing.
+    """
+    check_shard(shard_index, shard_count)
+    groups = dependency_groups(functions)
+    if history is None:
+        shards = [min(shard_hash(f) for f in group) % shard_count for group in groups]
+    else:
+        shards = _balanced(groups, shard_count, history)
+
+    keep = {id(f) for group, shard in zip(groups, shards) if shard == shard_index for f in group}
+    return [f for f in functions if id(f) in keep]
+
+
+def _union(lists) -> list:
+    """Union of lists keeping the order things were first seen."""
+    return list(dict.fromkeys(item for items in lists for item in items))
+
+
+def _time(value) -> dt.datetime:
+    return value if isinstance(value, dt.datetime) else dt.datetime.fromisoformat(str(value))
+
+
+def _check_coverage(runs: Sequence[dict[str, Any]]) -> None:
+    """Every rule the shards split up was run by exactly one of them (runs that say which)."""
+    expected = [run["shard_expected"] for run in runs if run.get("shard_expected") is not None]
+    if not expected:
+        return
+    if any(sorted(e) != sorted(expected[0]) for e in expected):
+        raise BlickException("The shards split different sets of rules, did every node collect the same ones?")
+    ran = Counter(key for run in runs for key in run.get("shard_rules") or [])
+    twice = sorted(key for key, count in ran.items() if count > 1)
+    if twice:
+        raise BlickException(f"Some rules were run by more than one shard: {twice}")
+    missing = sorted(set(expected[0]) - set(ran))
+    if missing:
+        raise BlickException(f"No shard ran these rules: {missing}")
+
+
+def merge_runs(runs: Sequence[dict[str, Any]], score_strategy: ScoreStrategy | None = None) -> dict[str, Any]:
+    """
+    Combine the runs of several shards (each one from BlickChecker.as_dict) into one run.
+
+    The header is rebuilt from the shard headers, the counts from the results and the
+    score is recomputed from all the results.  The score strategy defaults to the one the
+    shards used.
+
+    Raises:
+        BlickException: If the runs don't look like shards of the same run, or between
+                        them the shards didn't run every rule exactly once.
+    """
+    if not runs:
+        raise BlickException("There are no runs to merge.")
+
+    shard_indexes = [run.get("shard_index") for run in runs if run.get("shard_index") is not None]
+    if len(shard_indexes) != len(set(shard_indexes)):
+        raise BlickException(f"The same shard shows up more than once: {sorted(shard_indexes)}")
+    if len({run.get("shard_count") for run in runs}) > 1:
+        raise BlickException("The runs were split into different numbers of shards.")
+
+    ruids = [ruid for run in runs for ruid in run.get("ruids", []) if ruid]
+    if len(ruids) != len(set(ruids)):
+        raise BlickException("Some rules were run by more than one shard.")
+    _check_coverage(runs)
+
+    if score_strategy is None:
+        names = {run.get("score_strategy") for run in runs} - {None}
+        if len(names) > 1:
+            raise BlickException(f"The shards were scored differently {sorted(names)}, pick a score strategy.")
+        score_strategy = ScoreStrategy.strategy_factory(names.pop()) if names else ScoreByResult()
+
+    result_dicts = [d for run in runs for d in run.get("results", [])]
+    results = [BlickResult.from_dict(d) for d in result_dicts]
+    stats = BlickRunStats.from_results(results)
+
+    start_time = min(_time(run["start_time"]) for run in runs)
+    end_time = max(_time(run["end_time"]) for run in runs)
+
+    return {
+        "package_count": max(run.get("package_count", 0) for run in runs),
+        "module_count": len(_union(run.get("modules", []) for run in runs)),
+        "modules": _union(run.get("modules", []) for run in runs),
+        "function_count": sum(run.get("function_count", 0) for run in runs),
+        "tags": sorted(_union(run.get("tags", []) for run in runs)),
+        "levels": sorted(_union(run.get("levels", []) for run in runs)),
+        "phases": sorted(_union(run.get("phases", []) for run in runs)),
+        "ruids": sorted(_union(run.get("ruids", []) for run in runs)),
+        "score": score_strategy(results),
+        "score_strategy": score_strategy.strategy_name,
+        "env_nulls": _union(run.get("env_nulls", []) for run in runs),
+        "shard_index": None,
+        "shard_count": None,
+        "shard_expected": None,
+        "shard_rules": None,
+        "start_time": start_time,
+        "end_time": end_time,
+        "duration_seconds": (end_time - start_time).total_seconds(),
+        "functions": _union(run.get("functions", []) for run in runs),
+        "passed_count": stats.pass_count,
+        "failed_count": stats.fail_count,
+        "skip_count": stats.skip_count,
+        "total_count": stats.result_count,
+        "stats": stats.as_dict(),
+        "results": result_dicts,
+    }
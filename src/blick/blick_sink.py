@@ -0,0 +1,147 @@
+"""
+Places to send results as a run produces them.
+
+run_all normally keeps every result in memory.  A run with millions of results (a
+rule per file or per row) can't afford that, so results can be streamed to sinks as
+they are yielded and run_all can be told not to keep them.  The counts and score of
+the checker are kept either way.
+
+- BlickJsonlSink: one JSON object per line in a file.
+- BlickSqliteSink: rows in a SQLite table, committed in batches.
+- BlickCallbackSink: hands each result to a function.
+
+    checker.run_all(sinks=[BlickJsonlSink("results.jsonl")], keep_results=False)
+"""
+import abc
+import datetime as dt
+import json
+import pathlib
+import sqlite3
+from typing import Any, Callable
+
+from .blick_exception import BlickException
+from .blick_result import RESULT_FIELDS, BlickResult
+
+DEFAULT_SQLITE_TABLE = "blick_results"
+DEFAULT_SQLITE_BATCH = 1000  # Rows inserted per commit
+
+
+class BlickSink(abc.ABC):
+    """
+    Somewhere to write results.  open is called before the run starts, write once for
+    every result as it is yielded and close when the run is over (even if it failed).
+    """
+
+    def open(self, checker) -> None:
+        """Get ready for a run of checker."""
+
+    @abc.abstractmethod
+    def write(self, result: BlickResult) -> None:  # pragma: no cover
+        """Write one result."""
+
+    def close(self) -> None:
+        """The run is over, flush anything that is buffered."""
+
+
+class BlickCallbackSink(BlickSink):
+    """Call a function with each result."""
+
+    def __init__(self, callback: Callable[[BlickResult], Any]):
+        self.callback = callback
+
+    def write(self, result: BlickResult) -> None:
+        self.callback(result)
+
+
+class BlickJsonlSink(BlickSink):
+    """
+    Write each result as a line of JSON (the output of BlickResult.as_dict).
+
+    Lines can be read back with BlickResult.from_dict.  The file is replaced unless
+    append is set.
+    """
+
+    def __init__(self, path: str | pathlib.Path, append: bool = False):
+        self.path = pathlib.Path(path)
+        self.append = append
+        self._file = None
+
+    def open(self, checker) -> None:
+        try:
+            self._file = open(self.path, "a" if self.append else "w", encoding="utf-8")
+        except OSError as e:
+            raise BlickException(f"Could not open results file {self.path}: {e}") from e
+
+    def write(self, result: BlickResult) -> None:
+        self._file.write(json.dumps(result.as_dict(), default=str))
+        self._file.write("\n")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _column(value: Any) -> Any:
+    """SQLite takes numbers, strings and None, everything else is stored as text."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+class BlickSqliteSink(BlickSink):
+    """
+    Write results as rows of a SQLite table, one column per BlickResult field plus a
+    run column holding the time the run started.
+
+    Rows are inserted in batches, so at most batch_size results are held at a time.
+    Several runs can share a table and be told apart by the run column.
+    """
+
+    def __init__(self,
+                 path: str | pathlib.Path,
+                 table: str = DEFAULT_SQLITE_TABLE,
+                 batch_size: int = DEFAULT_SQLITE_BATCH):
+        if not table.isidentifier():
+            raise BlickException(f"Invalid table name {table!r}.")
+        self.path = pathlib.Path(path)
+        self.table = table
+        self.batch_size = batch_size
+        self.columns = list(RESULT_FIELDS)
+        self.run = ""
+        self._conn: sqlite3.Connection | None = None
+        self._rows: list[tuple] = []
+
+    def open(self, checker) -> None:
+        self.run = dt.datetime.now().isoformat()
+        try:
+            self._conn = sqlite3.connect(self.path)
+        except sqlite3.Error as e:
+            raise BlickException(f"Could not open results database {self.path}: {e}") from e
+        columns = ", ".join(["run TEXT"] + [f'"{name}"' for name in self.columns])
+        with self._conn:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({columns})")
+
+    def write(self, result: BlickResult) -> None:
+        self._rows.append((self.run, *(_column(getattr(result, name)) for name in self.columns)))
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        marks = ", ".join("?" * (len(self.columns) + 1))
+        with self._conn:
+            self._conn.executemany(f"INSERT INTO {self.table} VALUES ({marks})", self._rows)
+        self._rows = []
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._flush()
+        finally:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,156 @@
+"""
+Statistics for a run, kept up to date one result at a time.
+
+The checker used to count passes, fails and skips by scanning its results list every
+time a count was asked for, which means the whole list has to be kept and every
+counter costs a pass over it.  BlickRunStats is fed each result once as it is yielded,
+so the counts, the breakdowns by tag, phase, level and module and the runtime figures
+are all there even when the results were streamed to a sink and dropped.
+"""
+from collections import Counter
+from typing import Any, Iterable
+
+from .blick_result import BlickResult, overview_text, result_category
+
+
+class BlickCounts:
+    """Pass, fail and skip counts for one slice of a run (a tag, a module...)."""
+
+    __slots__ = ("total", "passed", "failed", "skipped")
+
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def add(self, result: BlickResult):
+        self.total += 1
+        if result.skipped:
+            self.skipped += 1
+        elif result.status:
+            self.passed += 1
+        else:
+            self.failed += 1
+
+    def as_dict(self) -> dict[str, int]:
+        return {"total": self.total, "passed": self.passed, "failed": self.failed, "skipped": self.skipped}
+
+
+class BlickRunStats:
+    """Running statistics of the results of a run."""
+
+    def __init__(self):
+        self.result_count = 0
+        self.pass_count = 0
+        self.fail_count = 0
+        self.skip_count = 0
+        self.warn_count = 0
+        self.except_count = 0
+        self.replay_count = 0
+        self.timeout_count = 0
+
+        # Results that were not a clean pass (failed, skipped or warned)
+        self.imperfect_count = 0
+
+        # Categories used by the overview line (skip, error, fail, warn, pass)
+        self.categories: Counter = Counter()
+
+        self.by_tag: dict[str, BlickCounts] = {}
+        self.by_phase: dict[str, BlickCounts] = {}
+        self.by_level: dict[int, BlickCounts] = {}
+        self.by_module: dict[str, BlickCounts] = {}
+
+        self.runtime_total = 0.0
+        self.runtime_min: float | None = None
+        self.runtime_max: float | None = None
+
+    @classmethod
+    def from_results(cls, results: Iterable[BlickResult]) -> "BlickRunStats":
+        """Work out the statistics of a list of results that is already there."""
+        stats = cls()
+        for result in results:
+            stats.add(result)
+        return stats
+
+    @staticmethod
+    def _slice(breakdown: dict, key) -> BlickCounts:
+        counts = breakdown.get(key)
+        if counts is None:
+            counts = breakdown[key] = BlickCounts()
+        return counts
+
+    def add(self, result: BlickResult):
+        """Count one result."""
+        self.result_count += 1
+        if result.skipped:
+            self.skip_count += 1
+        elif result.status:
+            self.pass_count += 1
+        else:
+            self.fail_count += 1
+        if result.warn_msg:
+            self.warn_count += 1
+        if result.except_:
+            self.except_count += 1
+        if result.replayed:
+            self.replay_count += 1
+        if result.timed_out:
+            self.timeout_count += 1
+        if not result.status or result.skipped or result.warn_msg:
+            self.imperfect_count += 1
+        self.categories[result_category(result)] += 1
+
+        self._slice(self.by_tag, result.tag).add(result)
+        self._slice(self.by_phase, result.phase).add(result)
+        self._slice(self.by_level, result.level).add(result)
+        self._slice(self.by_module, result.module_name).add(result)
+
+        runtime = result.runtime_sec
+        self.runtime_total += runtime
+        if self.runtime_min is None or runtime < self.runtime_min:
+            self.runtime_min = runtime
+        if self.runtime_max is None or runtime > self.runtime_max:
+            self.runtime_max = runtime
+
+    @property
+    def clean_run(self) -> bool:
+        """No exceptions"""
+        return self.except_count == 0
+
+    @property
+    def perfect_run(self) -> bool:
+        """No fails, skips or warnings"""
+        return self.imperfect_count == 0
+
+    @property
+    def runtime_mean(self) -> float:
+        """Mean runtime of a result, 0 with no results"""
+        return self.runtime_total / self.result_count if self.result_count else 0.0
+
+    def overview(self) -> str:
+        """The same line as blick.overview(results), without the results."""
+        return overview_text(self.result_count, self.categories)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Everything as plain data for json output."""
+        return {
+            "result_count": self.result_count,
+            "pass_count": self.pass_count,
+            "fail_count": self.fail_count,
+            "skip_count": self.skip_count,
+            "warn_count": self.warn_count,
+            "except_count": self.except_count,
+            "replay_count": self.replay_count,
+            "timeout_count": self.timeout_count,
+            "clean_run": self.clean_run,
+            "perfect_run": self.perfect_run,
+            "by_tag": {k: v.as_dict() for k, v in self.by_tag.items()},
+            "by_phase": {k: v.as_dict() for k, v in self.by_phase.items()},
+            "by_level": {k: v.as_dict() for k, v in self.by_level.items()},
+            "by_module": {k: v.as_dict() for k, v in self.by_module.items()},
+            "runtime_total_sec": self.runtime_total,
+            "runtime_min_sec": self.runtime_min,
+            "runtime_max_sec": self.runtime_max,
+            "runtime_mean_sec": self.runtime_mean,
+        }
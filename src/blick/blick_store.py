@@ -0,0 +1,360 @@
+"""
+Keep the results of a very large run as columns rather than objects.
+
+A list of BlickResult objects costs a couple of hundred bytes per result before the
+messages are counted.  BlickResultStore keeps one compact array per field instead:
+
+- status, skipped and a few flags as bytes, weight and runtime as doubles.
+- The function attributes (ruid, tag, phase, level, module, doc...) as an index into a
+  table of the BlickResultMeta records the results share, so every result pays 4 bytes
+  for all of them.
+- msg, info_msg and warn_msg appended to one text buffer, with an array of offsets.
+- The renderer of each result as an index into a table of renderers, so msg_rendered is
+  still rendered when it is first read.
+- Exceptions, tracebacks and mitigations, which most results don't have, in side tables.
+
+Counting, scoring, filtering and grouping run over the columns (and the small meta
+table) without making BlickResult objects.  Iterating or indexing the store makes
+results on the fly, so they are copies and changing them doesn't change the store.
+
+    checker = BlickChecker(packages=[...], result_store=True, auto_setup=True)
+    checker.run_all()
+    checker.results.fails_only().group_by(["tag"])
+"""
+from array import array
+from collections import Counter
+from itertools import compress
+from typing import Any, Iterable, Iterator, Sequence, overload
+
+from .blick_exception import BlickException
+from .blick_result import META_FIELDS, BlickResult, BlickResultMeta, overview_text
+
+# Bits of the flags column
+_SUMMARY = 1
+_TIMED_OUT = 2
+_REPLAYED = 4
+
+# status is True, False or None
+_STATUS_CODES = {True: 1, False: 0, None: 2}
+_STATUSES = (False, True, None)
+
+
+class BlickResultStore(Sequence[BlickResult]):
+    """
+    A column store of results.  It is a sequence, so len, indexing and iteration work
+    like a list of results (made on the fly), and it has vectorized versions of the
+    result filters, group_by, overview and scoring.
+    """
+
+    def __init__(self, results: Iterable[BlickResult] = ()):
+        self.status = array("b")
+        self.skipped = array("b")
+        self.flags = array("b")
+        self.weight = array("d")
+        self.runtime_sec = array("d")
+        self.count = array("q")
+        self.meta_index = array("I")
+
+        # Start of msg, info_msg and warn_msg of each result, plus one final end offset
+        self.offsets = array("Q", [0])
+        self._text = ""
+        self._pending: list[str] = []
+        self._length = 0
+
+        # The shared function records, interned
+        self.metas: list[BlickResultMeta] = []
+        self._meta_ids: dict[BlickResultMeta, int] = {}
+
+        # The renderers of the results (usually just the checker's), interned by identity
+        self.renderer_index = array("I")
+        self.renderers: list[Any] = []
+        self._renderer_ids: dict[int, int] = {}
+
+        # Rarely set, so kept by row
+        self.errors: dict[int, tuple[Exception | None, str]] = {}
+        self.mitigations: dict[int, tuple[str, list[str]]] = {}
+        self.rendered: dict[int, str] = {}
+
+        self.extend(results)
+
+    def _intern(self, meta: BlickResultMeta) -> int:
+        index = self._meta_ids.get(meta)
+        if index is None:
+            index = self._meta_ids[meta] = len(self.metas)
+            self.metas.append(meta)
+        return index
+
+    def _intern_renderer(self, renderer) -> int:
+        index = self._renderer_ids.get(id(renderer))
+        if index is None or self.renderers[index] is not renderer:
+            index = self._renderer_ids[id(renderer)] = len(self.renderers)
+            self.renderers.append(renderer)
+        return index
+
+    def _add_text(self, text: str):
+        text = text or ""
+        self._pending.append(text)
+        self._length += len(text)
+        self.offsets.append(self._length)
+
+    def append(self, result: BlickResult):
+        """Add a result to the end of the store."""
+        row = len(self.status)
+        self.status.append(_STATUS_CODES[result.status if result.status is None else bool(result.status)])
+        self.skipped.append(bool(result.skipped))
+        self.flags.append((_SUMMARY if result.summary_result else 0) |
+                          (_TIMED_OUT if result.timed_out else 0) |
+                          (_REPLAYED if result.replayed else 0))
+        self.weight.append(result.weight)
+        self.runtime_sec.append(result.runtime_sec)
+        self.count.append(result.count)
+        self.meta_index.append(self._intern(result.meta))
+
+        # Keep the renderer so msg_rendered is rendered like it would have been, a rendered
+        # message is only kept when it was set without a renderer (read back from a cache).
+        renderer = result._renderer  # pylint: disable=protected-access
+        self.renderer_index.append(self._intern_renderer(renderer))
+        if renderer is None and result.msg_rendered != result.msg:
+            self.rendered[row] = result.msg_rendered
+
+        self._add_text(result.msg)
+        self._add_text(result.info_msg)
+        self._add_text(result.warn_msg)
+
+        if result.except_ is not None or result.traceback:
+            self.errors[row] = (result.except_, result.traceback)
+        if result.mit_msg or result.owner_list:
+            self.mitigations[row] = (result.mit_msg, list(result.owner_list))
+
+    def extend(self, results: Iterable[BlickResult]):
+        for result in results:
+            self.append(result)
+
+    @property
+    def text(self) -> str:
+        """All the messages in one string, sliced up by offsets."""
+        if self._pending:
+            self._text += "".join(self._pending)
+            self._pending = []
+        return self._text
+
+    def _message(self, row: int, which: int) -> str:
+        start = self.offsets[3 * row + which]
+        return self.text[start:self.offsets[3 * row + which + 1]]
+
+    def __len__(self) -> int:
+        return len(self.status)
+
+    @overload
+    def __getitem__(self, index: int) -> BlickResult: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "BlickResultStore": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.select(range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("result store index out of range")
+        return self._result(index)
+
+    def __iter__(self) -> Iterator[BlickResult]:
+        for row in range(len(self)):
+            yield self._result(row)
+
+    def __eq__(self, other):
+        if isinstance(other, (BlickResultStore, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self)} results)"
+
+    def _result(self, row: int) -> BlickResult:
+        """Make the result object for a row."""
+        flags = self.flags[row]
+        except_, traceback = self.errors.get(row, (None, ""))
+        mit_msg, owner_list = self.mitigations.get(row, ("", None))
+        result = BlickResult(status=_STATUSES[self.status[row]],
+                           msg=self._message(row, 0),
+                           info_msg=self._message(row, 1),
+                           warn_msg=self._message(row, 2),
+                           runtime_sec=self.runtime_sec[row],
+                           except_=except_,
+                           traceback=traceback,
+                           skipped=bool(self.skipped[row]),
+                           weight=self.weight[row],
+                           count=self.count[row],
+                           mit_msg=mit_msg,
+                           owner_list=list(owner_list) if owner_list else None,
+                           summary_result=bool(flags & _SUMMARY),
+                           timed_out=bool(flags & _TIMED_OUT),
+                           replayed=bool(flags & _REPLAYED),
+                           meta=self.metas[self.meta_index[row]])
+        result.render_with(self.renderers[self.renderer_index[row]])
+        if row in self.rendered:
+            result.msg_rendered = self.rendered[row]
+        return result
+
+    # Columns
+
+    def column(self, name: str) -> Sequence[Any]:
+        """
+        The values of one field for every row.  Function attributes are looked up once per
+        meta record, not once per row.
+        """
+        if name in META_FIELDS:
+            values = [getattr(meta, name) for meta in self.metas]
+            return [values[i] for i in self.meta_index]
+        if name == "status":
+            return [_STATUSES[s] for s in self.status]
+        if name in ("skipped", "weight", "runtime_sec", "count"):
+            return getattr(self, name)
+        if name in ("summary_result", "timed_out", "replayed"):
+            bit = {"summary_result": _SUMMARY, "timed_out": _TIMED_OUT, "replayed": _REPLAYED}[name]
+            return [bool(f & bit) for f in self.flags]
+        if name in ("msg", "info_msg", "warn_msg"):
+            which = ("msg", "info_msg", "warn_msg").index(name)
+            return [self._message(row, which) for row in range(len(self))]
+        if name == "msg_rendered":
+            return [result.msg_rendered for result in self]
+        if name in ("except_", "traceback"):
+            which = 0 if name == "except_" else 1
+            default = None if name == "except_" else ""
+            return [self.errors[row][which] if row in self.errors else default for row in range(len(self))]
+        if name in ("mit_msg", "owner_list"):
+            which = 0 if name == "mit_msg" else 1
+            default = "" if name == "mit_msg" else []
+            return [self.mitigations[row][which] if row in self.mitigations else default
+                    for row in range(len(self))]
+        raise BlickException(f"Results have no field '{name}'.")
+
+    def _has_warning(self) -> list[bool]:
+        offsets = self.offsets
+        return [offsets[3 * row + 3] > offsets[3 * row + 2] for row in range(len(self))]
+
+    def _has_info(self) -> list[bool]:
+        offsets = self.offsets
+        return [offsets[3 * row + 2] > offsets[3 * row + 1] for row in range(len(self))]
+
+    def select(self, rows: Iterable[int]) -> "BlickResultStore":
+        """A new store holding the given rows, in that order.  The meta table is shared."""
+        store = BlickResultStore()
+        store.metas = self.metas
+        store._meta_ids = self._meta_ids
+        store.renderers = self.renderers
+        store._renderer_ids = self._renderer_ids
+        text = self.text
+        offsets = self.offsets
+        pieces = []
+        for row in rows:
+            new_row = len(store.status)
+            store.status.append(self.status[row])
+            store.skipped.append(self.skipped[row])
+            store.flags.append(self.flags[row])
+            store.weight.append(self.weight[row])
+            store.runtime_sec.append(self.runtime_sec[row])
+            store.count.append(self.count[row])
+            store.meta_index.append(self.meta_index[row])
+            store.renderer_index.append(self.renderer_index[row])
+
+            base = offsets[3 * row]
+            shift = store._length - base
+            for which in (1, 2, 3):
+                store.offsets.append(offsets[3 * row + which] + shift)
+            pieces.append(text[base:offsets[3 * row + 3]])
+            store._length += offsets[3 * row + 3] - base
+
+            if row in self.errors:
+                store.errors[new_row] = self.errors[row]
+            if row in self.mitigations:
+                store.mitigations[new_row] = self.mitigations[row]
+            if row in self.rendered:
+                store.rendered[new_row] = self.rendered[row]
+        store._text = "".join(pieces)
+        return store
+
+    def mask(self, keep: Iterable[bool]) -> "BlickResultStore":
+        """A new store holding the rows where keep is true."""
+        return self.select(compress(range(len(self)), keep))
+
+    # Vectorized versions of the result filters in blick_result
+
+    def passes_only(self) -> "BlickResultStore":
+        """Only results that have pass status"""
+        return self.mask(s == 1 for s in self.status)
+
+    def fails_only(self) -> "BlickResultStore":
+        """Only results that did not pass"""
+        return self.mask(s != 1 for s in self.status)
+
+    def remove_info(self) -> "BlickResultStore":
+        """Drop results that have an info message"""
+        return self.mask(not info for info in self._has_info())
+
+    def warn_as_fail(self) -> "BlickResultStore":
+        """Results with a warning message count as failures (changed in place)."""
+        for row, warned in enumerate(self._has_warning()):
+            if warned:
+                self.status[row] = 0
+        return self
+
+    def where(self, **conditions: Any) -> "BlickResultStore":
+        """
+        Results whose fields equal the given values, store.where(tag="fs", status=False).
+        Conditions on function attributes are checked once per meta record.
+        """
+        keep = [True] * len(self)
+        for name, value in conditions.items():
+            if name in META_FIELDS:
+                matches = [getattr(meta, name) == value for meta in self.metas]
+                keep = [k and matches[m] for k, m in zip(keep, self.meta_index)]
+            else:
+                keep = [k and v == value for k, v in zip(keep, self.column(name))]
+        return self.mask(keep)
+
+    def group_by(self, keys: Sequence[str]) -> dict[Any, Any]:
+        """
+        Group the results like blick_result.group_by, with stores rather than lists at the
+        bottom level.
+        """
+        if not keys:
+            raise BlickException("Empty key list for grouping results.")
+
+        groups: dict[Any, list[int]] = {}
+        for row, value in enumerate(self.column(keys[0])):
+            groups.setdefault(value, []).append(row)
+
+        grouped = {}
+        for value in sorted(groups):
+            store = self.select(groups[value])
+            grouped[value] = store.group_by(keys[1:]) if len(keys) > 1 else store
+        return grouped
+
+    def categories(self) -> Counter:
+        """Overview categories (skip, error, fail, warn, pass) counted from the columns."""
+        warned = self._has_warning()
+        counts: Counter = Counter()
+        for row, (status, skipped) in enumerate(zip(self.status, self.skipped)):
+            counts['skip' if skipped else
+                   'error' if row in self.errors and self.errors[row][0] is not None else
+                   'fail' if status != 1 else
+                   'warn' if warned[row] else
+                   'pass'] += 1
+        return counts
+
+    def overview(self) -> str:
+        """Same as blick_result.overview"""
+        return overview_text(len(self), self.categories())
+
+    def function_keys(self) -> list[tuple[str, str, str]]:
+        """(pkg_name, module_name, func_name) for every row, looked up per meta record."""
+        keys = [(meta.pkg_name, meta.module_name, meta.func_name) for meta in self.metas]
+        return [keys[m] for m in self.meta_index]
+
+    def as_dicts(self) -> list[dict[str, Any]]:
+        """The as_dict of every result."""
+        return [result.as_dict() for result in self]
+
@@ -1,6 +1,11 @@
 """
 This is the sad place for lonely functions that don't have a place
 """
+import json
+import os
+import pathlib
+import tempfile
+from typing import Any
 
 
 def str_to_bool(s: str, default=None) -> bool:
@@ -66,3 +71,23 @@ def any_to_int_list(param: str | list[int] | None, sep=' ') -> list[int]:
         return [int(x) for x in param]
 
     raise ValueError(f'Invalid parameter type in {param}, expected all integers.')
+
+
+def write_json_atomic(path: str | pathlib.Path, data: Any, **kwargs) -> None:
+    """
+    Write data to a JSON file without ever leaving half a file behind.
+
+    The data is written to a temp file in the same folder and then moved over the
+    target, so a reader sees either the old file or the new one.  Extra kwargs go
+    to json.dump.
+    """
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, **kwargs)
+        os.replace(tmp_name, path)
+    except BaseException:
+        pathlib.Path(tmp_name).unlink(missing_ok=True)
+        raise
@@ -64,11 +64,16 @@ async def get_result_header():
 
 
 def prep_rules():
-    """Reload all the rules to make sure we are in a good state. If this was used
-       in high bandwidth situation this could be cached."""
+    """Make sure the checker is set up.  The rules were collected and indexed (checker.catalog) when the
+       checker was set, so each request is answered from the index rather than collecting them again."""
     checker_ok()
-    __blick_checker.pre_collect()
-    __blick_checker.prepare()
+    if not __blick_checker.pre_collected:
+        prepare_blick()
+
+
+def match_rules(positions: set[int]) -> list:
+    """The prepared functions at these catalog positions, in run order."""
+    return __blick_checker.catalog.pick(positions, __blick_checker.collected)
 
 
 def run_matched(matched_funcs, var) -> dict:
@@ -79,11 +84,17 @@ def run_matched(matched_funcs, var) -> dict:
     if not matched_funcs:
         raise_400(msg=f"No matched functions found for {var}")
 
-    # WHen you run_all here the result is stored in the checker object.
-    __blick_checker.collected = matched_funcs
-    __blick_checker.run_all()
-
-    return __blick_checker.as_dict()
+    # WHen you run_all here the result is stored in the checker object.  The prepared functions
+    # are put back afterward so the next request picks from all of them.  The lock keeps a
+    # scheduler sharing the checker (blicker watch --api) from running a batch in between.
+    with __blick_checker.run_lock:
+        prepared = __blick_checker.collected
+        __blick_checker.collected = matched_funcs
+        try:
+            __blick_checker.run_all()
+            return __blick_checker.as_dict()
+        finally:
+            __blick_checker.collected = prepared
 
 
 @app.get("/blick/all")
@@ -91,8 +102,9 @@ async def check_all() -> dict:
     """Run the whole blick ruleset (careful with timeouts)"""
     checker_ok()
 
-    __blick_checker.run_all()
-    return __blick_checker.as_dict()
+    with __blick_checker.run_lock:
+        __blick_checker.run_all()
+        return __blick_checker.as_dict()
 
 
 @app.get("/blick/rule_id_re/{rule_id}")
@@ -111,7 +123,9 @@ async def check_rule_id_regular_expression(rule_id: str):
     print(response.json())
     """
     prep_rules()
-    matched_funcs = [func for func in __blick_checker.collected if re.match(rule_id, func.ruid)]
+    catalog = __blick_checker.catalog
+    matched_funcs = match_rules(catalog.lookup("ruid", [ruid for ruid in catalog.values("ruid")
+                                                        if re.match(rule_id, ruid)]))
     return run_matched(matched_funcs, f"{rule_id=}")
 
 
@@ -132,7 +146,7 @@ async def check_rule_ids(rule_ids: str) -> dict:
     """
     prep_rules()
     rule_ids = [rule_id.strip() for rule_id in rule_ids.replace(",", " ").split()]
-    matched_funcs = [func for func in __blick_checker.collected if func.ruid in rule_ids]
+    matched_funcs = match_rules(__blick_checker.catalog.lookup("ruid", rule_ids))
     return run_matched(matched_funcs, f"{rule_ids=}")
 
 
@@ -159,7 +173,7 @@ async def check_tags(tags: str) -> dict:
     """
     prep_rules()
     tags = [tag.strip() for tag in tags.replace(",", " ").split()]
-    matched_funcs = [func for func in __blick_checker.collected if func.tag in tags]
+    matched_funcs = match_rules(__blick_checker.catalog.lookup("tag", tags))
     return run_matched(matched_funcs, f"{tags=}")
 
 
@@ -194,9 +208,8 @@ async def check_level_range(
         print(response.json())
     """
 
-    low, high = low or -1000000, high or 1000000
     prep_rules()
-    matched_funcs = [func for func in __blick_checker.collected if low <= func.level <= high]
+    matched_funcs = match_rules(__blick_checker.catalog.level_range(low, high))
     return run_matched(matched_funcs, f"{low=} {high=}")
 
 
@@ -215,7 +228,7 @@ async def check_phase(phases: str) -> dict:
     """
     prep_rules()
     phases = [phase.strip() for phase in phases.replace(" ", "").split(",")]
-    matched_funcs = [func for func in __blick_checker.collected if func.phase in phases]
+    matched_funcs = match_rules(__blick_checker.catalog.lookup("phase", phases))
     return run_matched(matched_funcs, f"{phases=}")
 
 
@@ -1,6 +1,9 @@
 """Trivial Typer App to run Blick checks on a given target."""
 
+import contextlib
+import datetime as dt
 import json
+import os
 import pathlib
 import sys
 
@@ -46,8 +49,53 @@ def pretty_print_json(json_obj):
     return pretty_json
 
 
-@app.command()
+def write_run(run: dict, run_file: str):
+    """Write a whole run (header and results) to a JSON file."""
+    with open(run_file, 'w', encoding='utf-8') as f:
+        json.dump(run, f, indent=2, default=str)
+
+
+def parse_address(address: str):
+    """host:port for TCP, anything else is the path of a Unix socket."""
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit():
+        return host, int(port)
+    return address
+
+
+def authkey() -> bytes:
+    """Coordinators and workers share a key from the BLICK_AUTHKEY environment variable."""
+    key = os.environ.get('BLICK_AUTHKEY')
+    if not key:
+        raise blick.BlickException('Set BLICK_AUTHKEY to the same secret on the coordinator and workers.')
+    return key.encode()
+
+
+def load_targets(module: str | None, pkg: str | None):
+    """Turn the module file and package folder options into blick objects."""
+    mod = None
+    if module:
+        target_path = pathlib.Path(module)
+        if target_path.is_file():
+            mod = blick.BlickModule(module_name=target_path.stem, module_file=str(target_path))
+        else:
+            typer.echo(f'Invalid module: {module} is not a file.')
+
+    if pkg:
+        folder = pathlib.Path(pkg)
+        if folder.is_dir():
+            pkg = blick.BlickPackage(folder=folder)
+        else:
+            typer.echo(f'Invalid package: {pkg} is not a folder.')
+            pkg = None
+
+    return mod, pkg
+
+
+# The callback runs the checks when no command is given, so `blicker --pkg folder` works like it always has.
+@app.callback(invoke_without_command=True)
 def run_checks(
+        ctx: typer.Context,
         module: str = typer.Option(None, '-m', '--mod', help='The module to run rules against.'),
         pkg: str = typer.Option(None, '--pkg', help='The package to run rules against.'),
         json_file: str = typer.Option(None, '-j', '--json', help='The JSON file to write results to.'),
@@ -56,34 +104,59 @@ def run_checks(
         api: bool = typer.Option(False, '-a', '--api', help='Start FastAPI.'),
         port: int = typer.Option(8000, '-p', '--port', help='FastAPI Port'),
         verbose: bool = typer.Option(False, '-v', '--verbose', help='Enable verbose output.'),
+        jobs: int = typer.Option(1, '--jobs', help='Number of threads used to run rules.'),
+        deadline: float = typer.Option(None, '--deadline', help='Seconds the whole run may take.'),
+        order: str = typer.Option('file_order', '--order',
+                                  help='Rule order: file_order, longest_first or fail_first.'),
+        history_file: str = typer.Option(None, '--history', help='Stats file used to order rules.'),
+        shard_history_file: str = typer.Option(None, '--shard-history',
+                                               help='Stats file every shard reads to balance the shards.'),
+        incremental_file: str = typer.Option(None, '--incremental',
+                                             help='State file, only rules whose inputs changed are run.'),
+        cache_file: str = typer.Option(None, '--cache', help='SQLite file that keeps TTL results between runs.'),
+        shard_index: int = typer.Option(None, '--shard-index', help='Which shard of the rules to run (0 based).'),
+        shard_count: int = typer.Option(None, '--shard-count', help='How many shards the rules are split into.'),
+        run_file: str = typer.Option(None, '--run-file', help='JSON file for the whole run, used by merge.'),
+        coordinator_address: str = typer.Option(None, '--coordinator',
+                                                help='host:port (or socket path) to hand rules to workers on.'),
 ):
     """Run Blick checks on a given package or module from command line."""
+    if ctx.invoked_subcommand is not None:
+        return
 
     try:
-        mod = None
-        if module:
-            target_path = pathlib.Path(module)
-            if target_path.is_file():
-                mod = blick.BlickModule(module_name=target_path.stem, module_file=str(target_path))
-            else:
-                typer.echo(f'Invalid module: {module} is not a file.')
-
-        if pkg:
-            folder = pathlib.Path(pkg)
-            if folder.is_dir():
-                pkg = blick.BlickPackage(folder=folder)
-            else:
-                typer.echo(f'Invalid package: {pkg} is not a folder.')
+        mod, pkg = load_targets(module, pkg)
+
+        # Past runtimes and fails are used to pick the rule order and updated after the run.
+        history = blick.BlickHistory.load(history_file) if history_file else None
+
+        # Every shard has to balance on the same numbers, so this one is only read.  Updating
+        # it with one shard's results would give each node a different split.
+        shard_history = blick.BlickHistory.load(shard_history_file) if shard_history_file else None
+        order_strategy = blick.OrderStrategy.strategy_factory(order, history)
+        incremental = blick.BlickIncremental.load(incremental_file) if incremental_file else None
+        cache = blick.BlickSqliteCache(cache_file) if cache_file else None
 
         # If they supply 1 or both they are all run since the checker can handle arbitrary combinations
         if mod or pkg:
-            ch = blick.BlickChecker(modules=mod, packages=pkg, auto_setup=True)
-            if api:
-                blick_api.set_blick_checker(ch)
-                uvicorn.run(blick_api.app, host='localhost', port=port)
-                return
-            else:
+            # The coordinator serves the run (or every API request) and stops the workers when it closes
+            with (blick.BlickCoordinator(parse_address(coordinator_address), authkey())
+                  if coordinator_address else contextlib.nullcontext()) as coordinator:
+                ch = blick.BlickChecker(modules=mod, packages=pkg, auto_setup=True, max_workers=jobs,
+                                        run_deadline=deadline, order_strategy=order_strategy,
+                                        incremental=incremental, cache=cache,
+                                        shard_index=shard_index, shard_count=shard_count,
+                                        shard_history=shard_history, coordinator=coordinator)
+                if api:
+                    blick_api.set_blick_checker(ch)
+                    uvicorn.run(blick_api.app, host='localhost', port=port)
+                    return
                 results = ch.run_all()
+            if history:
+                history.update(results)
+                history.save()
+            if run_file:
+                write_run(ch.as_dict(), run_file)
         else:
             typer.echo('Please provide a module, package to run checks on.')
             return
@@ -102,7 +175,7 @@ def run_checks(
         if verbose:
             dump_results(results)
         else:
-            typer.echo(blick.overview(results))
+            typer.echo(ch.stats.overview())
 
         if score:
             test_score = blick.ScoreByResult()
@@ -121,5 +194,99 @@ def run_checks(
         typer.echo(f'An error occurred: {e}')
 
 
+@app.command()
+def watch(
+        module: str = typer.Option(None, '-m', '--mod', help='The module to run rules against.'),
+        pkg: str = typer.Option(None, '--pkg', help='The package to run rules against.'),
+        interval: float = typer.Option(blick.blick_scheduler.DEFAULT_INTERVAL_MIN, '-i', '--interval',
+                                       help='Minutes between runs for rules with no interval or ttl_minutes.'),
+        api: bool = typer.Option(False, '-a', '--api', help='Start FastAPI next to the scheduler.'),
+        port: int = typer.Option(8000, '-p', '--port', help='FastAPI Port'),
+        verbose: bool = typer.Option(False, '-v', '--verbose', help='Show passing results too.'),
+        jobs: int = typer.Option(1, '--jobs', help='Number of threads used to run rules.'),
+        cache_file: str = typer.Option(None, '--cache', help='SQLite file that keeps TTL results between runs.'),
+):
+    """Keep the rules loaded and run each one on its own interval until stopped."""
+
+    def show(function_, results):
+        for result in results:
+            if verbose or result.status is not True:
+                typer.echo(f'{dt.datetime.now():%H:%M:%S} {function_.function_name}: {result}')
+
+    try:
+        mod, pkg = load_targets(module, pkg)
+        if not (mod or pkg):
+            typer.echo('Please provide a module, package to run checks on.')
+            return
+
+        cache = blick.BlickSqliteCache(cache_file) if cache_file else None
+        ch = blick.BlickChecker(modules=mod, packages=pkg, auto_setup=True, max_workers=jobs, cache=cache)
+        scheduler = blick.BlickScheduler(ch, default_interval_min=interval, on_results=show)
+
+        if api:
+            # The API reports from the checker, which the scheduler keeps up to date
+            blick_api.set_blick_checker(ch)
+            scheduler.start_thread()
+            uvicorn.run(blick_api.app, host='localhost', port=port)
+        else:
+            scheduler.run_forever()
+
+    except KeyboardInterrupt:
+        typer.echo('Stopped.')
+
+    except blick.BlickException as e:
+        typer.echo(f'BlickException: {e}')
+
+
+@app.command()
+def worker(
+        address: str = typer.Argument(..., help='host:port (or socket path) of the coordinator.'),
+):
+    """Run rules handed out by a coordinator (blicker --coordinator) until it is done."""
+    try:
+        blick.BlickWorker(parse_address(address), authkey()).run()
+    except KeyboardInterrupt:
+        typer.echo('Stopped.')
+    except blick.BlickException as e:
+        typer.echo(f'BlickException: {e}')
+    except OSError as e:
+        typer.echo(f'Could not reach the coordinator at {address}: {e}')
+
+
+@app.command()
+def merge(
+        run_files: list[str] = typer.Argument(..., help='Run files written by each shard with --run-file.'),
+        output: str = typer.Option(None, '-o', '--output', help='JSON file to write the merged run to.'),
+        score_strategy: str = typer.Option(None, '--score-strategy',
+                                           help='Score strategy name, defaults to the one the shards used.'),
+        verbose: bool = typer.Option(False, '-v', '--verbose', help='Enable verbose output.'),
+):
+    """Merge the run files from several shards into one run."""
+    try:
+        runs = []
+        for run_file in run_files:
+            with open(run_file, encoding='utf-8') as f:
+                runs.append(json.load(f))
+
+        strategy = blick.ScoreStrategy.strategy_factory(score_strategy) if score_strategy else None
+        merged = blick.merge_runs(runs, strategy)
+
+        results = [blick.BlickResult.from_dict(d) for d in merged['results']]
+        if verbose:
+            dump_results(results)
+        else:
+            typer.echo(blick.overview(results))
+        typer.echo(f"Score: {merged['score']:.1f}")
+
+        if output:
+            write_run(merged, output)
+
+    except (OSError, ValueError) as e:
+        typer.echo(f'Could not read run file: {e}')
+
+    except blick.BlickException as e:
+        typer.echo(f'BlickException: {e}')
+
+
 if __name__ == '__main__':
     app()
@@ -0,0 +1,147 @@
+"""
+Microbenchmark of the framework overhead per result.
+
+The rules here do next to nothing, so the time is what blick spends around them: looking
+up arguments, attaching the meta record, running the hooks, stats, scoring and progress.
+Each case is timed with the functions working everything out on every call (how functions
+run outside of a checker, and how every run worked before the compiled plan) and with the
+plan that prepare() compiles bound to the environment.  The "bare" column is the rules called
+directly, without blick, so the other columns can be read as absolute numbers next to it.
+
+Run from the test folder:
+
+    python bench_overhead.py
+
+To compare with an older version of blick, check it out somewhere and pass its folder, the
+same cases are then timed on it (in a separate process) and printed as a second row:
+
+    git worktree add /tmp/blick-base <commit>
+    python bench_overhead.py --baseline /tmp/blick-base
+"""
+import argparse
+import inspect
+import json
+import os
+import subprocess
+import sys
+import time
+
+from src import blick
+
+RESULTS_PER_RULE = 10_000
+RULES = 2_000
+REPEAT = 5
+
+
+def check_many(value, limit=10):
+    for _ in range(RESULTS_PER_RULE):
+        yield blick.BlickResult(status=value < limit)
+
+
+def check_one(value, limit=10):
+    return value < limit
+
+
+def _best_us_per_result(run, results: int) -> float:
+    """Best of REPEAT runs, in microseconds per result."""
+    best = min(_timed(run) for _ in range(REPEAT))
+    return best * 1e6 / results
+
+
+def _timed(run) -> float:
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def _call_all(functions: list[blick.BlickFunction]):
+    for function_ in functions:
+        for _ in function_():
+            pass
+
+
+def _call_bare(rules: list):
+    for rule in rules:
+        if inspect.isgeneratorfunction(rule):
+            for _ in rule(1):
+                pass
+        else:
+            rule(1)
+
+
+def bench_bare(rules: list, results: int) -> float:
+    """The rules called directly, the floor the framework overhead sits on."""
+    return _best_us_per_result(lambda: _call_bare(rules), results)
+
+
+def bench_calls(functions: list[blick.BlickFunction], results: int) -> tuple[float, float | None]:
+    """Call the functions the way a run does, without and with a bound plan (if there is a plan)."""
+    env = {"value": 1}
+    for function_ in functions:
+        function_.env = env
+    unbound = _best_us_per_result(lambda: _call_all(functions), results)
+
+    if not hasattr(blick, "BlickPlan"):
+        return unbound, None
+    blick.BlickPlan.compile(functions).bind(env)
+    bound = _best_us_per_result(lambda: _call_all(functions), results)
+    return unbound, bound
+
+
+def bench_run(functions: list[blick.BlickFunction], results: int) -> float:
+    """A whole checker run, the plan is bound at the start of every run."""
+    checker = blick.BlickChecker(check_functions=functions, env={"value": 1}, auto_setup=True)
+    if "keep_results" in inspect.signature(checker.run_all).parameters:
+        return _best_us_per_result(lambda: checker.run_all(keep_results=False), results)
+    return _best_us_per_result(checker.run_all, results)
+
+
+def bench_cases() -> dict[str, list[float | None]]:
+    """[bare, no plan, plan, run_all] for every case, in microseconds per result."""
+    cases = [
+        (f"1 rule x {RESULTS_PER_RULE} results", [check_many], RESULTS_PER_RULE),
+        (f"{RULES} rules x 1 result", [check_one] * RULES, RULES),
+    ]
+    timings = {}
+    for name, rules, results in cases:
+        bare = bench_bare(rules, results)
+        unbound, bound = bench_calls([blick.BlickFunction(rule) for rule in rules], results)
+        run = bench_run([blick.BlickFunction(rule) for rule in rules], results)
+        timings[name] = [bare, unbound, bound, run]
+    return timings
+
+
+def bench_baseline(folder: str) -> dict[str, list[float | None]]:
+    """The same cases timed on the blick checked out in folder, in a process of its own."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.join(folder, "src"), folder]))
+    done = subprocess.run([sys.executable, os.path.abspath(__file__), "--json"], env=env,
+                          capture_output=True, text=True, check=True)
+    return json.loads(done.stdout)
+
+
+def _cell(value: float | None) -> str:
+    return f"{'-':>10}" if value is None else f"{value:>10.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--baseline", help="Folder of another blick checkout to time as well.")
+    parser.add_argument("--json", action="store_true", help="Print the timings as JSON.")
+    args = parser.parse_args()
+
+    timings = bench_cases()
+    if args.json:
+        print(json.dumps(timings))
+        return
+    rows = [("this tree", timings)]
+    if args.baseline:
+        rows.append(("baseline", bench_baseline(args.baseline)))
+
+    print(f"{'case':<28}{'tree':<12}{'bare':>10}{'no plan':>10}{'plan':>10}{'run_all':>10}   (us per result)")
+    for name in timings:
+        for tree, tree_timings in rows:
+            print(f"{name:<28}{tree:<12}" + "".join(_cell(value) for value in tree_timings[name]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Check functions used to verify running rules on remote workers."""
+import threading
+import time
+
+from src import blick
+
+
+def _slow(value):
+    time.sleep(0.05)
+    return blick.BlickResult(status=value == 42, msg=threading.current_thread().name)
+
+
+@blick.attributes(ruid="dist_1")
+def check_dist_1(value):
+    return _slow(value)
+
+
+@blick.attributes(ruid="dist_2")
+def check_dist_2(value):
+    return _slow(value)
+
+
+@blick.attributes(ruid="dist_3")
+def check_dist_3(value):
+    return _slow(value)
+
+
+@blick.attributes(ruid="dist_4")
+def check_dist_4(value):
+    return _slow(value)
+
+
+@blick.attributes(ruid="dist_5")
+def check_dist_5(value):
+    return _slow(value)
+
+
+@blick.attributes(ruid="dist_6")
+def check_dist_6(value):
+    return _slow(value)
+
+
+@blick.attributes(ruid="dist_base")
+def check_dist_base():
+    """Fails, so the rule that depends on it is skipped"""
+    return blick.BlickResult(status=False, msg=threading.current_thread().name)
+
+
+@blick.attributes(ruid="dist_dependent", depends_on="dist_base")
+def check_dist_dependent():
+    return blick.BlickResult(status=True, msg=threading.current_thread().name)
+
+
+@blick.attributes(ruid="dist_exception")
+def check_dist_exception():
+    raise ValueError("Worker exception")
@@ -0,0 +1,23 @@
+"""Check functions used to verify the process executor."""
+import os
+
+from src import blick
+
+
+@blick.attributes(executor="process", ruid="proc_1")
+def check_in_process(value):
+    """Runs in a worker process"""
+    yield blick.BlickResult(status=value == 42, msg=f"{os.getpid()}")
+    yield blick.BlickResult(status=True, msg=f"{os.getpid()}")
+
+
+@blick.attributes(ruid="local_1")
+def check_in_checker():
+    """Runs in the checker process"""
+    return blick.BlickResult(status=True, msg=f"{os.getpid()}")
+
+
+@blick.attributes(executor="process", ruid="proc_2")
+def check_exception_in_process():
+    """Exceptions are handled in the worker just like they are locally"""
+    raise ValueError("Worker exception")
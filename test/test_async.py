@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import pytest
+
+from src import blick
+
+
+@pytest.fixture
+def async_funcs():
+    @blick.attributes(ruid="async_1")
+    async def coro_func():
+        await asyncio.sleep(0)
+        return blick.BR(status=True, msg="coroutine")
+
+    @blick.attributes(ruid="async_2")
+    async def agen_func():
+        for i in range(3):
+            await asyncio.sleep(0)
+            yield blick.BR(status=True, msg=f"agen {i}")
+
+    @blick.attributes(ruid="sync_1")
+    def sync_func():
+        yield blick.BR(status=True, msg="sync")
+
+    return [blick.BlickFunction(coro_func), blick.BlickFunction(agen_func), blick.BlickFunction(sync_func)]
+
+
+def test_async_function_flags(async_funcs):
+    assert async_funcs[0].is_coroutine and async_funcs[0].is_async
+    assert async_funcs[1].is_async_generator and async_funcs[1].is_async
+    assert not async_funcs[2].is_async
+
+
+def test_sync_call_of_async(async_funcs):
+    """Async rules still work from the normal synchronous api."""
+    results = list(async_funcs[1]())
+    assert [r.msg for r in results] == ["agen 0", "agen 1", "agen 2"]
+    assert [r.count for r in results] == [1, 2, 3]
+    assert all(r.func_name == "agen_func" for r in results)
+
+    ch = blick.BlickChecker(check_functions=async_funcs, auto_setup=True)
+    results = ch.run_all()
+    assert [r.msg for r in results] == ["coroutine", "agen 0", "agen 1", "agen 2", "sync"]
+
+
+def test_sync_call_inside_running_loop(async_funcs):
+    """A sync run started from async code (like a FastAPI endpoint) can't use asyncio.run directly."""
+    ch = blick.BlickChecker(check_functions=async_funcs, auto_setup=True)
+
+    async def endpoint():
+        return ch.run_all()
+
+    results = asyncio.run(endpoint())
+    assert len(results) == 5
+    assert ch.perfect_run
+
+
+def test_arun_all(async_funcs):
+    ch = blick.BlickChecker(check_functions=async_funcs, auto_setup=True)
+    results = asyncio.run(ch.arun_all())
+    assert [r.msg for r in results] == ["coroutine", "agen 0", "agen 1", "agen 2", "sync"]
+    assert ch.score == 100.0
+
+
+def test_arun_all_concurrency_limit():
+    """Many slow network style checks share the loop, but never more than max_concurrency at once."""
+    running = 0
+    max_running = 0
+
+    async def slow_check():
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.1)
+        running -= 1
+        return True
+
+    funcs = [blick.BlickFunction(slow_check) for _ in range(20)]
+    ch = blick.BlickChecker(check_functions=funcs, auto_setup=True)
+
+    start = time.time()
+    results = asyncio.run(ch.arun_all(max_concurrency=5))
+    elapsed = time.time() - start
+
+    assert len(results) == 20
+    assert all(r.status for r in results)
+    assert max_running == 5
+    # 4 rounds of 5, much faster than 20 serial sleeps
+    assert elapsed < 1.5
+
+    with pytest.raises(blick.BlickException):
+        asyncio.run(ch.arun_all(max_concurrency=0))
+
+
+def test_async_exceptions():
+    async def bad_coro():
+        raise ValueError("bad coro")
+
+    async def bad_agen():
+        yield blick.BR(status=True, msg="ok")
+        raise ValueError("bad agen")
+
+    funcs = [blick.BlickFunction(bad_coro), blick.BlickFunction(bad_agen)]
+    ch = blick.BlickChecker(check_functions=funcs, auto_setup=True)
+    results = asyncio.run(ch.arun_all())
+    assert len(results) == 3
+    assert isinstance(results[0].except_, ValueError)
+    assert results[1].status
+    assert isinstance(results[2].except_, ValueError)
+    assert results[2].count == 1
+
+
+def test_arun_all_abort_on_fail():
+    @blick.attributes(finish_on_fail=True)
+    async def fails():
+        yield blick.BR(status=False, msg="fail")
+        yield blick.BR(status=True, msg="never")
+
+    async def passes():
+        return True
+
+    funcs = [blick.BlickFunction(passes), blick.BlickFunction(fails), blick.BlickFunction(passes)]
+    ch = blick.BlickChecker(check_functions=funcs, auto_setup=True, abort_on_fail=True)
+    results = asyncio.run(ch.arun_all())
+    assert [r.status for r in results] == [True, False]
+
+
+def test_async_env():
+    async def uses_env(value):
+        return blick.BR(status=value == 42)
+
+    ch = blick.BlickChecker(check_functions=[blick.BlickFunction(uses_env)], env={"value": 42}, auto_setup=True)
+    assert asyncio.run(ch.arun_all())[0].status
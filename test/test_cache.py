@@ -0,0 +1,266 @@
+import multiprocessing
+import pathlib
+import time
+
+import pytest
+
+from src import blick
+
+
+@pytest.fixture(params=["memory", "sqlite", "file"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return blick.BlickMemoryCache()
+    if request.param == "sqlite":
+        return blick.BlickSqliteCache(tmp_path / "cache.db")
+    return blick.BlickFileCache(tmp_path / "cache")
+
+
+def test_get_put(cache):
+    assert cache.get("rule") is None
+    cache.put("rule", [blick.BR(status=True, msg="one"), blick.BR(status=False, msg="two")], time.time() + 60)
+    results = cache.get("rule")
+    assert [(r.status, r.msg) for r in results] == [(True, "one"), (False, "two")]
+    assert cache.get("other") is None
+
+    cache.delete("rule")
+    assert cache.get("rule") is None
+
+
+def test_expiry_and_sweep(cache):
+    # Persistent caches sweep on their first put, so put the expired entry second
+    cache.put("new", [blick.BR(status=True)], time.time() + 60)
+    cache.put("old", [blick.BR(status=True)], time.time() - 1)
+    assert cache.sweep() == 1
+    assert cache.sweep() == 0
+    assert cache.get("old") is None
+    assert cache.get("new") is not None
+
+    cache.clear()
+    assert cache.get("new") is None
+
+
+def test_replace(cache):
+    cache.put("rule", [blick.BR(status=True, msg="first")], time.time() + 60)
+    cache.put("rule", [blick.BR(status=True, msg="second")], time.time() + 60)
+    assert [r.msg for r in cache.get("rule")] == ["second"]
+
+
+def test_persistent_caches_survive_new_instances(tmp_path):
+    for make in (lambda: blick.BlickSqliteCache(tmp_path / "cache.db"),
+                 lambda: blick.BlickFileCache(tmp_path / "cache")):
+        make().put("rule", [blick.BR(status=True, msg="kept")], time.time() + 60)
+        assert make().get("rule")[0].msg == "kept"
+
+
+def test_file_cache_sweeps_on_put(tmp_path):
+    cache = blick.BlickFileCache(tmp_path, sweep_seconds=0)
+    cache.put("old", [blick.BR(status=True)], time.time() - 1)
+    cache.put("new", [blick.BR(status=True)], time.time() + 60)
+    assert len(list(tmp_path.glob("*.json"))) == 1
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def _put_from_process(path, key):
+    blick.BlickSqliteCache(path).put(key, [blick.BR(status=True, msg=key)], time.time() + 60)
+
+
+def test_sqlite_shared_between_processes(tmp_path):
+    path = tmp_path / "cache.db"
+    blick.BlickSqliteCache(path)
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_put_from_process, args=(path, f"rule_{i}")) for i in range(2)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+    cache = blick.BlickSqliteCache(path)
+    assert all(cache.get(f"rule_{i}")[0].msg == f"rule_{i}" for i in range(2))
+
+
+def test_ttl_survives_new_checker(tmp_path):
+    """Two checkers (think two cron runs) share the TTL results through a sqlite cache."""
+    f = pathlib.Path(tmp_path) / "exists.txt"
+    f.touch()
+    calls = []
+
+    @blick.attributes(ttl_minutes=1, ruid="exists")
+    def check_exists():
+        calls.append(1)
+        yield blick.BR(status=f.exists(), msg="Exists 1")
+        yield blick.BR(status=f.exists(), msg="Exists 2")
+
+    def run():
+        cache = blick.BlickSqliteCache(tmp_path / "cache.db")
+        ch = blick.BlickChecker(check_functions=[blick.BlickFunction(check_exists)], cache=cache,
+                                auto_setup=True)
+        return ch.run_all()
+
+    first = run()
+    f.unlink()
+    second = run()
+    assert len(calls) == 1
+    assert [(r.status, r.msg) for r in second] == [(r.status, r.msg) for r in first]
+    assert all(r.status for r in second)
+
+
+def test_cache_key():
+    @blick.attributes(ruid="my_rule")
+    def with_ruid():
+        return True
+
+    def without_ruid():
+        return True
+
+    assert blick.BlickFunction(with_ruid).cache_key.startswith("my_rule|")
+    assert blick.BlickFunction(with_ruid).cache_key.endswith("test_cache_key.<locals>.with_ruid")
+    assert blick.BlickFunction(without_ruid).cache_key.endswith("test_cache_key.<locals>.without_ruid")
+
+
+def check_same_ruid_a():
+    return blick.BR(status=True, msg="A")
+
+
+def check_same_ruid_b():
+    return blick.BR(status=True, msg="B")
+
+
+def test_same_ruid_functions_kept_apart():
+    """The default cache is shared, so two functions with one ruid must not replay each other's results."""
+    functions = [blick.BlickFunction(blick.attributes(ttl_minutes=1, ruid="r1")(f))
+                 for f in (check_same_ruid_a, check_same_ruid_b)]
+    assert [[r.msg for r in f()] for f in functions] == [["A"], ["B"]]
+    assert [[r.msg for r in f()] for f in functions] == [["A"], ["B"]]
+
+
+def test_no_ttl_never_cached(tmp_path):
+    cache = blick.BlickSqliteCache(tmp_path / "cache.db")
+
+    @blick.attributes(ruid="no_ttl")
+    def no_ttl():
+        return True
+
+    func = blick.BlickFunction(no_ttl, cache=cache)
+    list(func())
+    assert cache.get("no_ttl") is None
+
+
+def test_memory_cache_lru():
+    cache = blick.BlickMemoryCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.put(key, [blick.BR(status=True, msg=key)], time.time() + 60)
+    cache.get("a")  # b is now the least recently used
+    cache.put("c", [blick.BR(status=True)], time.time() + 60)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_memory_cache_byte_cap():
+    one = [blick.BR(status=True, msg="x" * 1000)]
+    size = blick.blick_cache.results_size(one)
+    cache = blick.BlickMemoryCache(max_bytes=int(size * 2.5))
+    for key in ("a", "b", "c"):
+        cache.put(key, one, time.time() + 60)
+    assert len(cache) == 2
+    assert cache.bytes <= cache.max_bytes
+    assert cache.get("a") is None
+
+    # Too big to ever fit
+    cache.put("huge", [blick.BR(status=True, msg="x" * size * 3)], time.time() + 60)
+    assert cache.get("huge") is None
+
+    cache.clear()
+    assert cache.bytes == 0
+
+
+def test_args_fingerprint():
+    fp = blick.blick_cache.args_fingerprint
+    assert fp([1, "a", {"b": 2, "a": 1}]) == fp([1, "a", {"a": 1, "b": 2}])
+    assert fp([{"x", "y", "z"}]) == fp([{"z", "y", "x"}])
+    assert fp(["path/one.csv"]) != fp(["path/two.csv"])
+    assert fp([pathlib.Path("a")]) != fp(["a"])
+    assert fp([pathlib.Path("a")]) == fp([pathlib.Path("a")])
+
+
+class Connection:
+    """Stands in for an object whose repr holds its address."""
+
+    def __init__(self, url: str):
+        self.url = url
+
+
+def test_unkeyed_arguments_not_cached():
+    calls = []
+
+    @blick.attributes(ttl_minutes=1, ruid="by_connection")
+    def check_connection(connection):
+        calls.append(connection)
+        return True
+
+    assert blick.blick_cache.args_fingerprint([Connection("db")]) is None
+    function_ = blick.BlickFunction(check_connection, cache=blick.BlickMemoryCache())
+    for _ in range(2):
+        function_.env = {"connection": Connection("db")}
+        list(function_())
+    assert len(calls) == 2 and len(function_.cache) == 0
+
+
+def test_bounded_cache_bounds_results():
+    """Results are only kept in the cache, so its limits hold for every function using it."""
+    cache = blick.BlickMemoryCache(max_entries=2)
+
+    @blick.attributes(ttl_minutes=10, ruid="by_value")
+    def check_value(value):
+        return blick.BlickResult(status=True, msg="x" * 1000)
+
+    functions = [blick.BlickFunction(check_value, cache=cache) for _ in range(3)]
+    for value, function_ in enumerate(functions * 2):
+        function_.env = {"value": value}
+        list(function_())
+    assert len(cache) == 2
+    kept = [item for f in functions for value in vars(f).values() if isinstance(value, list) for item in value]
+    assert not any(isinstance(item, blick.BlickResult) for item in kept)
+    assert functions[-1].last_results[0].msg == "x" * 1000
+    assert functions[0].last_results == []
+
+
+def test_register_cache_key():
+    blick.register_cache_key(Connection, lambda connection: connection.url)
+    try:
+        fp = blick.blick_cache.args_fingerprint
+        assert fp([Connection("db")]) == fp([Connection("db")])
+        assert fp([Connection("db")]) != fp([Connection("other")])
+    finally:
+        del blick.blick_cache._CACHE_KEYS[Connection]
+
+
+def test_cache_keyed_by_env_values(tmp_path):
+    """Changing an env value means the rule runs again instead of replaying stale results."""
+    calls = []
+
+    @blick.attributes(ttl_minutes=1, ruid="by_path")
+    def check_path(path):
+        calls.append(path)
+        return blick.BR(status=True, msg=path)
+
+    cache = blick.BlickMemoryCache()
+    for path in ("one.csv", "one.csv", "two.csv", "one.csv"):
+        ch = blick.BlickChecker(check_functions=[blick.BlickFunction(check_path)], env={"path": path},
+                                cache=cache, auto_setup=True)
+        assert ch.run_all()[0].msg == path
+    assert calls == ["one.csv", "two.csv"]
+
+
+def test_closures_get_their_own_entries():
+    def make(value):
+        @blick.attributes(ttl_minutes=1)
+        def check_value():
+            return blick.BR(status=True, msg=value)
+
+        return blick.BlickFunction(check_value)
+
+    one, two = make("one"), make("two")
+    assert one.cache_key != two.cache_key
+    assert [r.msg for r in one()] == ["one"]
+    assert [r.msg for r in two()] == ["two"]
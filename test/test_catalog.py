@@ -0,0 +1,127 @@
+import random
+
+import pytest
+
+from src import blick
+
+
+def make_function(name: str, tag: str, phase: str, level: int, ruid: str = ""):
+    def check():
+        return True
+
+    check.__name__ = name
+    return blick.BlickFunction(blick.attributes(tag=tag, phase=phase, level=level, ruid=ruid)(check))
+
+
+@pytest.fixture
+def functions():
+    return [make_function("f1", "fs", "dev", 1, "r1"),
+            make_function("f2", "db", "dev", 3, "r2"),
+            make_function("f3", "fs", "prod", 5, "r3"),
+            make_function("f4", "web", "prod", 2, "r4")]
+
+
+def test_lookups(functions):
+    catalog = blick.BlickCatalog(functions)
+    assert len(catalog) == 4
+    assert catalog.lookup("tag", ["fs"]) == {0, 2}
+    assert catalog.lookup("phase", ["prod", "nope"]) == {2, 3}
+    assert catalog.select(tags=["db"], levels=[5]) == {1, 2}
+    assert catalog.values("tag") == ["db", "fs", "web"]
+    assert catalog.pick({2, 0}) == [functions[0], functions[2]]
+    assert catalog.pick({2, 0}, functions[::-1]) == [functions[2], functions[0]]
+    assert catalog.pick({2, 0}, functions, keep=False) == [functions[1], functions[3]]
+
+
+def test_level_range(functions):
+    catalog = blick.BlickCatalog(functions)
+    assert catalog.level_range(2, 3) == {1, 3}
+    assert catalog.level_range(low=3) == {1, 2}
+    assert catalog.level_range(high=1) == {0}
+    assert catalog.level_range() == catalog.all()
+    assert catalog.level_range(6, 9) == set()
+
+
+def test_non_numeric_level(functions):
+    """A level that isn't a number can be looked up, but is never in a level range."""
+    catalog = blick.BlickCatalog(functions + [make_function("f5", "fs", "dev", "high", "r5")])
+    assert catalog.lookup("level", ["high"]) == {4}
+    assert catalog.level_range() == {0, 1, 2, 3}
+
+
+def test_update_and_unknown(functions):
+    catalog = blick.BlickCatalog(functions[:3])
+    functions[0].tag = "db"
+    functions[0].level = 4
+    catalog.update(functions[0])
+    assert catalog.lookup("tag", ["fs"]) == {2}
+    assert catalog.lookup("tag", ["db"]) == {0, 1}
+    assert catalog.level_range(4, 4) == {0}
+
+    # Functions the catalog hasn't seen are added when they are asked about
+    assert catalog.pick(catalog.lookup("tag", ["web"]), functions) == []
+    assert catalog.lookup("tag", ["web"]) == {3}
+
+
+def test_attribute_changes_seen(functions):
+    """Attributes set after the catalog was built are seen without update()."""
+    catalog = blick.BlickCatalog(functions)
+    functions[1].tag = "fs"
+    functions[2].phase = "dev"
+    functions[3].level = 9
+    assert catalog.lookup("tag", ["fs"]) == {0, 1, 2}
+    assert catalog.select(phases=["prod"]) == {3}
+    assert catalog.level_range(low=6) == {3}
+    assert catalog.values("tag") == ["fs", "web"]
+
+
+def test_checker_selection_after_attribute_change(functions):
+    checker = blick.BlickChecker(check_functions=functions)
+    checker.pre_collect()
+    functions[3].tag = "fs"
+    collected = checker.prepare(filter_functions=[blick.keep_tags(["fs"])])
+    assert collected == [functions[0], functions[2], functions[3]]
+    assert checker.include_by_attribute(tags="fs") == collected
+
+
+def test_checker_selection(functions):
+    checker = blick.BlickChecker(check_functions=functions, auto_setup=True)
+    assert len(checker.catalog) == 4
+    assert checker.catalog.lookup("module", ["adhoc"]) == checker.catalog.all()
+
+    assert checker.include_by_attribute(tags="fs", phases="prod") == [functions[0], functions[2], functions[3]]
+    assert checker.exclude_by_attribute(levels=[5]) == [functions[0], functions[3]]
+    assert checker.include_level_range(low=2) == [functions[3]]
+
+    checker.prepare()
+    assert checker.exclude_by_attribute(modules="adhoc") == []
+
+
+def test_prepare_mixes_filters(functions):
+    checker = blick.BlickChecker(check_functions=functions)
+    checker.pre_collect()
+    collected = checker.prepare(filter_functions=[blick.keep_phases(["prod", "dev"]),
+                                                  blick.exclude_tags(["db"]),
+                                                  lambda f: f.level < 5])
+    assert collected == [functions[0], functions[3]]
+
+
+def test_auto_ruids_indexed():
+    functions = [make_function(f"f{i}", "t", "p", 1) for i in range(3)]
+    checker = blick.BlickChecker(check_functions=functions, auto_ruid=True)
+    checker.pre_collect()
+    collected = checker.prepare(filter_functions=[blick.keep_ruids(["__ruid__0002"])])
+    assert collected == [functions[1]]
+
+
+def test_large_catalog_matches_scan():
+    rng = random.Random(42)
+    functions = [make_function(f"f{i}", rng.choice("abcdefgh"), rng.choice(["dev", "test", "prod"]),
+                               rng.randint(1, 20), f"r{i}") for i in range(2000)]
+    checker = blick.BlickChecker(check_functions=functions, auto_setup=True)
+    expected = [f for f in functions if f.tag in ("a", "b") or f.phase == "prod" or f.level in (3, 4)]
+    assert checker.include_by_attribute(tags="a b", phases="prod", levels=[3, 4]) == expected
+    expected = [f for f in expected if f.tag != "a" and not 5 <= f.level <= 8]
+    checker.exclude_by_attribute(tags="a")
+    kept = checker.catalog.pick(checker.catalog.level_range(5, 8), checker.collected, keep=False)
+    assert kept == expected
@@ -694,4 +694,53 @@ def test_check_render_color(renderer, expected):
     assert len(results) == 1
     assert results[0].status == True
     assert results[0].msg == "It works1 <<red>>hello<</red>>"
-    assert results[0].msg_rendered == expected
\ No newline at end of file
+    assert results[0].msg_rendered == expected
+
+def test_parallel_matches_serial(func1, func2, func3, func4):
+    """Running on a thread pool gives the same results in the same order as a serial run."""
+    funcs = [func1, func2, func3, func4]
+    serial = blick.BlickChecker(check_functions=funcs, auto_setup=True).run_all()
+    ch = blick.BlickChecker(check_functions=funcs, auto_setup=True, max_workers=4)
+    parallel = ch.run_all()
+
+    assert ch.parallel
+    assert [r.msg for r in parallel] == [r.msg for r in serial]
+    assert [r.status for r in parallel] == [r.status for r in serial]
+
+    # finish_on_fail on func4 still stops after the first fail
+    assert len(parallel) == 3 + 3
+
+
+def test_parallel_runs_concurrently():
+    """Two rules that wait on each other can only pass if they run at the same time."""
+    import threading
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait_a():
+        barrier.wait()
+        return blick.BR(status=True, msg="a")
+
+    def wait_b():
+        barrier.wait()
+        return blick.BR(status=True, msg="b")
+
+    funcs = [blick.BlickFunction(wait_a), blick.BlickFunction(wait_b)]
+    ch = blick.BlickChecker(check_functions=funcs, auto_setup=True, max_workers=2)
+    results = ch.run_all()
+    assert [r.msg for r in results] == ["a", "b"]
+    assert ch.perfect_run
+
+
+def test_parallel_abort_on_fail(func1, func2, func4):
+    """Abort on fail stops reporting at the first failure even with a pool."""
+    ch = blick.BlickChecker(check_functions=[func4, func1, func2], auto_setup=True,
+                            abort_on_fail=True, max_workers=3)
+    results = ch.run_all()
+    assert len(results) == 3
+    assert results[-1].status is False
+
+
+@pytest.mark.parametrize("max_workers", ["2", 2.0, True])
+def test_bad_max_workers(func1, max_workers):
+    with pytest.raises(blick.BlickException):
+        _ = blick.BlickChecker(check_functions=[func1], max_workers=max_workers)
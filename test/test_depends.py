@@ -0,0 +1,136 @@
+import asyncio
+import threading
+
+import pytest
+
+from src import blick
+
+
+def make_func(ruid, status=True, depends_on="", calls=None):
+    @blick.attributes(ruid=ruid, depends_on=depends_on)
+    def func():
+        if calls is not None:
+            calls.append(ruid)
+        return blick.BR(status=status, msg=ruid)
+
+    func.__name__ = f"func_{ruid}"
+    return blick.BlickFunction(func)
+
+
+def test_depends_attribute():
+    assert make_func("a", depends_on="b c").depends_on == ("b", "c")
+    assert make_func("a", depends_on="b,c").depends_on == ("b", "c")
+    assert make_func("a", depends_on=["b", "c"]).depends_on == ("b", "c")
+    assert make_func("a").depends_on == ()
+
+    with pytest.raises(blick.BlickException):
+        make_func("a", depends_on=["b", 1])
+
+    with pytest.raises(blick.BlickException):
+        make_func("a", depends_on=["b-c"])
+
+
+def test_dependency_order():
+    """Prerequisites are moved ahead of their dependents, everything else keeps its order."""
+    funcs = [make_func("table_1", depends_on="db"),
+             make_func("other"),
+             make_func("db"),
+             make_func("table_2", depends_on="db table_1")]
+    ch = blick.BlickChecker(check_functions=funcs, auto_setup=True)
+    assert [f.ruid for f in ch.collected] == ["other", "db", "table_1", "table_2"]
+
+
+def test_unknown_and_circular_dependencies():
+    with pytest.raises(blick.BlickException):
+        blick.BlickChecker(check_functions=[make_func("a", depends_on="nope")], auto_setup=True)
+
+    with pytest.raises(blick.BlickException):
+        blick.BlickChecker(check_functions=[make_func("a", depends_on="b"),
+                                            make_func("b", depends_on="a")], auto_setup=True)
+
+
+@pytest.mark.parametrize("max_workers", [None, 4])
+def test_failed_prerequisite_skips_dependents(max_workers):
+    """Dependents of a failed rule (and their dependents) are skipped without being run."""
+    calls = []
+    funcs = [make_func("db", status=False, calls=calls),
+             make_func("table_1", depends_on="db", calls=calls),
+             make_func("table_2", depends_on="table_1", calls=calls),
+             make_func("files", calls=calls)]
+    ch = blick.BlickChecker(check_functions=funcs, auto_setup=True, max_workers=max_workers)
+    results = ch.run_all()
+
+    assert sorted(calls) == ["db", "files"]
+    assert [r.ruid for r in results] == ["db", "table_1", "table_2", "files"]
+    assert [r.status for r in results] == [False, None, None, True]
+    assert results[1].skipped and results[2].skipped
+    assert "db" in results[1].msg
+    assert "table_1" in results[2].msg
+    assert ch.skip_count == 2
+
+
+@pytest.mark.parametrize("max_workers", [None, 4])
+def test_passed_prerequisite_runs_dependents(max_workers):
+    calls = []
+    funcs = [make_func("table", depends_on="db", calls=calls), make_func("db", calls=calls)]
+    ch = blick.BlickChecker(check_functions=funcs, auto_setup=True, max_workers=max_workers)
+    results = ch.run_all()
+    assert calls == ["db", "table"]
+    assert ch.perfect_run
+    assert len(results) == 2
+
+
+def test_filtered_prerequisite_is_ignored():
+    funcs = [make_func("db", status=False), make_func("table", depends_on="db")]
+    ch = blick.BlickChecker(check_functions=funcs)
+    ch.pre_collect()
+    ch.prepare(filter_functions=[blick.keep_ruids(["table"])])
+    results = ch.run_all()
+    assert len(results) == 1
+    assert results[0].status is True
+
+
+def test_independent_branches_run_concurrently():
+    """Two branches that hang off the same root can only pass if they run at the same time."""
+    barrier = threading.Barrier(2, timeout=5)
+
+    @blick.attributes(ruid="root")
+    def root():
+        return True
+
+    @blick.attributes(ruid="left", depends_on="root")
+    def left():
+        barrier.wait()
+        return True
+
+    @blick.attributes(ruid="right", depends_on="root")
+    def right():
+        barrier.wait()
+        return True
+
+    funcs = [blick.BlickFunction(f) for f in (root, left, right)]
+    ch = blick.BlickChecker(check_functions=funcs, auto_setup=True, max_workers=3)
+    results = ch.run_all()
+    assert [r.ruid for r in results] == ["root", "left", "right"]
+    assert ch.perfect_run
+
+
+def test_async_dependencies():
+    calls = []
+
+    @blick.attributes(ruid="db")
+    async def db():
+        calls.append("db")
+        return False
+
+    @blick.attributes(ruid="table", depends_on="db")
+    async def table():
+        calls.append("table")
+        return True
+
+    funcs = [blick.BlickFunction(table), blick.BlickFunction(db)]
+    ch = blick.BlickChecker(check_functions=funcs, auto_setup=True)
+    results = asyncio.run(ch.arun_all())
+    assert calls == ["db"]
+    assert [r.status for r in results] == [False, None]
+    assert results[1].skipped
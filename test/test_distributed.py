@@ -0,0 +1,217 @@
+import asyncio
+import concurrent.futures
+import multiprocessing
+import threading
+import time
+from multiprocessing.connection import Client
+
+import pytest
+
+from src import blick
+
+
+@pytest.fixture
+def dist_module():
+    return blick.BlickModule(module_name="check_distributed", module_file="distributed/check_distributed.py")
+
+
+@pytest.fixture
+def coordinator():
+    coordinator = blick.BlickCoordinator(heartbeat_timeout=0.5, batch_size=2)
+    yield coordinator
+    coordinator.close()
+
+
+def start_workers(coordinator, names):
+    threads = []
+    for name in names:
+        worker = blick.BlickWorker(coordinator.address, coordinator.authkey, heartbeat_sec=0.05)
+        thread = threading.Thread(target=worker.run, name=name, daemon=True)
+        thread.start()
+        threads.append(thread)
+    assert coordinator.wait_for_workers(len(names), timeout=5)
+    return threads
+
+
+def by_ruid(results):
+    return {r.ruid: r for r in results}
+
+
+RAN_BY = {f"dist_{i}" for i in range(1, 7)} | {"dist_base"}
+
+
+def check_results(results):
+    results = by_ruid(results)
+    assert all(results[f"dist_{i}"].status for i in range(1, 7))
+    assert results["dist_base"].status is False
+    assert results["dist_dependent"].skipped
+    assert isinstance(results["dist_exception"].except_, ValueError)
+
+
+def test_distributed_run(dist_module, coordinator):
+    """Rules run on the workers and come back in collected order, just like a local run."""
+    start_workers(coordinator, ["worker-a", "worker-b", "worker-c"])
+    ch = blick.BlickChecker(modules=[dist_module], env={"value": 42}, coordinator=coordinator, auto_setup=True)
+    results = ch.run_all()
+
+    local = blick.BlickChecker(modules=[dist_module], env={"value": 42}, auto_setup=True).run_all()
+    assert [(r.ruid, r.status, r.skipped) for r in results] == [(r.ruid, r.status, r.skipped) for r in local]
+    check_results(results)
+    assert {r.msg for r in results if r.ruid in RAN_BY} <= {"worker-a", "worker-b", "worker-c"}
+
+    # Workers stay connected for the next run
+    assert coordinator.worker_count == 3
+    check_results(ch.run_all())
+
+
+def test_work_stealing(dist_module):
+    """A worker with nothing to do takes work from the busy one."""
+    with blick.BlickCoordinator(batch_size=100) as coordinator:
+        start_workers(coordinator, ["worker-a"])
+        start_workers(coordinator, ["worker-b"])
+        ch = blick.BlickChecker(modules=[dist_module], env={"value": 42}, coordinator=coordinator,
+                                auto_setup=True)
+        results = ch.run_all()
+        check_results(results)
+        slow = [r.msg for r in results if r.ruid in {f"dist_{i}" for i in range(1, 7)}]
+        assert set(slow) == {"worker-a", "worker-b"}
+
+
+def _run_in_thread(checker):
+    pool = concurrent.futures.ThreadPoolExecutor(1)
+    return pool.submit(checker.run_all)
+
+
+def _rogue(coordinator):
+    """Connect like a worker and take a batch, but never run it."""
+    conn = Client(coordinator.address, authkey=coordinator.authkey)
+    conn.send({"type": "hello", "name": "rogue"})
+    conn.send({"type": "idle"})
+    assert coordinator.wait_for_workers(1, timeout=5)
+    return conn
+
+
+def test_silent_worker_reassigned(dist_module):
+    """A worker that stops sending heartbeats has its rules handed to another worker."""
+    with blick.BlickCoordinator(batch_size=100, heartbeat_timeout=0.3) as coordinator:
+        conn = _rogue(coordinator)
+        ch = blick.BlickChecker(modules=[dist_module], env={"value": 42}, coordinator=coordinator,
+                                auto_setup=True)
+        future = _run_in_thread(ch)
+        assert conn.recv()["type"] == "batch"
+
+        start_workers(coordinator, ["worker-a"])
+        results = future.result(timeout=10)
+        check_results(results)
+        assert {r.msg for r in results if r.ruid in RAN_BY} == {"worker-a"}
+        conn.close()
+
+
+def test_disconnected_worker_reassigned(dist_module, coordinator):
+    """A worker that drops its connection has its rules handed to another worker."""
+    conn = _rogue(coordinator)
+    ch = blick.BlickChecker(modules=[dist_module], env={"value": 42}, coordinator=coordinator, auto_setup=True)
+    future = _run_in_thread(ch)
+    assert conn.recv()["type"] == "batch"
+    conn.close()
+
+    start_workers(coordinator, ["worker-a"])
+    check_results(future.result(timeout=10))
+
+
+def _wait_until(condition, timeout=5):
+    end = time.time() + timeout
+    while not condition():
+        assert time.time() < end
+        time.sleep(0.01)
+
+
+def test_stale_idle_ignored(dist_module, coordinator):
+    """An idle sent before a batch arrived doesn't hand that batch out again, a later one does."""
+    conn = _rogue(coordinator)
+    ch = blick.BlickChecker(modules=[dist_module], env={"value": 42}, coordinator=coordinator, auto_setup=True)
+    future = _run_in_thread(ch)
+    batch = conn.recv()
+    assert batch["type"] == "batch"
+    rogue = coordinator.workers[0]
+
+    conn.send({"type": "idle", "batch": batch["batch"] - 1})
+    conn.send({"type": "heartbeat"})
+    _wait_until(lambda: not rogue.idle and len(rogue.assigned) == len(batch["items"]))
+    assert not {index for index, *_ in batch["items"]} & set(coordinator.run.pending)
+
+    # Idle after the batch, so whatever wasn't reported back was dropped
+    conn.send({"type": "idle", "batch": batch["batch"]})
+    _wait_until(lambda: not rogue.assigned)
+    start_workers(coordinator, ["worker-a"])
+    results = future.result(timeout=10)
+    check_results(results)
+    assert len(results) == len(blick.BlickChecker(modules=[dist_module], env={"value": 42},
+                                                  auto_setup=True).run_all())
+    conn.close()
+
+
+def test_no_workers(dist_module):
+    with blick.BlickCoordinator(heartbeat_timeout=0.2) as coordinator:
+        ch = blick.BlickChecker(modules=[dist_module], env={"value": 42}, coordinator=coordinator,
+                                auto_setup=True)
+        with pytest.raises(blick.BlickException, match="No workers"):
+            ch.run_all()
+
+
+def _run_worker(address, authkey):
+    blick.BlickWorker(address, authkey).run()
+
+
+def test_worker_processes(dist_module, coordinator):
+    """Workers in their own processes on localhost."""
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_run_worker, args=(coordinator.address, coordinator.authkey)) for _ in range(2)]
+    for proc in procs:
+        proc.start()
+    assert coordinator.wait_for_workers(2, timeout=30)
+
+    ch = blick.BlickChecker(modules=[dist_module], env={"value": 42}, coordinator=coordinator, auto_setup=True)
+    check_results(ch.run_all())
+
+    # Closing the coordinator stops the workers
+    coordinator.close()
+    for proc in procs:
+        proc.join(timeout=10)
+        assert proc.exitcode == 0
+
+
+def test_unix_socket(dist_module, tmp_path):
+    with blick.BlickCoordinator(str(tmp_path / "blick.sock")) as coordinator:
+        threads = start_workers(coordinator, ["worker-a"])
+        ch = blick.BlickChecker(modules=[dist_module], env={"value": 42}, coordinator=coordinator,
+                                auto_setup=True)
+        check_results(ch.run_all())
+    threads[0].join(timeout=5)
+    assert not threads[0].is_alive()
+
+
+def test_wrong_authkey(coordinator):
+    with pytest.raises(Exception):
+        blick.BlickWorker(coordinator.address, b"wrong").run()
+    assert coordinator.worker_count == 0
+
+
+def test_coordinator_checks():
+    with pytest.raises(blick.BlickException):
+        blick.BlickCoordinator(batch_size=0)
+
+
+def test_async_not_supported(dist_module, coordinator):
+    ch = blick.BlickChecker(modules=[dist_module], env={"value": 42}, coordinator=coordinator, auto_setup=True)
+    with pytest.raises(blick.BlickException):
+        asyncio.run(ch.arun_all())
+
+
+def test_local_function_rejected(coordinator):
+    def check_local():
+        return blick.BlickResult(status=True)
+
+    ch = blick.BlickChecker(check_functions=[blick.BlickFunction(check_local)], coordinator=coordinator, auto_setup=True)
+    with pytest.raises(blick.BlickException):
+        ch.run_all()
@@ -0,0 +1,305 @@
+import threading
+import time
+
+import pytest
+
+from src import blick
+
+
+def check_value(value):
+    yield blick.BlickResult(status=value > 0, msg=f"value={value}")
+
+
+def make_checker(*env_funcs):
+    module = blick.BlickModule(module_name="scoped", module_file="scoped.py", env_functions=list(env_funcs),
+                               auto_load=False)
+    return blick.BlickChecker(modules=[module], check_functions=[blick.BlickFunction(check_value)],
+                              auto_setup=True)
+
+
+@pytest.fixture(autouse=True)
+def clean_session():
+    yield
+    blick.invalidate_fixtures()
+
+
+def test_run_scope_with_teardown():
+    """Run scope (the default) is set up every run and torn down when the run ends."""
+    events = []
+
+    def env_value(_: dict):
+        events.append("setup")
+        yield {"value": len(events)}
+        events.append("teardown")
+
+    checker = make_checker(env_value)
+    assert checker.run_all()[0].status
+    assert checker.run_all()[0].msg == "value=3"
+    assert events == ["setup", "teardown", "setup", "teardown"]
+
+
+@pytest.mark.parametrize("scope", ["module", "session"])
+def test_kept_scopes(scope):
+    events = []
+
+    @blick.env(scope=scope)
+    def env_value(_: dict):
+        events.append("setup")
+        yield {"value": 1}
+        events.append("teardown")
+
+    checker = make_checker(env_value)
+    checker.run_all()
+    checker.run_all()
+    assert events == ["setup"]
+
+    assert checker.invalidate_environments(name="other") == 0
+    assert checker.invalidate_environments() == 1
+    assert events == ["setup", "teardown"]
+    checker.run_all()
+    assert events == ["setup", "teardown", "setup"]
+
+
+def test_session_shared_between_checkers():
+    calls = []
+
+    @blick.env(scope="session")
+    def env_value(_: dict):
+        calls.append(1)
+        return {"value": 1}
+
+    make_checker(env_value).run_all()
+    make_checker(env_value).run_all()
+    assert len(calls) == 1
+    assert blick.invalidate_fixtures(name="env_value") == 1
+
+
+def test_ttl_expiry():
+    calls = []
+
+    @blick.env(scope="module", ttl_minutes="1sec")
+    def env_value(_: dict):
+        calls.append(1)
+        return {"value": len(calls)}
+
+    checker = make_checker(env_value)
+    checker.run_all()
+    checker.run_all()
+    assert len(calls) == 1
+    fixture = checker.modules[0].env_fixtures[env_value]
+    fixture.created = time.time() - 2
+    assert checker.run_all()[0].msg == "value=2"
+
+
+def test_env_errors():
+    with pytest.raises(blick.BlickException):
+        blick.env(scope="forever")
+
+    def env_nothing(_: dict):
+        yield from ()
+
+    with pytest.raises(blick.BlickException):
+        make_checker(env_nothing).run_all()
+
+    def env_twice(_: dict):
+        yield {"value": 1}
+        yield {"value": 2}
+
+    with pytest.raises(blick.BlickException):
+        make_checker(env_twice).run_all()
+
+    def env_list(_: dict):
+        return [1]
+
+    with pytest.raises(blick.BlickException):
+        make_checker(env_list).run_all()
+
+
+def test_lazy_env_only_runs_what_is_used():
+    """Env functions that declare what they provide only run when a rule (or env function) reads it."""
+    calls = []
+
+    @blick.env(provides="value")
+    def env_value(full_env: dict):
+        calls.append("value")
+        return {"value": full_env["base"] + 1}
+
+    @blick.env(provides=["base"])
+    def env_base(_: dict):
+        calls.append("base")
+        return {"base": 1}
+
+    @blick.env(provides="engine, workbook")
+    def env_expensive(_: dict):
+        calls.append("expensive")
+        return {"engine": object(), "workbook": object()}
+
+    checker = make_checker(env_value, env_base, env_expensive)
+    results = checker.run_all()
+    assert results[0].msg == "value=2"
+    assert calls == ["value", "base"]
+
+    full_env = checker.collected[0].env
+    assert "engine" in full_env and full_env.unused == ["engine", "workbook"]
+    assert full_env.needed == {"value"}
+    assert calls == ["value", "base"]
+
+
+def test_env_functions_get_a_dict():
+    """Env functions are passed a dict as they always were, lazy names load as they are read."""
+    seen = {}
+
+    @blick.env(provides="base")
+    def env_base(_: dict):
+        return {"base": 1}
+
+    def env_value(full_env: dict):
+        seen["dict"] = isinstance(full_env, dict)
+        seen["lazy"] = ("base" in full_env, full_env.get("base"), full_env.get("nope", 0))
+        full_env["scratch"] = True
+        return {"value": full_env["base"] + 1}
+
+    checker = make_checker(env_base, env_value)
+    assert checker.run_all()[0].msg == "value=2"
+    assert seen == {"dict": True, "lazy": (True, 1, 0)}
+    assert "scratch" not in checker.collected[0].env
+
+
+def test_lazy_env_errors():
+    @blick.env(provides="value")
+    def env_value(full_env: dict):
+        return {"value": full_env["value"]}
+
+    result = make_checker(env_value).run_all()[0]
+    assert result.except_ is not None and "loop" in str(result.except_)
+
+    @blick.env(provides="value")
+    def env_forgot(_: dict):
+        return {"other": 1}
+
+    result = make_checker(env_forgot).run_all()[0]
+    assert "did not provide 'value'" in str(result.except_)
+
+    with pytest.raises(blick.BlickException):
+        blick.env(provides="not-a-name")
+
+
+def check_pair(left, right):
+    yield blick.BlickResult(status=left + right == 3, msg=f"{left}+{right}")
+
+
+def pair_checker(*env_funcs, env_workers=None):
+    module = blick.BlickModule(module_name="pairs", module_file="pairs.py", env_functions=list(env_funcs),
+                               auto_load=False)
+    return blick.BlickChecker(modules=[module], check_functions=[blick.BlickFunction(check_pair)],
+                              env_workers=env_workers, auto_setup=True)
+
+
+def test_independent_fixtures_load_concurrently():
+    """Both fixtures wait for each other, which only works if they are set up at the same time."""
+    barrier = threading.Barrier(2, timeout=5)
+    order = []
+
+    @blick.env(provides="left")
+    def env_left(_: dict):
+        barrier.wait()
+        order.append("left")
+        return {"left": 1}
+
+    @blick.env(provides="right", requires="base")
+    def env_right(full_env: dict):
+        barrier.wait()
+        order.append("right")
+        return {"right": full_env["base"] + 1}
+
+    @blick.env(provides="base")
+    def env_base(_: dict):
+        order.append("base")
+        return {"base": 1}
+
+    checker = pair_checker(env_left, env_right, env_base)
+    results = checker.run_all()
+    assert results[0].status and results[0].msg == "1+2"
+    assert order.index("base") < order.index("right")
+    assert set(checker.env_timings) == {"env_left", "env_right", "env_base"}
+    assert all(sec >= 0.0 for sec in checker.env_timings.values())
+
+
+def test_serial_env_workers():
+    calls = []
+
+    @blick.env(provides="left right")
+    def env_both(_: dict):
+        calls.append(1)
+        return {"left": 1, "right": 2}
+
+    assert pair_checker(env_both, env_workers=1).run_all()[0].status
+    assert calls == [1]
+
+
+def test_env_collisions():
+    @blick.env(provides="left")
+    def env_left(_: dict):
+        return {"left": 1}
+
+    @blick.env(provides="left")
+    def env_other_left(_: dict):
+        return {"left": 2}
+
+    with pytest.raises(blick.BlickException, match="both provide 'left'"):
+        pair_checker(env_left, env_other_left).run_all()
+
+    def env_one(_: dict):
+        return {"left": 1, "right": 2}
+
+    def env_two(_: dict):
+        return {"right": 2}
+
+    with pytest.raises(blick.BlickException, match="both set 'right'"):
+        pair_checker(env_one, env_two).run_all()
+
+    @blick.env(provides="right", requires="missing")
+    def env_needs_missing(_: dict):
+        return {"right": 2}
+
+    with pytest.raises(blick.BlickException, match="nothing provides"):
+        pair_checker(env_left, env_needs_missing).run_all()
+
+
+def test_failed_fixture_fails_its_rules_once():
+    calls = []
+
+    @blick.env(provides="left right")
+    def env_broken(_: dict):
+        calls.append(1)
+        raise ConnectionError("No database")
+
+    def check_left(left):
+        yield blick.BlickResult(status=left == 1)
+
+    module = blick.BlickModule(module_name="broken", module_file="broken.py", env_functions=[env_broken],
+                               auto_load=False)
+    checker = blick.BlickChecker(modules=[module], auto_setup=True,
+                                 check_functions=[blick.BlickFunction(check_pair), blick.BlickFunction(check_left)])
+    results = checker.run_all()
+    assert [str(r.except_) for r in results] == ["No database", "No database"]
+    assert calls == [1]
+
+
+def _env_in_module(module_name: str, value: int, **declared):
+    def env_left(_: dict):
+        return {"left": value, "right": 2}
+
+    env_left.__module__ = module_name
+    return blick.env(**declared)(env_left) if declared else env_left
+
+
+def test_same_name_env_functions_collide():
+    """Env functions are told apart by module, not just by name."""
+    one, two = _env_in_module("mod_one", 1), _env_in_module("mod_two", 5)
+    with pytest.raises(blick.BlickException, match=r"mod_one\..*env_left and mod_two\..*env_left both set 'left'"):
+        pair_checker(one, two).run_all()
+
+    one, two = _env_in_module("mod_one", 1, provides="left"), _env_in_module("mod_two", 5, provides="left")
+    with pytest.raises(blick.BlickException, match="mod_one.*mod_two.*both provide 'left'"):
+        pair_checker(one, two).run_all()
@@ -208,3 +208,28 @@ def test_blick_render_text_with_empty_string(markup_func):
     formatted_input = markup_func(input)
     output = render_text.render(formatted_input)
     assert output == expected_output
+
+
+def test_render_many_and_mixed_tags():
+    """Several tags in one message are rendered in one pass and unknown tags are left alone."""
+    bm = BlickMarkup()
+    msgs = [f"{bm.bold('a')} {bm.red('b')} {bm.data('c')}", "no tags", "<<unknown>>x<</unknown>>"]
+    html = blick_format.BlickBasicHTMLRenderer()
+    assert html.render_many(msgs) == ['<b>a</b> <span style="color:red">b</span> c', "no tags",
+                                      "<<unknown>>x<</unknown>>"]
+    assert blick_format.BlickRenderText().render_many(msgs) == ["a b c", "no tags", "<<unknown>>x<</unknown>>"]
+    assert html.cleanup(msgs[0]) == "a b c"
+
+
+def test_render_cache_and_custom_renderer():
+    """Renderers only list their replacements, repeated messages come from the cache."""
+
+    class ShoutRenderer(blick_format.BlickRenderText):
+        replacements = {blick_format.TAG_BOLD: ("!", "!")}
+        cache_size = 2
+
+    renderer = ShoutRenderer()
+    msg = BlickMarkup().bold("hi") + BlickMarkup().code("x")
+    assert renderer.render(msg) == renderer.render(msg) == "!hi!x"
+    info = renderer.compiled().render.cache_info()
+    assert (info.hits, info.misses, info.maxsize) == (1, 1, 2)
@@ -0,0 +1,158 @@
+import asyncio
+import os
+
+import pytest
+
+from src import blick
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "a.csv").write_text("a,b\n1,2\n")
+    (tmp_path / "data" / "b.csv").write_text("a,b\n3,4\n")
+    (tmp_path / "config.toml").write_text("x = 1\n")
+    return tmp_path
+
+
+def make_checker(data_dir, calls, incremental, **kwargs):
+    @blick.attributes(ruid="csv", inputs=str(data_dir / "data" / "*.csv"))
+    def check_csv():
+        calls.append("csv")
+        yield blick.BR(status=True, msg="csv 1")
+        yield blick.BR(status=False, msg="csv 2")
+
+    @blick.attributes(ruid="config", inputs=[data_dir / "config.toml"])
+    def check_config():
+        calls.append("config")
+        return True
+
+    @blick.attributes(ruid="always")
+    def check_always():
+        calls.append("always")
+        return True
+
+    funcs = [blick.BlickFunction(f) for f in (check_csv, check_config, check_always)]
+    return blick.BlickChecker(check_functions=funcs, incremental=incremental, auto_setup=True, **kwargs)
+
+
+def bump(path):
+    """Change a file without changing its size."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_inputs_attribute():
+    @blick.attributes(inputs="data/my file.csv")
+    def f1():
+        pass
+
+    @blick.attributes(inputs=["a.csv", "b/*.csv"])
+    def f2():
+        pass
+
+    assert blick.BlickFunction(f1).inputs == ("data/my file.csv",)
+    assert blick.BlickFunction(f2).inputs == ("a.csv", "b/*.csv")
+
+    with pytest.raises(blick.BlickException):
+        blick.attributes(inputs=["a.csv", 1])
+    with pytest.raises(blick.BlickException):
+        blick.attributes(inputs=[""])
+
+
+@pytest.mark.parametrize("max_workers", [None, 4])
+def test_unchanged_rules_are_replayed(data_dir, max_workers):
+    state_file = data_dir / "state.json"
+    calls = []
+
+    first = make_checker(data_dir, calls, blick.BlickIncremental.load(state_file), max_workers=max_workers)
+    first_results = first.run_all()
+    assert calls == ["csv", "config", "always"]
+    assert state_file.exists()
+    assert first.replay_count == 0
+
+    calls.clear()
+    second = make_checker(data_dir, calls, blick.BlickIncremental.load(state_file), max_workers=max_workers)
+    second_results = second.run_all()
+    assert calls == ["always"]
+    assert [r.replayed for r in second_results] == [True, True, True, False]
+    assert [r.msg for r in second_results] == [r.msg for r in first_results]
+    assert [r.status for r in second_results] == [r.status for r in first_results]
+    assert second.replay_count == 3
+    assert second.score == first.score
+
+
+def test_changed_inputs_rerun(data_dir):
+    state_file = data_dir / "state.json"
+    calls = []
+    make_checker(data_dir, calls, blick.BlickIncremental.load(state_file)).run_all()
+
+    bump(data_dir / "data" / "b.csv")
+    calls.clear()
+    make_checker(data_dir, calls, blick.BlickIncremental.load(state_file)).run_all()
+    assert calls == ["csv", "always"]
+
+    # New files matching a glob count as a change
+    (data_dir / "data" / "c.csv").write_text("")
+    calls.clear()
+    make_checker(data_dir, calls, blick.BlickIncremental.load(state_file)).run_all()
+    assert calls == ["csv", "always"]
+
+    # So does a missing file appearing or a file going away
+    (data_dir / "config.toml").unlink()
+    calls.clear()
+    make_checker(data_dir, calls, blick.BlickIncremental.load(state_file)).run_all()
+    assert calls == ["config", "always"]
+
+
+def test_hash_contents(data_dir):
+    """With hashing on, a touched but unchanged file is still a change (mtime is kept)."""
+    path = data_dir / "config.toml"
+    before = blick.blick_incremental.fingerprint_inputs([str(path)], hash_contents=True)
+    path.write_text("x = 2\n")
+    after = blick.blick_incremental.fingerprint_inputs([str(path)], hash_contents=True)
+    assert len(before[str(path)]) == 3
+    assert before[str(path)][2] != after[str(path)][2]
+
+
+def test_exceptions_are_not_replayed(data_dir, tmp_path):
+    calls = []
+
+    @blick.attributes(inputs=str(data_dir / "config.toml"))
+    def check_broken():
+        calls.append(1)
+        raise ValueError("oops")
+
+    state_file = tmp_path / "state.json"
+    for _ in range(2):
+        ch = blick.BlickChecker(check_functions=[blick.BlickFunction(check_broken)],
+                                incremental=blick.BlickIncremental.load(state_file), auto_setup=True)
+        ch.run_all()
+    assert len(calls) == 2
+
+
+def test_from_dict_round_trip():
+    result = blick.BR(status=False, msg="hi", tag="t", except_=ValueError("boom"), owner_list=["me"])
+    copy = blick.BlickResult.from_dict(result.as_dict() | {"extra": 1})
+    assert copy.msg == "hi" and copy.tag == "t" and copy.owner_list == ["me"]
+    assert isinstance(copy.except_, blick.BlickException)
+    assert str(copy.except_) == "boom"
+    assert blick.BlickResult.from_dict(blick.BR(status=True).as_dict()).except_ is None
+
+
+def test_bad_state_file(tmp_path):
+    bad = tmp_path / "bad.json"
+    bad.write_text("{")
+    with pytest.raises(blick.BlickException):
+        blick.BlickIncremental.load(bad)
+
+
+def test_async_replay(data_dir):
+    state_file = data_dir / "state.json"
+    calls = []
+    asyncio.run(make_checker(data_dir, calls, blick.BlickIncremental.load(state_file)).arun_all())
+    calls.clear()
+    ch = make_checker(data_dir, calls, blick.BlickIncremental.load(state_file))
+    asyncio.run(ch.arun_all())
+    assert calls == ["always"]
+    assert ch.replay_count == 3
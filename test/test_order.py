@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from src import blick
+
+
+def make_func(ruid, status=True, runtime=0.0, depends_on=""):
+    @blick.attributes(ruid=ruid, depends_on=depends_on)
+    def func():
+        return blick.BR(status=status, msg=ruid)
+
+    func.__name__ = f"func_{ruid}"
+    return blick.BlickFunction(func)
+
+
+def make_result(ruid, status=True, runtime_sec=0.0, skipped=False):
+    return blick.BR(status=status, ruid=ruid, runtime_sec=runtime_sec, skipped=skipped)
+
+
+@pytest.fixture
+def history(tmp_path):
+    h = blick.BlickHistory(tmp_path / "history.json")
+    h.update([make_result("fast", runtime_sec=0.1),
+              make_result("slow", status=False, runtime_sec=5.0),
+              make_result("medium", runtime_sec=1.0),
+              make_result("medium", status=False, runtime_sec=1.0)])
+    h.update([make_result("fast", status=False, runtime_sec=0.1),
+              make_result("slow", status=False, runtime_sec=5.0),
+              make_result("medium", runtime_sec=3.0)])
+    return h
+
+
+def test_history_update(history):
+    assert history.stats["slow"]["runs"] == 2
+    assert history.stats["slow"]["fails"] == 2
+    assert history.stats["medium"]["runs"] == 2
+    assert history.stats["medium"]["fails"] == 1
+    assert history.stats["fast"]["last_status"] is False
+
+    # Runtime is a smoothed total per run, so it sits between the old and new runtimes.
+    assert 2.0 < history.runtime(make_func("medium")) < 2.5
+    assert history.fail_rate(make_func("medium")) == 0.5
+    assert history.runtime(make_func("new")) is None
+    assert history.fail_rate(make_func("new")) is None
+
+
+def test_history_ignores_skips(tmp_path):
+    h = blick.BlickHistory(tmp_path / "history.json")
+    h.update([make_result("skipped", status=None, skipped=True)])
+    assert not h.stats
+
+
+def test_history_round_trip(history, tmp_path):
+    history.save()
+    loaded = blick.BlickHistory.load(tmp_path / "history.json")
+    assert loaded.stats == history.stats
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_history_missing_and_bad_files(tmp_path):
+    assert blick.BlickHistory.load(tmp_path / "nope.json").stats == {}
+
+    bad = tmp_path / "bad.json"
+    bad.write_text("not json")
+    with pytest.raises(blick.BlickException):
+        blick.BlickHistory.load(bad)
+
+    bad.write_text(json.dumps([1, 2]))
+    with pytest.raises(blick.BlickException):
+        blick.BlickHistory.load(bad)
+
+
+def test_history_without_ruids():
+    @blick.attributes()
+    def check_no_ruid():
+        return True
+
+    func = blick.BlickFunction(check_no_ruid)
+    results = blick.BlickChecker(check_functions=[func], auto_setup=True).run_all()
+    h = blick.BlickHistory()
+    h.update(results)
+    assert h.runtime(func) is not None
+
+
+@pytest.mark.parametrize("strategy,expected", [
+    (blick.OrderByFile, ["new", "fast", "slow", "medium"]),
+    (blick.OrderLongestFirst, ["new", "slow", "medium", "fast"]),
+    (blick.OrderFailFirst, ["new", "slow", "fast", "medium"]),
+])
+def test_order_strategies(history, strategy, expected):
+    funcs = [make_func(ruid) for ruid in ["new", "fast", "slow", "medium"]]
+    ch = blick.BlickChecker(check_functions=funcs)
+    ch.pre_collect()
+    ch.prepare(order_strategy=strategy(history))
+    assert [f.ruid for f in ch.collected] == expected
+
+
+def test_fail_first_ties_keep_file_order(history):
+    # fast and medium have both failed 1 of 2 runs
+    funcs = [make_func(ruid) for ruid in ["medium", "fast", "slow"]]
+    assert [f.ruid for f in blick.OrderFailFirst(history)(funcs)] == ["slow", "medium", "fast"]
+
+
+def test_order_respects_dependencies(history):
+    funcs = [make_func("fast"), make_func("slow", depends_on="fast")]
+    ch = blick.BlickChecker(check_functions=funcs, order_strategy=blick.OrderLongestFirst(history),
+                            auto_setup=True)
+    assert [f.ruid for f in ch.collected] == ["fast", "slow"]
+
+
+def test_default_is_file_order():
+    ch = blick.BlickChecker(check_functions=[make_func("a")], auto_setup=True)
+    assert isinstance(ch.order_strategy, blick.OrderByFile)
+
+
+def test_strategy_factory(history):
+    assert isinstance(blick.OrderStrategy.strategy_factory("longest_first"), blick.OrderLongestFirst)
+    s = blick.OrderStrategy.strategy_factory("OrderFailFirst", history)
+    assert isinstance(s, blick.OrderFailFirst) and s.history is history
+    assert isinstance(blick.OrderStrategy.strategy_factory(blick.OrderByFile), blick.OrderByFile)
+
+    with pytest.raises(blick.BlickException):
+        blick.OrderStrategy.strategy_factory("nope")
+    with pytest.raises(blick.BlickException):
+        blick.OrderStrategy.strategy_factory(int)
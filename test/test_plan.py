@@ -0,0 +1,103 @@
+import dataclasses
+import pickle
+from collections.abc import Mapping
+
+import pytest
+
+from src import blick
+
+
+def check_value(value, limit=10):
+    for i in range(3):
+        yield blick.BlickResult(status=value + i < limit, msg=f"{value + i}")
+
+
+@blick.attributes(tag="other")
+def check_nothing():
+    return True
+
+
+def make_checker(**kwargs):
+    functions = [blick.BlickFunction(check_value), blick.BlickFunction(check_nothing)]
+    return blick.BlickChecker(check_functions=functions, env={"value": 1}, auto_setup=True, **kwargs)
+
+
+def test_prepare_compiles_plan():
+    checker = make_checker()
+    plan = checker.plan
+    assert len(plan) == 2
+    assert plan.matches(checker.collected)
+    step = plan.steps[0]
+    assert step.arg_names == ("value", "limit")
+    assert step.arguments({"value": 5}) == (5, 10)
+    assert step.meta is checker.collected[0].result_meta()
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        step.meta = None
+
+
+def test_run_uses_plan():
+    checker = make_checker()
+    results = checker.run_all()
+    assert [r.msg for r in results[:3]] == ["1", "2", "3"]
+    assert results[3].msg.startswith("Ran check_nothing")
+    assert all(r.meta is checker.plan.steps[0].meta for r in results[:3])
+    assert results[3].tag == "other"
+
+
+def test_plan_recompiled_when_stale():
+    checker = make_checker()
+    plan = checker.plan
+
+    checker.collected[1].tag = "changed"
+    assert checker.run_all()[-1].tag == "changed"
+    assert checker.plan is not plan
+
+    checker.collected = checker.collected[:1]
+    assert len(checker.run_all()) == 3
+    assert len(checker.plan) == 1
+
+
+def test_function_outside_run():
+    """Once a function is given a new environment it works out its own arguments again."""
+    checker = make_checker()
+    checker.run_all()
+    function_ = checker.collected[0]
+    function_.env = {"value": 9}
+    assert [r.status for r in function_()] == [True, False, False]
+    assert pickle.loads(pickle.dumps(function_))._bound is None
+
+
+class FailingEnv(Mapping):
+    """An environment whose names fail to load, like a lazy env function that raises."""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+    def __getitem__(self, name):
+        raise self.error
+
+    def __iter__(self):
+        return iter(["value"])
+
+    def __len__(self):
+        return 1
+
+
+def test_bind_reports_allowed_exceptions_when_run():
+    """An allowed exception while the arguments are looked up fails the rule when it runs."""
+    function_ = blick.BlickFunction(check_value, allowed_exceptions=(ValueError,))
+    env = FailingEnv(ValueError("Boom"))
+    function_.env = env
+    blick.BlickPlan.compile([function_]).bind(env)
+    results = list(function_())
+    assert len(results) == 1
+    assert not results[0].status
+    assert str(results[0].except_) == "Boom"
+
+
+def test_bind_raises_other_exceptions():
+    """Exceptions the function doesn't allow are not caught by the plan either."""
+    function_ = blick.BlickFunction(check_value, allowed_exceptions=(ValueError,))
+    env = FailingEnv(RuntimeError("Boom"))
+    with pytest.raises(RuntimeError):
+        blick.BlickPlan.compile([function_]).bind(env)
@@ -0,0 +1,68 @@
+import os
+import pickle
+
+import pytest
+
+from src import blick
+
+
+@pytest.fixture
+def proc_module():
+    return blick.BlickModule(module_name="check_process_exec", module_file="process_exec/check_process_exec.py")
+
+
+@pytest.mark.parametrize("max_workers", [None, 2])
+def test_process_executor(proc_module, max_workers):
+    """Rules marked with executor="process" run in another process, everything else runs here."""
+    ch = blick.BlickChecker(modules=[proc_module], env={"value": 42}, auto_setup=True, max_workers=max_workers)
+    results = ch.run_all()
+
+    by_ruid = {}
+    for result in results:
+        by_ruid.setdefault(result.ruid, []).append(result)
+
+    assert len(by_ruid["proc_1"]) == 2
+    assert all(r.status for r in by_ruid["proc_1"])
+    assert all(r.msg != str(os.getpid()) for r in by_ruid["proc_1"])
+    assert by_ruid["proc_1"][0].module_name == "check_process_exec"
+
+    assert by_ruid["local_1"][0].msg == str(os.getpid())
+
+    assert by_ruid["proc_2"][0].status is False
+    assert isinstance(by_ruid["proc_2"][0].except_, ValueError)
+
+
+def test_pickle_function(proc_module):
+    """Only the env values the function uses are sent along."""
+    func = [f for f in proc_module.check_functions if f.ruid == "proc_1"][0]
+    func.env = {"value": 42, "not_used": object()}
+    func2 = pickle.loads(pickle.dumps(func))
+    assert func2.env == {"value": 42}
+    assert func2.function is func.function
+    assert [r.status for r in func2()] == [True, True]
+
+
+def test_process_needs_module_function():
+    @blick.attributes(executor="process")
+    def local_func():
+        return True
+
+    ch = blick.BlickChecker(check_functions=[blick.BlickFunction(local_func)], auto_setup=True)
+    with pytest.raises(blick.BlickException):
+        ch.run_all()
+
+
+def test_bad_executor():
+    with pytest.raises(blick.BlickException):
+        @blick.attributes(executor="gpu")
+        def func():
+            return True
+
+
+def test_process_executor_async(proc_module):
+    """Process rules also work from arun_all."""
+    import asyncio
+    ch = blick.BlickChecker(modules=[proc_module], env={"value": 42}, auto_setup=True)
+    results = asyncio.run(ch.arun_all())
+    assert len(results) == 4
+    assert [r.status for r in results if r.ruid == "proc_1"] == [True, True]
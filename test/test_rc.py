@@ -8,6 +8,9 @@ exact same tests should be run against the derived classes.
 
 """
 
+import itertools
+import re
+
 import pytest
 
 from blick import blick_rc
@@ -183,3 +186,51 @@ def test_neg():
 
     assert rc.does_match(phase='p1', ruid='r1', tag='t2') is False
     assert rc.does_match(phase='p1', ruid='r1', tag='t1') is True
+
+
+def _reference_match(rc, ruid="", tag="", phase="", level=""):
+    """does_match as it was written before the patterns were compiled."""
+    level = str(level)
+    patterns = [(rc.ruids, ruid), (rc.tags, tag), (rc.levels, level), (rc.phases, phase)]
+    ex_patterns = [(rc.ex_ruids, ruid), (rc.ex_tags, tag), (rc.ex_levels, level), (rc.ex_phases, phase)]
+    if not rc.is_inclusion_list_empty:
+        for pattern_list, attribute in patterns:
+            if attribute and pattern_list and not any(re.fullmatch(pat, attribute) for pat in pattern_list):
+                return False
+    return not any(attribute and any(re.fullmatch(ex, attribute) for ex in ex_list)
+                   for ex_list, attribute in ex_patterns)
+
+
+@pytest.mark.parametrize("rules", [
+    {'tags': ['t1', 't.x', '-t1x'], 'levels': '1 2 -3'},
+    {'ruids': ['r(1)', r'(r)\1', '-r1'], 'phases': 'p.*,-prod'},
+    {'tags': '-a.*', 'levels': '-1[0-9]'},
+    {'tags': ['(?i)foo', 'bar'], 'phases': ['-(?i)PROD']},
+    {},
+])
+def test_compiled_matches_reference(rules):
+    rc = blick_rc.BlickRC(rc_d=rules)
+    values = ['', 'r1', 'rr', 'r2', 't1', 'tax', 't1x', 'a1', 'p', 'prod', 'pre', 'FOO', 'foo', 'bar', 'Prod']
+    for ruid, tag, phase, level in itertools.product(values[:4], values, values[7:], [1, 2, 3, 12, '']):
+        assert rc.does_match(ruid=ruid, tag=tag, phase=phase, level=level) is \
+               _reference_match(rc, ruid=ruid, tag=tag, phase=phase, level=level)
+
+
+def test_bad_pattern():
+    with pytest.raises(blick.BlickException, match="Invalid pattern"):
+        blick_rc.BlickRC(rc_d={'tags': 't[1'})
+
+
+def test_matching_catalog():
+    def make(i):
+        @blick.attributes(tag=f"t{i % 5}", phase=["dev", "prod"][i % 2], level=i % 4, ruid=f"r{i}")
+        def check():
+            return True
+        return blick.BlickFunction(check)
+
+    functions = [make(i) for i in range(50)]
+    catalog = blick.BlickCatalog(functions)
+    rc = blick_rc.BlickRC(rc_d={'tags': 't[0-2]', 'phases': '-prod', 'levels': '-3', 'ruids': r'-r1\d'})
+    expected = [f for f in functions if rc.does_match(ruid=f.ruid, tag=f.tag, phase=f.phase, level=f.level)]
+    assert catalog.pick(rc.matching(catalog)) == expected
+    assert 0 < len(expected) < 50
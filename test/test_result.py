@@ -1,8 +1,12 @@
+import gc
+import pickle
+
 import pytest
 
 import blick
 from blick import blick_exception
 from blick import blick_result
+from blick.blick_function import BlickFunction
 
 
 # Define the fixture for the results
@@ -91,3 +95,110 @@ def test_group_by_ruids(results):
     """ Test the group_by function with the 'ruids' as the group key """
     r_grouped_results = blick_result.group_by(results, ['ruid'])
     assert len(r_grouped_results) == 7
+
+
+def test_results_share_function_meta():
+    """Results of a function share one record of its attributes, and setting one only changes that result."""
+
+    def check_many():
+        """Docstring"""
+        for i in range(3):
+            yield blick_result.BlickResult(status=True, msg=f"Result {i}")
+
+    results = list(BlickFunction(check_many)())
+    assert len({id(r.meta) for r in results}) == 1
+    assert results[0].doc == "Docstring"
+    assert not hasattr(results[0], "__dict__")
+
+    results[0].tag = "changed"
+    assert results[0].tag == "changed"
+    assert results[1].tag == ""
+    assert results[1].meta is results[2].meta
+
+
+def test_function_meta_made_once():
+    """The meta record is made once per function and made again only after an attribute it holds is set."""
+
+    def check_one():
+        yield blick_result.BlickResult(status=True, msg="One")
+
+    function_ = BlickFunction(check_one)
+    first = list(function_())[0].meta
+    assert list(function_())[0].meta is first
+
+    function_.weight = 2.0
+    assert function_.result_meta() is first
+
+    function_.ruid = "r1"
+    result = list(function_())[0]
+    assert result.meta is not first
+    assert result.ruid == "r1"
+
+
+def test_result_as_dict_and_pickle():
+    """as_dict has the same keys in the same order as always and results pickle."""
+    result = blick_result.BlickResult(status=False, func_name="f", tag="t", level=2, msg="m",
+                                      except_=ValueError("Boom"))
+    d = result.as_dict()
+    assert list(d) == ["status", "func_name", "pkg_name", "module_name", "msg", "info_msg", "warn_msg", "doc",
+                       "runtime_sec", "except_", "traceback", "skipped", "weight", "tag", "level", "phase",
+                       "count", "ruid", "ttl_minutes", "mit_msg", "owner_list", "skip_on_none", "fail_on_none",
+                       "summary_result", "timed_out", "replayed"]
+    assert d["except_"] == "Boom" and d["tag"] == "t" and d["owner_list"] == []
+    assert blick_result.BlickResult.from_dict(d).as_dict() == d
+
+    copy = pickle.loads(pickle.dumps(result))
+    assert copy.tag == "t" and copy.level == 2 and str(copy.except_) == "Boom"
+    assert blick_result.BlickResult(status=True, tag="t") == blick_result.BlickResult(status=True, tag="t")
+    assert blick_result.BlickResult(status=True, tag="t") != blick_result.BlickResult(status=True, tag="u")
+
+
+def test_lazy_render_and_traceback():
+    """The message is rendered once, when read, and the traceback is made when read."""
+
+    class CountingRenderer(blick.BlickRenderText):
+        calls = 0
+
+        def render(self, msg):
+            CountingRenderer.calls += 1
+            return super().render(msg)
+
+    def check_fail():
+        yield blick_result.BlickResult(status=False, msg=f"{blick_result.BlickResult.mu.bold('Bold')} text")
+        raise ValueError("Boom")
+
+    checker = blick.BlickChecker(check_functions=[BlickFunction(check_fail)], renderer=CountingRenderer(),
+                                 auto_setup=True)
+    results = checker.run_all()
+    assert checker.fail_count == 2 and CountingRenderer.calls == 0
+    assert not isinstance(results[1]._traceback, str)
+
+    assert results[0].msg_rendered == results[0].msg_rendered == "Bold text"
+    assert CountingRenderer.calls == 1
+    assert "raise ValueError" in results[1].traceback
+
+    # Tracebacks survive pickling (exceptions lose their frames)
+    assert "raise ValueError" in pickle.loads(pickle.dumps(results[1])).traceback
+    assert blick_result.BlickResult(status=True).traceback == ""
+
+
+def test_exception_result_keeps_no_frames():
+    """A result with an exception doesn't keep the failed rule's frames (and their locals) alive."""
+
+    class Big:
+        pass
+
+    def check_fail():
+        big = Big()  # noqa: F841
+        try:
+            raise KeyError("cause")
+        except KeyError as e:
+            raise ValueError("Boom") from e
+
+    results = list(BlickFunction(check_fail)())
+    gc.collect()
+    assert not any(isinstance(o, Big) for o in gc.get_objects())
+    assert results[0].except_.__traceback__ is None
+    assert results[0].except_.__cause__.__traceback__ is None
+    assert "raise ValueError" in results[0].traceback
+    assert "KeyError: 'cause'" in results[0].traceback
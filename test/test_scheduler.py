@@ -0,0 +1,226 @@
+import threading
+import time
+
+import pytest
+
+from src import blick
+
+
+def make_func(ruid, calls, status=True, depends_on="", **kwargs):
+    @blick.attributes(ruid=ruid, depends_on=depends_on, **kwargs)
+    def func():
+        calls.append(ruid)
+        return blick.BR(status=status() if callable(status) else status, msg=ruid)
+
+    func.__name__ = f"func_{ruid}"
+    return blick.BlickFunction(func)
+
+
+def make_scheduler(funcs, **kwargs):
+    ch = blick.BlickChecker(check_functions=funcs, auto_setup=True)
+    return blick.BlickScheduler(ch, **kwargs)
+
+
+def test_interval_attribute():
+    calls = []
+    assert make_func("a", calls, interval="30sec").interval == 0.5
+    assert make_func("a", calls, interval=2).interval == 2
+    assert make_func("a", calls).interval == 0
+
+
+def test_intervals():
+    """Each rule runs on its own interval, falling back to ttl_minutes and then the default."""
+    calls, runs = [], []
+    funcs = [make_func("fast", calls, interval="1min"),
+             make_func("ttl", calls, ttl_minutes=2),
+             make_func("default", calls)]
+    scheduler = make_scheduler(funcs, default_interval_min=5, on_results=lambda f, r: runs.append(f.ruid))
+
+    scheduler.start(now=0)
+    for minute in range(11):
+        scheduler.run_pending(now=minute * 60)
+
+    # The fake clock doesn't move the real one, so the ttl rule only calls its function once
+    assert runs.count("fast") == 11
+    assert runs.count("ttl") == 6
+    assert runs.count("default") == 3
+    assert scheduler.next_due() == 660
+
+
+def test_nothing_due():
+    calls = []
+    scheduler = make_scheduler([make_func("a", calls)])
+    scheduler.start(now=0)
+    assert len(scheduler.run_pending(now=0)) == 1
+    assert scheduler.run_pending(now=10) == []
+    assert calls == ["a"]
+
+
+def test_falling_behind_does_not_catch_up():
+    calls = []
+    scheduler = make_scheduler([make_func("a", calls, interval=1)])
+    scheduler.start(now=0)
+    scheduler.run_pending(now=0)
+    scheduler.run_pending(now=600)  # Ten intervals late
+    assert calls == ["a", "a"]
+    assert scheduler.next_due() == 660
+
+
+def test_latest_results_and_publish():
+    calls = []
+    state = {"status": True}
+    published = []
+    funcs = [make_func("flaky", calls, status=lambda: state["status"], interval=1),
+             make_func("steady", calls, interval=10)]
+    scheduler = make_scheduler(funcs, on_results=lambda f, r: published.append((f.ruid, r[0].status)))
+
+    scheduler.start(now=0)
+    scheduler.run_pending(now=0)
+    assert scheduler.checker.score == 100.0
+
+    state["status"] = False
+    scheduler.run_pending(now=60)
+    latest = scheduler.latest_results()
+    assert [(r.ruid, r.status) for r in latest] == [("flaky", False), ("steady", True)]
+    assert published == [("flaky", True), ("steady", True), ("flaky", False)]
+    assert scheduler.checker.results == latest
+    assert scheduler.checker.score == 50.0
+
+
+class CountFails(blick.ScoreStrategy):
+    """Only knows how to score a list."""
+
+    def score(self, results=None):
+        return float(sum(1 for r in results if not r.status))
+
+
+@pytest.mark.parametrize("strategy", [blick.ScoreByResult, blick.ScoreByFunctionBinary, CountFails])
+def test_batches_counted(strategy):
+    """The checker's stats and score are those of the latest results of every rule."""
+    calls = []
+    state = {"status": True}
+    funcs = [make_func("flaky", calls, status=lambda: state["status"], interval=1),
+             make_func("steady", calls, interval=2)]
+    ch = blick.BlickChecker(check_functions=funcs, auto_setup=True, score_strategy=strategy())
+    scheduler = blick.BlickScheduler(ch)
+    scheduler.start(now=0)
+    for minute in range(5):
+        state["status"] = minute % 2 == 0
+        scheduler.run_pending(now=minute * 60)
+        latest = scheduler.latest_results()
+        expected = blick.BlickRunStats.from_results(latest)
+        assert (ch.stats.result_count, ch.stats.pass_count, ch.stats.fail_count) == \
+               (expected.result_count, expected.pass_count, expected.fail_count)
+        assert ch.score == strategy()(latest)
+    assert ch.stats.result_count == 2
+
+
+def test_run_all_between_batches():
+    """A run of the shared checker (the API) between batches doesn't throw the scheduler's counts off."""
+    calls = []
+    funcs = [make_func("a", calls, interval=1), make_func("b", calls, status=False, interval=1)]
+    scheduler = make_scheduler(funcs)
+    ch = scheduler.checker
+    scheduler.start(now=0)
+    scheduler.run_pending(now=0)
+
+    prepared, ch.collected = ch.collected, funcs[1:]
+    ch.run_all()
+    ch.collected = prepared
+    assert ch.stats.result_count == 1
+
+    scheduler.run_pending(now=60)
+    assert (ch.stats.result_count, ch.stats.pass_count, ch.stats.fail_count) == (2, 1, 1)
+    assert ch.score == 50.0
+    assert calls == ["a", "b", "b", "a", "b"]
+
+
+def test_run_all_waits_for_batch():
+    """run_all on the checker waits for a batch running on another thread."""
+    started, release = threading.Event(), threading.Event()
+    order = []
+
+    def slow():
+        started.set()
+        release.wait(5)
+        order.append("batch")
+        return True
+
+    funcs = [make_func("slow", [], status=slow, interval=1)]
+    scheduler = make_scheduler(funcs)
+    scheduler.start(now=0)
+    batch = threading.Thread(target=scheduler.run_pending, kwargs={"now": 0})
+    batch.start()
+    assert started.wait(5)
+
+    run = threading.Thread(target=lambda: order.append(len(scheduler.checker.run_all())))
+    run.start()
+    time.sleep(0.1)
+    assert order == []
+    release.set()
+    batch.join(5)
+    run.join(5)
+    assert order == ["batch", "batch", 1]
+
+
+def test_run_scope_env_per_batch():
+    """Run scope env functions are torn down after every batch and set up for the next."""
+    events = []
+
+    def env_value(_: dict):
+        events.append("setup")
+        yield {"value": len(events)}
+        events.append("teardown")
+
+    def check_value(value):
+        return blick.BR(status=True, msg=f"value={value}")
+
+    module = blick.BlickModule(module_name="batched", module_file="batched.py", env_functions=[env_value],
+                               auto_load=False)
+    ch = blick.BlickChecker(modules=[module], check_functions=[blick.BlickFunction(check_value)],
+                            auto_setup=True)
+    scheduler = blick.BlickScheduler(ch, default_interval_min=1)
+    scheduler.start(now=0)
+    assert scheduler.run_pending(now=0)[0].msg == "value=1"
+    assert events == ["setup", "teardown"]
+    assert scheduler.run_pending(now=60)[0].msg == "value=3"
+    assert events == ["setup", "teardown", "setup", "teardown"]
+
+
+def test_prerequisite_from_earlier_batch():
+    """A rule due on its own is skipped if its prerequisite failed the last time it ran."""
+    calls = []
+    funcs = [make_func("db", calls, status=False, interval=10),
+             make_func("table", calls, depends_on="db", interval=1)]
+    scheduler = make_scheduler(funcs)
+    scheduler.start(now=0)
+    scheduler.run_pending(now=0)
+    results = scheduler.run_pending(now=60)
+    assert calls == ["db"]
+    assert [r.skipped for r in results] == [True]
+
+
+def test_bad_default_interval():
+    with pytest.raises(blick.BlickException):
+        make_scheduler([make_func("a", [])], default_interval_min=0)
+
+
+def test_run_forever_and_stop():
+    calls = []
+    scheduler = make_scheduler([make_func("a", calls, interval="0.05sec")])
+    thread = scheduler.start_thread()
+    deadline = time.time() + 5
+    while len(calls) < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    scheduler.stop()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert len(calls) >= 3
+
+
+def test_run_forever_max_batches():
+    calls = []
+    scheduler = make_scheduler([make_func("a", calls, interval="0.01sec")])
+    scheduler.run_forever(max_batches=2)
+    assert calls == ["a", "a"]
+    assert scheduler.run_count == 2
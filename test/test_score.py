@@ -146,3 +146,51 @@ def test_bad_strategy_class():
 def test_null_results(scoring_function):
     score = scoring_function()
     assert score([]) == 0.0
+
+
+@pytest.mark.parametrize("scoring_function", [
+    blick.ScoreBinaryFail,
+    blick.ScoreBinaryPass,
+    blick.ScoreByResult,
+    blick.ScoreByFunctionMean,
+    blick.ScoreByFunctionBinary,
+])
+def test_accumulator_matches_list(scoring_function, by_func_weights_with_skip):
+    """Adding results one at a time gives the list score at every step."""
+    strategy = scoring_function()
+    acc = strategy.start()
+    for count, result in enumerate(by_func_weights_with_skip, start=1):
+        acc.add(result)
+        assert acc.value() == pytest.approx(strategy(by_func_weights_with_skip[:count]))
+
+
+def test_list_only_strategy(by_func_weights_with_skip):
+    """Strategies written before accumulators (only score) still work with start."""
+
+    class CountPasses(blick.ScoreStrategy):
+        def score(self, results=None):
+            return float(sum(1 for r in results if r.status))
+
+    acc = CountPasses().start()
+    for result in by_func_weights_with_skip:
+        acc.add(result)
+    assert acc.value() == 3.0
+
+
+def test_strategy_needs_score_or_start():
+    class Empty(blick.ScoreStrategy):
+        pass
+
+    with pytest.raises(blick.BlickException):
+        Empty().start()
+
+
+def test_running_score():
+    def check_two():
+        yield blick.BR(status=True)
+        yield blick.BR(status=False)
+
+    checker = blick.BlickChecker(check_functions=[blick.BlickFunction(check_two)], auto_setup=True)
+    scores = [checker.running_score for _ in checker.yield_all()]
+    assert scores == [100.0, 50.0]
+    assert checker.score == 50.0
@@ -0,0 +1,130 @@
+import json
+
+import pytest
+
+from src import blick
+
+
+def make_func(ruid, status=True, depends_on="", tag=""):
+    @blick.attributes(ruid=ruid, depends_on=depends_on, tag=tag)
+    def func():
+        return blick.BR(status=status, msg=ruid)
+
+    func.__name__ = f"func_{ruid}"
+    return blick.BlickFunction(func)
+
+
+def make_funcs(n=40):
+    return [make_func(f"rule_{i}", status=i % 5 != 0, tag=f"t{i % 3}") for i in range(n)]
+
+
+def test_shards_cover_everything_once():
+    funcs = make_funcs()
+    shards = [blick.shard_functions(funcs, i, 3) for i in range(3)]
+    ruids = [f.ruid for shard in shards for f in shard]
+    assert sorted(ruids) == sorted(f.ruid for f in funcs)
+    assert all(shards)
+
+    # Order within a shard is the collected order
+    for shard in shards:
+        assert shard == [f for f in funcs if f in shard]
+
+
+def test_shards_are_stable():
+    """A fresh set of function objects (think another machine) gets the same split."""
+    first = [f.ruid for f in blick.shard_functions(make_funcs(), 1, 4)]
+    second = [f.ruid for f in blick.shard_functions(make_funcs(), 1, 4)]
+    assert first == second
+
+
+def test_dependencies_stay_together():
+    funcs = make_funcs(20) + [make_func("child", depends_on="rule_3"),
+                              make_func("grandchild", depends_on="child")]
+    for i in range(4):
+        ruids = {f.ruid for f in blick.shard_functions(funcs, i, 4)}
+        assert {"rule_3", "child", "grandchild"} <= ruids or not ruids & {"rule_3", "child", "grandchild"}
+
+
+def test_balanced_by_history(tmp_path):
+    funcs = make_funcs(8)
+    history = blick.BlickHistory(tmp_path / "h.json")
+    history.update([blick.BR(status=True, ruid=f"rule_{i}", runtime_sec=t)
+                    for i, t in enumerate([8, 1, 1, 1, 1, 1, 1, 1])])
+
+    shards = [blick.shard_functions(funcs, i, 2, history) for i in range(2)]
+    slow = [s for s in shards if any(f.ruid == "rule_0" for f in s)][0]
+    assert [f.ruid for f in slow] == ["rule_0"]
+    assert sum(len(s) for s in shards) == 8
+
+
+@pytest.mark.parametrize("index,count", [(2, 2), (-1, 2), (0, 0), (True, 2), (None, 2), (0, None)])
+def test_bad_shard_settings(index, count):
+    with pytest.raises(blick.BlickException):
+        blick.BlickChecker(check_functions=make_funcs(2), shard_index=index, shard_count=count)
+
+
+def run_shard(index, count, tmp_path, **kwargs):
+    ch = blick.BlickChecker(check_functions=make_funcs(), shard_index=index, shard_count=count,
+                            auto_setup=True, **kwargs)
+    ch.run_all()
+    path = tmp_path / f"shard_{index}.json"
+    path.write_text(json.dumps(ch.as_dict(), default=str))
+    return json.loads(path.read_text())
+
+
+def test_merge_matches_single_run(tmp_path):
+    whole = blick.BlickChecker(check_functions=make_funcs(), auto_setup=True)
+    whole.run_all()
+    expected = whole.as_dict()
+
+    runs = [run_shard(i, 3, tmp_path) for i in range(3)]
+    assert runs[0]["shard_index"] == 0 and runs[0]["shard_count"] == 3
+    merged = blick.merge_runs(runs)
+
+    for key in ("function_count", "tags", "levels", "phases", "ruids", "passed_count",
+                "failed_count", "skip_count", "total_count", "score_strategy"):
+        assert merged[key] == expected[key], key
+    assert merged["score"] == pytest.approx(expected["score"])
+    assert sorted(r["ruid"] for r in merged["results"]) == sorted(r["ruid"] for r in expected["results"])
+    assert merged["duration_seconds"] >= 0
+
+
+def test_merge_reports_missing_rules(tmp_path):
+    """Shards balanced on histories that drifted apart can leave a rule out, the merge says which."""
+    histories = []
+    for i in range(2):
+        history = blick.BlickHistory(tmp_path / f"h{i}.json")
+        history.update([blick.BR(status=True, ruid=f"rule_{j}", runtime_sec=100 if i == j else 1)
+                        for j in range(40)])
+        histories.append(history)
+    runs = [run_shard(i, 2, tmp_path, shard_history=histories[i]) for i in range(2)]
+    ran = [key for run in runs for key in run["shard_rules"]]
+    assert sorted(ran) != sorted(runs[0]["shard_expected"])
+
+    with pytest.raises(blick.BlickException, match="more than one shard|No shard ran"):
+        blick.merge_runs(runs)
+
+    runs = [run_shard(0, 2, tmp_path)]
+    with pytest.raises(blick.BlickException, match="No shard ran"):
+        blick.merge_runs(runs)
+
+
+def test_merge_with_other_score_strategy(tmp_path):
+    runs = [run_shard(i, 2, tmp_path) for i in range(2)]
+    merged = blick.merge_runs(runs, blick.ScoreBinaryFail())
+    assert merged["score"] == 0.0
+    assert merged["score_strategy"] == "by_binary_fail"
+
+
+def test_merge_problems(tmp_path):
+    runs = [run_shard(i, 2, tmp_path) for i in range(2)]
+    with pytest.raises(blick.BlickException):
+        blick.merge_runs([])
+    with pytest.raises(blick.BlickException):
+        blick.merge_runs([runs[0], runs[0]])
+    with pytest.raises(blick.BlickException):
+        blick.merge_runs([runs[0], run_shard(1, 3, tmp_path)])
+
+    mixed = run_shard(1, 2, tmp_path, score_strategy=blick.ScoreBinaryPass())
+    with pytest.raises(blick.BlickException):
+        blick.merge_runs([runs[0], mixed])
@@ -0,0 +1,101 @@
+import json
+import sqlite3
+
+import pytest
+
+from src import blick
+
+
+def check_many():
+    """Three passes, a fail, a skip and a warning"""
+    for i in range(3):
+        yield blick.BlickResult(status=True, msg=f"Pass {i}")
+    yield blick.BlickResult(status=False, msg="Fail")
+    yield blick.BlickResult(status=False, skipped=True, msg="Skip")
+    yield blick.BlickResult(status=True, warn_msg="Careful", msg="Warn")
+
+
+def check_exception():
+    raise ValueError("Boom")
+
+
+@pytest.fixture
+def checker():
+    return blick.BlickChecker(check_functions=[blick.BlickFunction(check_many), blick.BlickFunction(check_exception)],
+                              auto_setup=True)
+
+
+def test_counts_kept_without_results(checker):
+    """Counts and score are the same whether or not results are kept."""
+    results = checker.run_all()
+    kept = (checker.pass_count, checker.fail_count, checker.skip_count, checker.warn_count,
+            checker.result_count, checker.clean_run, checker.perfect_run, checker.score)
+    assert len(results) == 7
+
+    assert checker.run_all(keep_results=False) == []
+    assert checker.results == []
+    assert (checker.pass_count, checker.fail_count, checker.skip_count, checker.warn_count,
+            checker.result_count, checker.clean_run, checker.perfect_run, checker.score) == kept
+    assert kept[:5] == (4, 2, 1, 1, 7)
+    assert checker.as_dict()["total_count"] == 7
+
+
+def test_callback_sink(checker):
+    seen = []
+    results = checker.run_all(sinks=[blick.BlickCallbackSink(seen.append)])
+    assert seen == results
+
+
+def test_jsonl_sink(checker, tmp_path):
+    path = tmp_path / "results.jsonl"
+    checker.run_all(sinks=[blick.BlickJsonlSink(path)], keep_results=False)
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    results = [blick.BlickResult.from_dict(json.loads(line)) for line in lines]
+    assert [r.status for r in results] == [True, True, True, False, False, True, False]
+    assert str(results[-1].except_) == "Boom"
+
+    # Replaced unless appending
+    checker.run_all(sinks=[blick.BlickJsonlSink(path)])
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 7
+    checker.run_all(sinks=[blick.BlickJsonlSink(path, append=True)])
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 14
+
+
+def test_sqlite_sink(checker, tmp_path):
+    path = tmp_path / "results.db"
+    checker.run_all(sinks=[blick.BlickSqliteSink(path, batch_size=2)], keep_results=False)
+    checker.run_all(sinks=[blick.BlickSqliteSink(path)])
+
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute("SELECT run, status, skipped, msg, except_ FROM blick_results").fetchall()
+    assert len(rows) == 14
+    assert len({row[0] for row in rows}) == 2
+    assert rows[3][1:4] == (0, 0, "Fail")
+    assert rows[6][4] == "Boom"
+
+
+def test_sqlite_sink_table_name(tmp_path):
+    with pytest.raises(blick.BlickException):
+        blick.BlickSqliteSink(tmp_path / "results.db", table="bad name; DROP")
+
+
+def test_sinks_closed_on_abort(tmp_path):
+    """Sinks are closed even when the run stops early."""
+    path = tmp_path / "results.jsonl"
+    checker = blick.BlickChecker(check_functions=[blick.BlickFunction(check_many)], abort_on_fail=True,
+                                 auto_setup=True)
+    checker.run_all(sinks=[blick.BlickJsonlSink(path)])
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 4
+
+
+def test_results_setter_counts(checker):
+    checker.results = [blick.BlickResult(status=True), blick.BlickResult(status=False)]
+    assert (checker.pass_count, checker.fail_count, checker.result_count) == (1, 1, 2)
+
+
+def test_run_stats():
+    stats = blick.BlickRunStats.from_results([blick.BlickResult(status=True, replayed=True),
+                                              blick.BlickResult(status=False, timed_out=True)])
+    assert (stats.pass_count, stats.fail_count, stats.replay_count, stats.timeout_count) == (1, 1, 1, 1)
+    assert stats.clean_run and not stats.perfect_run
@@ -0,0 +1,56 @@
+import pytest
+
+from src import blick
+
+
+@pytest.fixture
+def results():
+    return [
+        blick.BR(status=True, tag="fs", phase="dev", level=1, module_name="m1", runtime_sec=0.5),
+        blick.BR(status=False, tag="fs", phase="dev", level=2, module_name="m1", runtime_sec=1.5),
+        blick.BR(status=True, tag="db", phase="prod", level=2, module_name="m2", runtime_sec=0.25,
+                 warn_msg="Slow"),
+        blick.BR(status=False, tag="db", phase="prod", level=2, module_name="m2", skipped=True),
+        blick.BR(status=False, tag="db", phase="prod", level=1, module_name="m2", runtime_sec=2.0,
+                 except_=ValueError("Boom")),
+    ]
+
+
+def test_breakdowns(results):
+    stats = blick.BlickRunStats.from_results(results)
+    assert stats.by_tag["fs"].as_dict() == {"total": 2, "passed": 1, "failed": 1, "skipped": 0}
+    assert stats.by_tag["db"].as_dict() == {"total": 3, "passed": 1, "failed": 1, "skipped": 1}
+    assert stats.by_phase["prod"].total == 3
+    assert stats.by_level[2].as_dict() == {"total": 3, "passed": 1, "failed": 1, "skipped": 1}
+    assert stats.by_module["m1"].failed == 1
+
+
+def test_runtime(results):
+    stats = blick.BlickRunStats.from_results(results)
+    assert stats.runtime_total == pytest.approx(4.25)
+    assert stats.runtime_min == 0.0
+    assert stats.runtime_max == 2.0
+    assert stats.runtime_mean == pytest.approx(4.25 / 5)
+
+    empty = blick.BlickRunStats()
+    assert (empty.runtime_min, empty.runtime_max, empty.runtime_mean) == (None, None, 0.0)
+
+
+def test_counts_and_overview(results):
+    stats = blick.BlickRunStats.from_results(results)
+    assert (stats.pass_count, stats.fail_count, stats.skip_count, stats.warn_count, stats.except_count) == \
+           (2, 2, 1, 1, 1)
+    assert not stats.clean_run and not stats.perfect_run
+    assert stats.overview() == blick.overview(results)
+
+
+def test_checker_as_dict():
+    def check_stats():
+        yield blick.BR(status=True)
+        yield blick.BR(status=False)
+
+    checker = blick.BlickChecker(check_functions=[blick.BlickFunction(check_stats)], auto_setup=True)
+    checker.run_all(keep_results=False)
+    stats = checker.as_dict()["stats"]
+    assert stats["result_count"] == 2
+    assert sum(s["failed"] for s in stats["by_module"].values()) == 1
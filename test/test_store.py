@@ -0,0 +1,123 @@
+import pickle
+
+import pytest
+
+from src import blick
+from src.blick.blick_result import fails_only, group_by, overview, passes_only, remove_info
+
+
+def check_many():
+    """Three passes, a fail, a skip and a warning"""
+    for i in range(3):
+        yield blick.BlickResult(status=True, msg=f"Pass {i}", info_msg="info" if i == 0 else "")
+    yield blick.BlickResult(status=False, msg="Fail", mit_msg="Fix it", owner_list=["bob"])
+    yield blick.BlickResult(status=False, skipped=True, msg="Skip")
+    yield blick.BlickResult(status=True, warn_msg="Careful", msg="Warn", weight=2.0)
+
+
+@blick.attributes(tag="other")
+def check_exception():
+    raise ValueError("Boom")
+
+
+def functions():
+    return [blick.BlickFunction(check_many), blick.BlickFunction(check_exception)]
+
+
+@pytest.fixture
+def results():
+    return blick.BlickChecker(check_functions=functions(), auto_setup=True).run_all()
+
+
+@pytest.fixture
+def store(results):
+    return blick.BlickResultStore(results)
+
+
+def test_round_trip(results, store):
+    assert len(store) == 7
+    assert list(store) == results
+    assert store == results
+    assert store[3].owner_list == ["bob"]
+    assert store[-1].except_ is results[-1].except_
+    assert store[-1].tag == "other"
+    assert store[1:3] == results[1:3]
+    with pytest.raises(IndexError):
+        _ = store[7]
+
+
+def test_results_are_copies(store):
+    store[0].msg = "Changed"
+    assert store[0].msg == "Pass 0"
+
+
+def test_meta_interned(store):
+    assert len(store.metas) == 2
+    assert list(store.meta_index) == [0] * 6 + [1]
+    assert store.column("tag")[-1] == "other"
+
+
+def test_filters(results, store):
+    assert store.passes_only() == [r for r in results if passes_only(r)]
+    assert store.fails_only() == [r for r in results if fails_only(r)]
+    assert store.remove_info() == [r for r in results if remove_info(r)]
+    assert store.where(status=False, skipped=False).column("msg")[0] == "Fail"
+    assert len(store.where(tag="other")) == 1
+    assert store.warn_as_fail().fails_only().column("msg")[-2] == "Warn"
+
+
+def test_group_by(results, store):
+    grouped = group_by(store, ["tag", "status"])
+    expected = group_by(results, ["tag", "status"])
+    assert grouped.keys() == expected.keys()
+    for tag in expected:
+        for status in expected[tag]:
+            assert grouped[tag][status] == expected[tag][status]
+    with pytest.raises(blick.BlickException):
+        store.group_by([])
+
+
+def test_overview(results, store):
+    assert overview(store) == store.overview() == overview(results)
+
+
+@pytest.mark.parametrize("strategy", [blick.ScoreByResult, blick.ScoreByFunctionBinary, blick.ScoreByFunctionMean,
+                                      blick.ScoreBinaryFail, blick.ScoreBinaryPass])
+def test_scores_match(results, store, strategy):
+    assert strategy().score(store) == pytest.approx(strategy().score(results))
+
+
+def test_checker_result_store(results):
+    checker = blick.BlickChecker(check_functions=functions(), result_store=True, auto_setup=True)
+    store = checker.run_all()
+    assert isinstance(store, blick.BlickResultStore)
+    assert checker.results is store
+    assert store.column("msg") == [r.msg for r in results]
+    assert (checker.pass_count, checker.fail_count, checker.skip_count) == (4, 2, 1)
+    assert len(checker.as_dict()["results"]) == 7
+
+
+def test_pickle(store):
+    assert pickle.loads(pickle.dumps(store)).column("msg") == store.column("msg")
+
+
+def check_markup():
+    yield blick.BlickResult(status=True, msg="<<b>>bold<</b>>")
+
+
+def test_store_keeps_renderer():
+    """Store mode renders msg_rendered the same way list mode does."""
+    results = {}
+    for result_store in (False, True):
+        checker = blick.BlickChecker(check_functions=[blick.BlickFunction(check_markup)],
+                                     renderer=blick.BlickBasicMarkdown(), result_store=result_store,
+                                     auto_setup=True)
+        results[result_store] = checker.run_all()
+    assert results[True][0].msg_rendered == results[False][0].msg_rendered == "**bold**"
+    assert results[True].column("msg_rendered") == ["**bold**"]
+    assert results[True].passes_only()[0].msg_rendered == "**bold**"
+    assert pickle.loads(pickle.dumps(results[True]))[0].msg_rendered == "**bold**"
+
+    cached = blick.BlickResult(status=True, msg="<<b>>x<</b>>")
+    cached.msg_rendered = "**x**"
+    assert blick.BlickResultStore([cached])[0].msg_rendered == "**x**"
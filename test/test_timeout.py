@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src import blick
+
+
+def make_sleeper(name, seconds, timeout=None, results=1):
+    @blick.attributes(ruid=name, timeout=timeout)
+    def func():
+        for i in range(results):
+            yield blick.BR(status=True, msg=f"{name} {i}")
+            time.sleep(seconds)
+
+    func.__name__ = name
+    return blick.BlickFunction(func)
+
+
+@pytest.fixture
+def release():
+    """Lets hung rules exit at the end of a test instead of sleeping forever."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_timeout_attribute():
+    assert make_sleeper("a", 0).timeout is None
+    assert make_sleeper("a", 0, timeout=2.5).timeout == 2.5
+    for bad in (0, -1, True, "10"):
+        with pytest.raises(blick.BlickException):
+            make_sleeper("a", 0, timeout=bad)
+
+
+def test_bad_run_deadline():
+    for bad in (0, -1, True, "10"):
+        with pytest.raises(blick.BlickException):
+            blick.BlickChecker(check_functions=[make_sleeper("a", 0)], run_deadline=bad)
+
+
+@pytest.mark.parametrize("max_workers", [None, 4])
+def test_rule_timeout(release, max_workers):
+    """A hung rule fails with a timeout marker and the rest of the run carries on."""
+
+    @blick.attributes(ruid="hung", timeout=0.1)
+    def hung():
+        yield blick.BR(status=True, msg="before the hang")
+        release.wait()
+
+    funcs = [blick.BlickFunction(hung), make_sleeper("fast", 0)]
+    ch = blick.BlickChecker(check_functions=funcs, auto_setup=True, max_workers=max_workers)
+
+    start = time.time()
+    results = ch.run_all()
+    assert time.time() - start < 5
+
+    assert [r.status for r in results] == [True, False, True]
+    assert results[1].timed_out
+    assert results[1].count == 2
+    assert "timed out after 0.1 seconds" in results[1].msg
+    assert not results[2].timed_out
+    assert ch.timeout_count == 1
+
+
+def test_timed_out_rule_not_cached(release):
+    """The abandoned thread keeps running, but what it finishes is not kept or cached."""
+
+    @blick.attributes(ruid="hung_ttl", timeout=0.1, ttl_minutes=10)
+    def hung_ttl():
+        yield blick.BR(status=True, msg="before the hang")
+        release.wait()
+        yield blick.BR(status=True, msg="after the hang")
+
+    cache = blick.BlickMemoryCache()
+    function_ = blick.BlickFunction(hung_ttl, cache=cache)
+    results = blick.BlickChecker(check_functions=[function_], auto_setup=True).run_all()
+    assert results[1].timed_out
+
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "blick-hung_ttl":
+            thread.join(timeout=5)
+    assert function_.last_results == []
+    assert len(cache) == 0
+
+
+def test_fast_rule_with_timeout():
+    ch = blick.BlickChecker(check_functions=[make_sleeper("a", 0, timeout=5, results=3)], auto_setup=True)
+    results = ch.run_all()
+    assert len(results) == 3
+    assert ch.perfect_run
+
+
+def test_exception_in_watched_rule():
+    @blick.attributes(timeout=5)
+    def broken():
+        raise ValueError("oops")
+
+    results = blick.BlickChecker(check_functions=[blick.BlickFunction(broken)], auto_setup=True).run_all()
+    assert results[0].status is False
+    assert isinstance(results[0].except_, ValueError)
+
+
+def test_run_deadline(release):
+    """Rules still running at the deadline fail, rules after it are skipped."""
+
+    @blick.attributes(ruid="slow")
+    def slow():
+        release.wait()
+        return True
+
+    funcs = [make_sleeper("fast", 0), blick.BlickFunction(slow), make_sleeper("late", 0)]
+    ch = blick.BlickChecker(check_functions=funcs, auto_setup=True, run_deadline=0.2)
+    results = ch.run_all()
+
+    assert [r.status for r in results] == [True, False, None]
+    assert results[1].timed_out
+    assert "run deadline" in results[1].msg
+    assert results[2].skipped and results[2].timed_out
+    assert ch.timeout_count == 2
+
+
+def test_timeout_skips_dependents(release):
+    @blick.attributes(ruid="db", timeout=0.1)
+    def db():
+        release.wait()
+        return True
+
+    funcs = [blick.BlickFunction(db), make_sleeper("table", 0)]
+    funcs[1].depends_on = ("db",)
+    results = blick.BlickChecker(check_functions=funcs, auto_setup=True).run_all()
+    assert results[0].timed_out
+    assert results[1].skipped
+
+
+def test_async_timeout_and_deadline():
+    @blick.attributes(ruid="hung", timeout=0.1)
+    async def hung():
+        await asyncio.sleep(10)
+        return True
+
+    @blick.attributes(ruid="quick")
+    async def quick():
+        return True
+
+    ch = blick.BlickChecker(check_functions=[blick.BlickFunction(hung), blick.BlickFunction(quick)],
+                            auto_setup=True, run_deadline=5)
+    results = asyncio.run(ch.arun_all())
+    assert [r.status for r in results] == [False, True]
+    assert results[0].timed_out